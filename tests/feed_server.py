@@ -0,0 +1,62 @@
+""" Local http.server stand-in for YT's feeds, serves the files at /files_for_tests. Shared by the tests. """
+import os.path
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+FILE_PATH = os.path.dirname(os.path.abspath(__file__)) + '/files_for_tests'
+XML_EXAMPLE_CNN = FILE_PATH + '/example_xml_cnn.xml'
+
+
+class LocalFeedServer:
+    """
+    Stand-in for YT's feeds, serves XML_EXAMPLE_CNN on /feeds/videos.xml?channel_id=, except for:
+        * channel_id=missing -> 404
+        * channel_id=slow -> sleeps for 1 second before answering
+    Answers with an ETag, and 304 if If-None-Match matches it.
+    """
+    etag = '"cnn"'
+
+    def __init__(self):
+        with open(XML_EXAMPLE_CNN, 'rb') as xml_file:
+            xml = xml_file.read()
+        etag = self.etag
+
+        class Handler(BaseHTTPRequestHandler):
+            """ Feed handler """
+            def do_GET(self):
+                """ Serve the feed """
+                channel_id = parse_qs(urlparse(self.path).query).get('channel_id', [''])[0]
+                if channel_id == 'missing':
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                if channel_id == 'slow':
+                    time.sleep(1)
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/xml')
+                self.send_header('Content-Length', str(len(xml)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(xml)
+
+            def log_message(self, *args):
+                """ Silence logs """
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}/feeds/videos.xml?channel_id=%s'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,46 @@
+""" Tests for ChannelNameIndex """
+from unittest import TestCase
+
+from ytsm.model import Channel
+from ytsm.uis.channel_name_index import ChannelNameIndex
+
+
+class TestChannelNameIndex(TestCase):
+    def setUp(self) -> None:
+        """ Set up an index with some Channels """
+        self.index = ChannelNameIndex()
+        self.index.add('a', 'Cooking with Python')
+        self.index.add('b', 'Python')
+        self.index.add('c', 'Monty Pythons')
+        self.index.add('d', 'Ñandú TV')
+
+    def test_search(self):
+        self.assertEqual(['b', 'a', 'c'], self.index.search('python'))  # Exact, prefix, word
+        self.assertEqual(['a', 'c', 'b'], self.index.search('o'))  # Too short for trigrams, ordered by name
+        self.assertEqual(['d'], self.index.search('ñANDÚ'))
+        self.assertEqual(['a', 'b', 'c', 'd'], sorted(self.index.search('')))
+        self.assertEqual([], self.index.search('Pythonic'))
+        self.assertEqual(['c'], self.index.search('ty py'))
+
+    def test_remove(self):
+        self.index.remove('b')
+        self.index.remove('x')
+        self.assertEqual(['a', 'c'], self.index.search('python'))
+        self.index.remove('a')
+        self.index.remove('c')
+        self.index.remove('d')
+        self.assertEqual({}, self.index.names)
+        self.assertEqual({}, self.index.trigrams)
+
+    def test_add_renames(self):
+        self.index.add('b', 'Snakes')
+        self.assertEqual(['a', 'c'], self.index.search('python'))
+        self.assertEqual(['b'], self.index.search('snake'))
+
+    def test_sync(self):
+        self.index.sync([Channel('b', 'Python', 'Url', True, 'Thumbnail'),
+                         Channel('d', 'Birds', 'Url', True, 'Thumbnail'),
+                         Channel('e', 'Pythonista', 'Url', True, 'Thumbnail')])
+        self.assertEqual({'b': 'python', 'd': 'birds', 'e': 'pythonista'}, self.index.names)
+        self.assertEqual(['b', 'e'], self.index.search('python'))
+        self.assertEqual([], self.index.search('ñandú'))
@@ -0,0 +1,180 @@
+""" Tests for req_handler, uses a local http.server serving the files at /files_for_tests. """
+import threading
+from unittest import TestCase, mock
+
+import requests
+
+from ytsm.scraper.helpers import req_handler
+from ytsm.scraper.helpers.scrap_wrappers import ScrapWrapper
+from tests.feed_server import LocalFeedServer, XML_EXAMPLE_CNN
+
+
+class TestAsyncRequestHandler(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        """ Start the local server """
+        cls.server = LocalFeedServer().__enter__()
+        with open(XML_EXAMPLE_CNN, 'r', encoding='utf-8') as xml_file:
+            cls.xml = xml_file.read()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """ Stop the local server """
+        cls.server.__exit__()
+
+    def test_run(self):
+        url_list = [self.server.base_url % i for i in range(30)]
+        ARH = req_handler.AsyncRequestHandler(url_list, req_handler.RequestData(req_handler.GET),
+                                              req_handler.RequestErrorData(), concurrency=5)
+        ARH.run()
+        self.assertEqual([], ARH.errors)
+        self.assertEqual(sorted(url_list), sorted(r.url for r in ARH.responses))
+        self.assertTrue(all(r.text == self.xml for r in ARH.responses))
+
+    def test_run_reports_InvalidStatusCode(self):
+        url_list = [self.server.base_url % 'missing', self.server.base_url % 'ok']
+        ARH = req_handler.AsyncRequestHandler(url_list, req_handler.RequestData(req_handler.GET),
+                                              req_handler.RequestErrorData(), max_passes=1)
+        ARH.run()
+        self.assertEqual([self.server.base_url % 'ok'], [r.url for r in ARH.responses])
+        self.assertEqual([(req_handler.InvalidStatusCode, self.server.base_url % 'missing', 404)],
+                         [(e['error'], e['url'], e['response'].status_code) for e in ARH.errors])
+
+    def test_run_raises_InvalidStatusCode_when_not_allow_errors(self):
+        ARH = req_handler.AsyncRequestHandler([self.server.base_url % 'missing'],
+                                              req_handler.RequestData(req_handler.GET),
+                                              req_handler.RequestErrorData(allow_errors=False))
+        self.assertRaises(req_handler.InvalidStatusCode, ARH.run)
+
+    def test_run_timeout_reports_ConnectivityError(self):
+        url_list = [self.server.base_url % 'slow', self.server.base_url % 'ok']
+        ARH = req_handler.AsyncRequestHandler(url_list, req_handler.RequestData(req_handler.GET, timeout=0.2),
+                                              req_handler.RequestErrorData(error_connection_max_tries=0),
+                                              concurrency=1)
+        ARH.run()
+        # The slow url doesn't stall the rest
+        self.assertEqual([self.server.base_url % 'ok'], [r.url for r in ARH.responses])
+        self.assertEqual([(req_handler.ConnectivityError, self.server.base_url % 'slow')],
+                         [(e['error'], e['url']) for e in ARH.errors])
+
+
+class TestThreadedRequestHandler(TestCase):
+    @staticmethod
+    def _raiser_helper(ex):
+        """ Monkey patch raises """
+        raise ex
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """ Start the local server """
+        cls.server = LocalFeedServer().__enter__()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """ Stop the local server """
+        cls.server.__exit__()
+
+    def test_backoff_delay(self):
+        self.assertEqual([0.1, 0.2, 0.4, 0.8], [req_handler.backoff_delay(n) for n in range(4)])
+        self.assertEqual(req_handler.BACKOFF_MAX, req_handler.backoff_delay(100))
+
+    def test_do_threads(self):
+        # The slow url only holds one thread, the other picks up the rest
+        url_list = [self.server.base_url % 'slow'] + [self.server.base_url % i for i in range(20)]
+        TRH = req_handler.ThreadedRequestHandler(url_list, req_handler.RequestData(req_handler.GET),
+                                                 req_handler.RequestErrorData(), thread_num=2)
+        TRH.do_threads()
+        self.assertEqual([], TRH.errors)
+        self.assertEqual(sorted(url_list), sorted(r.url for r in TRH.responses))
+
+    def test_do_threads_retries_ConnectivityError(self):
+        refused_url = 'http://127.0.0.1:1/'
+        url_list = [refused_url, self.server.base_url % 'ok']
+        TRH = req_handler.ThreadedRequestHandler(url_list, req_handler.RequestData(req_handler.GET),
+                                                 req_handler.RequestErrorData(error_connection_max_tries=2),
+                                                 thread_num=2)
+        tries = []
+        request_wrapper = TRH.handler._request_wrapper
+        TRH.handler._request_wrapper = lambda url: tries.append(url) or request_wrapper(url)
+        TRH.do_threads()
+        self.assertEqual(3, tries.count(refused_url))
+        self.assertEqual([self.server.base_url % 'ok'], [r.url for r in TRH.responses])
+        self.assertEqual([(req_handler.ConnectivityError, refused_url)], [(e['error'], e['url']) for e in TRH.errors])
+
+    def test_do_threads_raises_when_not_allow_errors(self):
+        url_list = [self.server.base_url % 'missing'] + [self.server.base_url % i for i in range(5)]
+        TRH = req_handler.ThreadedRequestHandler(url_list, req_handler.RequestData(req_handler.GET),
+                                                 req_handler.RequestErrorData(allow_errors=False), thread_num=2)
+        self.assertRaises(req_handler.InvalidStatusCode, TRH.do_threads)
+
+    def test_do_threads_raises_unexpected_exceptions(self):
+        """ Exceptions not translated by _request_wrapper must not leave do_threads waiting forever """
+        session = requests.Session()
+        session.request = lambda *args, **kwargs: TestThreadedRequestHandler._raiser_helper(
+            requests.exceptions.TooManyRedirects())
+        TRH = req_handler.ThreadedRequestHandler(['http://a', 'http://b', 'http://c'],
+                                                 req_handler.RequestData(req_handler.GET),
+                                                 req_handler.RequestErrorData(), thread_num=2, session=session)
+        raised = []
+
+        def do_threads():
+            """ Run in a thread, so a hang fails the test instead of blocking it """
+            try:
+                TRH.do_threads()
+            except Exception as e:
+                raised.append(e)
+
+        thread = threading.Thread(target=do_threads, daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual([requests.exceptions.TooManyRedirects], [e.__class__ for e in raised])
+
+
+class TestScrapWrapper(TestCase):
+    def test_make_bulk_queries_engines(self):
+        with LocalFeedServer() as server:
+            scrap_wrapper = ScrapWrapper(headers=None, pool_size=4)
+            url_list = [server.base_url % i for i in range(10)] + [server.base_url % 'missing']
+            url_headers = {server.base_url % 0: {'If-None-Match': server.etag}}
+            for engine in req_handler.VALID_ENGINES:
+                responses, errors = scrap_wrapper.make_bulk_queries(url_list, n_passes=0, url_headers=url_headers,
+                                                                    engine=engine)
+                self.assertEqual(10, len(responses))
+                self.assertEqual([304], [r.status_code for r in responses if r.url == server.base_url % 0])
+                self.assertEqual([server.base_url % 'missing'], [e['url'] for e in errors])
+            scrap_wrapper.close()
+
+    def test_make_bulk_queries_engines_same_errors(self):
+        with LocalFeedServer() as server:
+            scrap_wrapper = ScrapWrapper(headers=None, pool_size=4)
+            url_list = ['notaurl', 'http://127.0.0.1:1/', server.base_url % 'missing', server.base_url % 'ok']
+            results = []
+            for engine in req_handler.VALID_ENGINES:
+                with mock.patch.object(req_handler, 'BACKOFF_MAX', 0):  # Don't wait on the refused connection
+                    responses, errors = scrap_wrapper.make_bulk_queries(url_list, n_passes=0, engine=engine)
+                results.append(([r.url for r in responses], sorted((e['error'].__name__, e['url']) for e in errors)))
+            scrap_wrapper.close()
+
+        expected = ([server.base_url % 'ok'], sorted([('InvalidURL', 'notaurl'),
+                                                      ('ConnectivityError', 'http://127.0.0.1:1/'),
+                                                      ('InvalidStatusCode', server.base_url % 'missing')]))
+        self.assertEqual([expected, expected], results)
+
+    def test_make_bulk_queries_raises_InvalidEngine(self):
+        self.assertRaises(req_handler.InvalidEngine, ScrapWrapper(headers=None).make_bulk_queries, [],
+                          engine='bad engine')
+
+    def test_make_bulk_queries_caps_n_threads_at_pool_size(self):
+        scrap_wrapper = ScrapWrapper(headers=None, pool_size=2)
+        with mock.patch.object(req_handler, 'ThreadedRequestHandler') as mocked_handler:
+            scrap_wrapper.make_bulk_queries(['a', 'b', 'c'], n_threads=50)
+            self.assertEqual(2, mocked_handler.call_args.kwargs['thread_num'])
+            scrap_wrapper.make_bulk_queries(['a', 'b', 'c'], n_threads=1)
+            self.assertEqual(1, mocked_handler.call_args.kwargs['thread_num'])
+
+    def test_close(self):
+        scrap_wrapper = ScrapWrapper(headers=None)
+        with mock.patch.object(scrap_wrapper.session, 'close') as mocked_close:
+            scrap_wrapper.close()
+            mocked_close.assert_called_once()
@@ -0,0 +1,79 @@
+""" Tests for SearchScheduler """
+import threading
+import time
+from unittest import TestCase
+
+from ytsm.uis.search_scheduler import SearchScheduler
+
+
+class TestSearchScheduler(TestCase):
+    def setUp(self) -> None:
+        self.scheduler = SearchScheduler(delay=0.05)
+        self.searched = []
+        self.results = []
+
+    def _search(self, term: str) -> str:
+        """ A search that records the thread and term it ran with """
+        self.searched.append((threading.current_thread(), term))
+        return term.upper()
+
+    def _schedule(self, key: str, term: str) -> None:
+        self.scheduler.schedule(key, lambda: self._search(term), self.results.append)
+
+    def test_debounce(self):
+        for term in ('p', 'py', 'pyt'):
+            self._schedule('a', term)
+        self.assertEqual(1, self.scheduler.poll(timeout=5))
+        self.assertEqual(['PYT'], self.results)
+        self.assertEqual(['pyt'], [term for _, term in self.searched])
+        self.assertNotEqual(threading.current_thread(), self.searched[0][0])
+
+    def test_keys(self):
+        self._schedule('a', 'x')
+        self._schedule('b', 'y')
+        self.scheduler.poll(timeout=5)
+        self.scheduler.poll(timeout=5)
+        self.assertCountEqual(['X', 'Y'], self.results)
+
+    def test_stale(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_search():
+            started.set()
+            release.wait(5)
+            return 'stale'
+
+        self.scheduler.schedule('a', slow_search, self.results.append)
+        started.wait(5)
+        self._schedule('a', 'fresh')  # Scheduled while the first one runs
+        release.set()
+        while self.scheduler.poll(timeout=5) == 0:
+            pass
+        self.assertEqual(['FRESH'], self.results)
+
+    def test_cancel(self):
+        self._schedule('a', 'x')
+        self.scheduler.cancel('a')
+        self.assertEqual(0, self.scheduler.poll(timeout=0.2))
+        self.assertEqual([], self.searched)
+        self.assertEqual([], self.results)
+
+    def test_exception(self):
+        def failing_search():
+            raise ValueError('search failed')
+
+        self.scheduler.schedule('a', failing_search, self.results.append)
+        with self.assertRaises(ValueError):
+            self.scheduler.poll(timeout=5)
+        self.assertEqual([], self.results)
+
+        # The other finished searches are still delivered
+        self.scheduler.schedule('a', failing_search, self.results.append)
+        self._schedule('b', 'x')
+        deadline = time.monotonic() + 5
+        while self.scheduler.results.qsize() < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        with self.assertRaises(ValueError):
+            self.scheduler.poll()
+        self.assertEqual(['X'], self.results)
@@ -174,3 +174,20 @@ class TestTUISettings(TestCase):
         ts = TUISettings()
         expected = {'colorscheme': TUIColorScheme().__dict__, 'keybindings': TUIKeyBindings().__dict__}
         self.assertEqual(expected, ts.to_json())
+
+class TestAdvancedSettings(TestCase):
+    def test__post_init__raises_InvalidSettingsValue(self):
+        self.assertRaises(Settings.InvalidSettingsValue, AdvancedSettings, fetch_connections=0)
+        self.assertRaises(Settings.InvalidSettingsValue, AdvancedSettings, fetch_connections='10')
+        self.assertRaises(Settings.InvalidSettingsValue, AdvancedSettings, fetch_engine='bad engine')
+        self.assertRaises(Settings.InvalidSettingsValue, AdvancedSettings, parse_processes=-1)
+        self.assertRaises(Settings.InvalidSettingsValue, AdvancedSettings, parse_processes='2')
+        self.assertRaises(Settings.InvalidSettingsValue, AdvancedSettings, parse_processes_threshold=0)
+        self.assertRaises(Settings.InvalidSettingsValue, AdvancedSettings, sqlite_journal_mode='wal; DROP TABLE videos')
+        self.assertRaises(Settings.InvalidSettingsValue, AdvancedSettings, sqlite_synchronous='SOMETIMES')
+        self.assertRaises(Settings.InvalidSettingsValue, AdvancedSettings, sqlite_busy_timeout=-1)
+        self.assertRaises(Settings.InvalidSettingsValue, AdvancedSettings, sqlite_mmap_size='1')
+        self.assertRaises(Settings.InvalidSettingsValue, AdvancedSettings, sqlite_cache_size=1.5)
+
+    def test_default_fetch_engine_is_threaded(self):
+        self.assertEqual('threaded', AdvancedSettings().fetch_engine)
@@ -0,0 +1,404 @@
+""" Tests for SQLiteRepository """
+import os
+import sqlite3
+import tempfile
+import threading
+from unittest import TestCase, mock
+
+from ytsm.model import VideoStateType, VideoOrderType
+from ytsm.repository.sqlite_repository import SQLiteRepository
+from ytsm.settings import SETTINGS, SQLITE_DB_CREATION_STATEMENTS, SQLITE_DB_MIGRATIONS
+
+
+class TestSQLiteRepository(TestCase):
+    def setUp(self) -> None:
+        """ Set up a temporary DB path """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'ytsm')
+
+    def tearDown(self) -> None:
+        """ Remove the temporary DB """
+        self.tmp_dir.cleanup()
+
+    def _get_indexes(self, repo: SQLiteRepository) -> list[str]:
+        """ Get the names of the indexes on videos """
+        repo.cur.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='videos' AND sql NOT NULL")
+        return sorted(f[0] for f in repo.cur.fetchall())
+
+    def _get_query_plan(self, repo: SQLiteRepository, query: str, params: tuple) -> str:
+        """ Get the EXPLAIN QUERY PLAN details for query """
+        repo.cur.execute(f'EXPLAIN QUERY PLAN {query}', params)
+        return ' '.join(f[-1] for f in repo.cur.fetchall())
+
+    def test_create_db(self):
+        SQLiteRepository.create_db(self.db_path)
+        repo = SQLiteRepository(self.db_path)
+        repo.cur.execute('PRAGMA user_version')
+        self.assertEqual(len(SQLITE_DB_MIGRATIONS), repo.cur.fetchone()[0])
+        self.assertEqual(['videos_channel_id_pubdate', 'videos_new', 'videos_pubdate', 'videos_unwatched'],
+                         self._get_indexes(repo))
+
+    def test__migrate(self):
+        # A db from before migrations: base tables only, on user_version 0, with some data
+        con = sqlite3.connect(self.db_path)
+        for sqlite_statement in SQLITE_DB_CREATION_STATEMENTS[:2]:
+            con.execute(sqlite_statement)
+        con.execute("INSERT into channels values('c', 'Name', 'Url', TRUE, 'Thumbnail')")
+        con.execute("INSERT into videos values('v', 'c', 'Name', 'Url', '22-02-01', 'Desc', 'Thumbnail', TRUE, FALSE)")
+        con.commit()
+        con.close()
+
+        repo = SQLiteRepository(self.db_path)
+        repo.cur.execute('PRAGMA user_version')
+        self.assertEqual(len(SQLITE_DB_MIGRATIONS), repo.cur.fetchone()[0])
+        self.assertEqual(['videos_channel_id_pubdate', 'videos_new', 'videos_pubdate', 'videos_unwatched'],
+                         self._get_indexes(repo))
+        self.assertEqual({}, repo.get_feed_validators())
+        self.assertEqual(['v'], [v.idx for v in repo.get_videos(channel_id='c')])
+        channel = repo.get_channel('c')  # Counters are filled from the existing Videos
+        self.assertEqual((1, 1, 1, '22-02-01'), (channel.total_count, channel.new_count, channel.unwatched_count,
+                                                 channel.last_pubdate))
+        repo.close()
+
+        # Opening it again doesn't run anything
+        repo = SQLiteRepository(self.db_path)
+        statements = []
+        repo.writer.set_trace_callback(statements.append)
+        repo._migrate()
+        self.assertEqual(['PRAGMA user_version', "SELECT COUNT() FROM sqlite_master WHERE type='table' AND "
+                                                 "name='videos'"], statements)
+
+    def _get_counters(self, repo: SQLiteRepository, channel_id: str) -> tuple:
+        """ Get (total_count, new_count, unwatched_count, last_pubdate) for Channel with channel_id """
+        channel = repo.get_channel(channel_id)
+        return channel.total_count, channel.new_count, channel.unwatched_count, channel.last_pubdate
+
+    def test_channel_counters(self):
+        SQLiteRepository.create_db(self.db_path)
+        repo = SQLiteRepository(self.db_path)
+        repo.add_channel('a', 'Name', 'Url', 'Thumbnail')
+        repo.add_channel('b', 'Name', 'Url', 'Thumbnail')
+        self.assertEqual((0, 0, 0, None), self._get_counters(repo, 'a'))
+
+        repo.add_video('v1', 'a', 'Name', 'Url', '22-02-01', 'Desc', 'Thumbnail', True, False)
+        repo.add_videos('a', [('v2', 'Name', 'Url', '22-02-03', 'Desc', 'Thumbnail', True, False),
+                              ('v3', 'Name', 'Url', '22-02-02', 'Desc', 'Thumbnail', False, True)])
+        self.assertEqual((3, 2, 2, '22-02-03'), self._get_counters(repo, 'a'))
+        self.assertEqual((3, 2, 2), (repo.amt_channel_videos('a'), repo.amt_channel_videos('a', VideoStateType.new),
+                                     repo.amt_channel_videos('a', VideoStateType.unwatched)))
+        self.assertEqual('v2', repo.get_last_video_from_channel('a').idx)
+
+        repo.mark_video_as_old('v1')
+        self.assertEqual((3, 1, 2, '22-02-03'), self._get_counters(repo, 'a'))
+        repo.mark_all_videos_watched('a')
+        self.assertEqual((3, 0, 0, '22-02-03'), self._get_counters(repo, 'a'))
+
+        with repo.transaction():
+            repo.cur.execute("UPDATE videos SET channel_id='b', new=TRUE WHERE id='v2'")
+        self.assertEqual((2, 0, 0, '22-02-02'), self._get_counters(repo, 'a'))
+        self.assertEqual((1, 1, 0, '22-02-03'), self._get_counters(repo, 'b'))
+
+        repo.trim_videos(1)
+        self.assertEqual((1, 0, 0, '22-02-02'), self._get_counters(repo, 'a'))
+        repo._remove_video('v3')
+        self.assertEqual((0, 0, 0, None), self._get_counters(repo, 'a'))
+        self.assertIsNone(repo.get_last_video_from_channel('a'))
+        self.assertEqual({'b': (1, 1, 0)}, repo.amt_channels_videos())
+
+    def test__migrate_empty_db(self):
+        repo = SQLiteRepository(self.db_path)
+        repo.cur.execute('PRAGMA user_version')
+        self.assertEqual(0, repo.cur.fetchone()[0])
+        repo.cur.execute("SELECT COUNT() FROM sqlite_master")
+        self.assertEqual(0, repo.cur.fetchone()[0])
+
+    def test_indexes_are_used(self):
+        SQLiteRepository.create_db(self.db_path)
+        repo = SQLiteRepository(self.db_path)
+        self.assertIn('USING INDEX videos_channel_id_pubdate', self._get_query_plan(
+            repo, 'SELECT * FROM videos WHERE channel_id=? ORDER BY pubdate DESC', ('c',)))
+        self.assertIn('USING INDEX videos_new', self._get_query_plan(
+            repo, 'SELECT COUNT() FROM videos WHERE channel_id=? AND new=TRUE', ('c',)))
+        self.assertIn('USING INDEX videos_unwatched', self._get_query_plan(
+            repo, 'SELECT COUNT() FROM videos WHERE channel_id=? AND watched=FALSE', ('c',)))
+        self.assertIn('USING INDEX videos_pubdate', self._get_query_plan(
+            repo, 'SELECT * FROM videos WHERE pubdate > ? AND pubdate < ?', ('a', 'b')))
+
+    def _make_search_repo(self) -> SQLiteRepository:
+        """ Make a repo with a Channel and some Videos to search """
+        SQLiteRepository.create_db(self.db_path)
+        repo = SQLiteRepository(self.db_path)
+        repo.add_channel('a', 'Name', 'Url', 'Thumbnail')
+        repo.add_channel('b', 'Name', 'Url', 'Thumbnail')
+        repo.add_videos('a', [('v1', 'Python tips', 'Url', '22-02-01', 'All about pythons', 'Thumbnail', True, False),
+                              ('v2', 'Cooking', 'Url', '22-02-02', 'Python, python, PYTHON', 'Thumbnail', True, False),
+                              ('v3', 'Ñandú "quoted"', 'Url', '22-02-03', 'Birds', 'Thumbnail', True, False)])
+        repo.add_videos('b', [('v4', 'More Python', 'Url', '22-02-04', 'Snakes', 'Thumbnail', True, False)])
+        return repo
+
+    def test_find_video_by_key_fts(self):
+        repo = self._make_search_repo()
+        self.assertTrue(repo.has_fts)
+        self.assertCountEqual(['v1', 'v4'], [v.idx for v in repo.find_video_by_key('pYTHon')])
+        self.assertEqual(['v1'], [v.idx for v in repo.find_video_by_key('ytho', channel_id='a')])
+        self.assertEqual(['v3'], [v.idx for v in repo.find_video_by_key('ñANDú')])
+        self.assertEqual(['v3'], [v.idx for v in repo.find_video_by_key('"quoted"')])
+        self.assertEqual([], repo.find_video_by_key('tips python'))  # A phrase, not separate words
+        self.assertEqual(['v2', 'v1'], [v.idx for v in repo.find_video_by_key('python', desc=True, ranked=True)])
+        self.assertEqual('Name', repo.find_video_by_key('Cooking')[0].channel_name)
+
+        # The index follows the videos table
+        with repo.transaction():
+            repo.cur.execute("UPDATE videos SET name='Baking' WHERE id='v2'")
+        self.assertEqual([], repo.find_video_by_key('Cooking'))
+        self.assertEqual(['v2'], [v.idx for v in repo.find_video_by_key('bakin')])
+        repo._remove_video('v1')
+        self.assertEqual(['v4'], [v.idx for v in repo.find_video_by_key('python')])
+
+        # Short strings use LIKE
+        statements = []
+        repo.con.set_trace_callback(statements.append)
+        self.assertEqual(['v4'], [v.idx for v in repo.find_video_by_key('re')])
+        self.assertIn('LIKE', statements[-1])
+
+    def test_find_video_by_key_without_fts(self):
+        repo = self._make_search_repo()
+        repo.has_fts = False
+        self.assertCountEqual(['v1', 'v4'], [v.idx for v in repo.find_video_by_key('pYTHon', ranked=True)])
+        self.assertEqual(['v1'], [v.idx for v in repo.find_video_by_key('ytho', channel_id='a')])
+
+    def test__set_up_fts(self):
+        # A db from before the index, its Videos get indexed when opened
+        SQLiteRepository.create_db(self.db_path)
+        con = sqlite3.connect(self.db_path)
+        con.execute("INSERT into channels (id, name, url, notify_on, thumbnail) values('c', 'Name', 'Url', TRUE, 'T')")
+        con.execute("INSERT into videos values('v', 'c', 'Name', 'Url', '22-02-01', 'Desc', 'Thumbnail', TRUE, FALSE)")
+        con.commit()
+        con.close()
+
+        repo = SQLiteRepository(self.db_path)
+        self.assertTrue(repo.has_fts)
+        self.assertEqual(['v'], [v.idx for v in repo.find_video_by_key('Name')])
+        self.assertEqual(['v'], [v.idx for v in repo.find_video_by_key('Desc', desc=True)])
+        repo.close()
+
+        # Opening it again doesn't write
+        repo = SQLiteRepository(self.db_path)
+        statements = []
+        repo.writer.set_trace_callback(statements.append)
+        self.assertTrue(repo._set_up_fts())
+        self.assertEqual(1, len(statements))  # The SELECT
+        repo.close()
+
+        # A lock is not mistaken for missing FTS5
+        con = sqlite3.connect(self.db_path)
+        con.execute('DROP TRIGGER videos_fts_update')
+        con.commit()
+        con.execute('BEGIN IMMEDIATE')
+        with mock.patch.object(SETTINGS.advanced_settings, 'sqlite_busy_timeout', 0):
+            self.assertRaises(sqlite3.OperationalError, SQLiteRepository, self.db_path)
+        con.rollback()
+        con.close()
+        repo = SQLiteRepository(self.db_path)
+        self.assertTrue(repo.has_fts)
+        repo.close()
+
+    def test__has_fts5_trigram(self):
+        repo = SQLiteRepository(':memory:')
+        self.assertTrue(repo._has_fts5_trigram())
+        self.assertTrue(repo._has_fts5_trigram())  # The probe is dropped
+
+    def test_query_videos(self):
+        repo = self._make_search_repo()
+        repo.mark_video_as_watched('v1')
+        repo.mark_video_as_old('v4')
+
+        def query(**kwargs) -> list[str]:
+            """ Query the Videos and get their ids """
+            return [v.idx for v in repo.query_videos(**kwargs)]
+
+        self.assertEqual(['v4', 'v3', 'v2', 'v1'], query())
+        self.assertEqual(['v1', 'v2', 'v3', 'v4'], query(order=VideoOrderType.oldest))
+        self.assertEqual(['v4', 'v3'], query(limit=2))
+        self.assertEqual(['v3', 'v2'], query(video_state_type=VideoStateType.new, channel_id='a'))
+        self.assertEqual(['v4', 'v1'], query(video_state_type=VideoStateType.old))
+        self.assertEqual(['v4', 'v3', 'v2'], query(video_state_type=VideoStateType.unwatched, name_str='o'))
+        self.assertEqual(['v2'], query(video_state_type=VideoStateType.unwatched, desc_str='python'))
+        self.assertEqual(['v1'], query(name_str='python', desc_str='pythons'))
+        self.assertEqual(['v1'], query(name_str='python', desc_str='ab'))  # Index and LIKE together
+        self.assertEqual(['v3', 'v2'], query(date_range=('22-02-01', '22-02-04')))
+        self.assertEqual(['v2', 'v1'], query(desc_str='python', order=VideoOrderType.relevance))
+        self.assertEqual(['v1', 'v4'], query(name_str='python', order=VideoOrderType.oldest))
+        self.assertEqual('Name', repo.query_videos(limit=1)[0].channel_name)
+
+        repo.has_fts = False
+        self.assertEqual(['v2', 'v1'], query(desc_str='python', order=VideoOrderType.relevance))  # Newest
+        self.assertEqual(['v1'], query(name_str='python', desc_str='pythons', channel_id='a'))
+
+        # A single statement
+        statements = []
+        repo.con.set_trace_callback(statements.append)
+        query(name_str='python', video_state_type=VideoStateType.new, channel_id='a', limit=10)
+        self.assertEqual(1, len(statements))
+
+    def test_query_videos_pages(self):
+        SQLiteRepository.create_db(self.db_path)
+        repo = SQLiteRepository(self.db_path)
+        repo.add_channel('a', 'Name', 'Url', 'Thumbnail')
+        repo.add_videos('a', [(f'v{i}', 'Name', 'Url', f'22-02-0{i // 2}', 'Desc', 'Thumbnail', True, False)
+                              for i in range(7)])  # Pairs of Videos with the same pubdate
+
+        for order, expected in ((VideoOrderType.newest, ['v6', 'v5', 'v4', 'v3', 'v2', 'v1', 'v0']),
+                                (VideoOrderType.oldest, ['v0', 'v1', 'v2', 'v3', 'v4', 'v5', 'v6'])):
+            pages, after = [], None
+            while page := repo.query_videos(order=order, limit=3, after=after):
+                pages.append([v.idx for v in page])
+                after = (page[-1].pubdate, page[-1].idx)
+            self.assertEqual([expected[:3], expected[3:6], expected[6:]], pages)
+
+        page = repo.query_videos(channel_id='a', limit=2, after=('22-02-01', 'v3'))
+        self.assertEqual(['v2', 'v1'], [v.idx for v in page])
+        self.assertRaises(ValueError, repo.query_videos, order=VideoOrderType.relevance, after=('22-02-01', 'v3'))
+        self.assertRaises(ValueError, repo.query_videos, order=None, after=('22-02-01', 'v3'))
+
+    def test_query_videos_other_thread(self):
+        SQLiteRepository.create_db(self.db_path)
+        repo = SQLiteRepository(self.db_path)
+        repo.add_channel('a', 'Name', 'Url', 'Thumbnail')
+        repo.add_videos('a', [('v0', 'Name', 'Url', '22-02-01', 'Desc', 'Thumbnail', True, False)])
+
+        found = []
+        thread = threading.Thread(target=lambda: found.extend(v.idx for v in repo.query_videos(channel_id='a')))
+        thread.start()
+        thread.join()
+        self.assertEqual(['v0'], found)
+        self.assertIsNot(repo.cur, self._get_thread_cursor(repo))
+
+    @staticmethod
+    def _get_thread_cursor(repo: SQLiteRepository) -> sqlite3.Cursor:
+        """ Get the cursor repo uses on another thread """
+        cursors = []
+        thread = threading.Thread(target=lambda: cursors.append(repo.cur))
+        thread.start()
+        thread.join()
+        return cursors[0]
+
+    def test_transaction(self):
+        SQLiteRepository.create_db(self.db_path)
+        repo = SQLiteRepository(self.db_path)
+        other_con = sqlite3.connect(self.db_path)
+
+        def committed_channels() -> list[str]:
+            """ Get the ids of the Channels other connections can see """
+            return [f[0] for f in other_con.execute('SELECT id FROM channels ORDER BY id').fetchall()]
+
+        with repo.transaction():
+            repo.add_channel('a', 'Name', 'Url', 'Thumbnail')
+            with repo.transaction():  # Part of the outer one
+                repo.add_channel('b', 'Name', 'Url', 'Thumbnail')
+            repo.set_channel_notify_on_status('a', False)
+            self.assertEqual([], committed_channels())
+        self.assertEqual(['a', 'b'], committed_channels())
+
+        with self.assertRaises(SQLiteRepository.ObjectAlreadyExists):
+            with repo.transaction():
+                repo.remove_channel('b')
+                repo.add_videos('a', [('v0', 'Name', 'Url', '22-02-01', 'Desc', 'Thumbnail', True, False)])
+                repo.add_channel('a', 'Name', 'Url', 'Thumbnail')
+        self.assertEqual(['a', 'b'], committed_channels())
+        self.assertEqual([], repo.get_videos())
+
+        repo.add_channel('c', 'Name', 'Url', 'Thumbnail')  # Back to committing on each call
+        self.assertEqual(['a', 'b', 'c'], committed_channels())
+        other_con.close()
+
+    def test__set_pragmas(self):
+        SQLiteRepository.create_db(self.db_path)
+        repo = SQLiteRepository(self.db_path)
+
+        def pragma(name: str):
+            """ Get the value of PRAGMA name on repo """
+            return repo.cur.execute(f'PRAGMA {name}').fetchone()[0]
+
+        self.assertEqual(('wal', 1, 5000, 256 * 1024 * 1024, -16 * 1024),
+                         (pragma('journal_mode'), pragma('synchronous'), pragma('busy_timeout'), pragma('mmap_size'),
+                          pragma('cache_size')))
+        repo.close()  # Leaving WAL needs the db to itself
+
+        with mock.patch.object(SETTINGS.advanced_settings, 'sqlite_journal_mode', 'DELETE'), \
+                mock.patch.object(SETTINGS.advanced_settings, 'sqlite_synchronous', 'FULL'), \
+                mock.patch.object(SETTINGS.advanced_settings, 'sqlite_cache_size', 100):
+            repo = SQLiteRepository(self.db_path)
+            self.assertEqual(('delete', 2, -100), (pragma('journal_mode'), pragma('synchronous'), pragma('cache_size')))
+
+    def test_readers_dont_block_the_writer(self):
+        SQLiteRepository.create_db(self.db_path)
+        writer, reader = SQLiteRepository(self.db_path), SQLiteRepository(self.db_path)
+        writer.add_channel('a', 'Name', 'Url', 'Thumbnail')
+
+        reader.cur.execute('BEGIN')
+        self.assertEqual(['a'], [c.idx for c in reader.get_all_channels()])  # The reader holds its snapshot
+        with writer.transaction():
+            writer.add_channel('b', 'Name', 'Url', 'Thumbnail')
+            self.assertEqual(['a'], [c.idx for c in reader.get_all_channels()])
+        self.assertEqual(['a'], [c.idx for c in reader.get_all_channels()])
+        reader.con.rollback()
+        self.assertEqual(['a', 'b'], sorted(c.idx for c in reader.get_all_channels()))
+
+    def test_release_thread(self):
+        SQLiteRepository.create_db(self.db_path)
+        repo = SQLiteRepository(self.db_path)
+        repo.add_channel('a', 'Name', 'Url', 'Thumbnail')
+
+        def read():
+            """ Read, and release the reader, as a worker thread would before exiting """
+            readers.append(repo.con)
+            repo.get_all_channels()
+            repo.release_thread()
+            repo.release_thread()  # Nothing left to release
+
+        readers = []
+        for _ in range(3):
+            reader = threading.Thread(target=read)
+            reader.start()
+            reader.join(5)
+        self.assertEqual([], repo._readers)
+        self.assertRaises(sqlite3.ProgrammingError, readers[0].execute, 'SELECT 1')  # Closed
+        self.assertEqual(['a'], [c.idx for c in repo.get_all_channels()])  # The thread can read again after
+        repo.release_thread()
+        self.assertEqual(['a'], [c.idx for c in repo.get_all_channels()])
+        repo.close()
+
+    def test_threads(self):
+        SQLiteRepository.create_db(self.db_path)
+        repo = SQLiteRepository(self.db_path)
+        repo.add_channel('a', 'Name', 'Url', 'Thumbnail')
+
+        # Threads read on their own connection, without waiting for a write in progress
+        read = []
+        reader = threading.Thread(target=lambda: read.extend(c.idx for c in repo.get_all_channels()))
+        with repo.transaction():
+            repo.add_channel('b', 'Name', 'Url', 'Thumbnail')
+            self.assertEqual(['a', 'b'], sorted(c.idx for c in repo.get_all_channels()))  # Its own changes
+            reader.start()
+            reader.join(5)
+            self.assertFalse(reader.is_alive())
+        self.assertEqual(['a'], read)
+
+        # Writes from several threads are serialized
+        def add_videos(n_thread: int):
+            """ Add Videos one by one """
+            for i in range(20):
+                repo.add_video(f'v{n_thread}-{i}', 'a', 'Name', 'Url', '22-02-01', 'Desc', 'Thumbnail', True, False)
+
+        writers = [threading.Thread(target=add_videos, args=(n,)) for n in range(4)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        self.assertEqual(80, repo.amt_channel_videos('a'))
+
+        self.assertRaises(sqlite3.OperationalError, repo.cur.execute, "DELETE FROM channels")  # Readers only read
+        repo.close()
+        self.assertRaises(sqlite3.ProgrammingError, repo.writer.execute, 'SELECT 1')
+        self.assertRaises(sqlite3.ProgrammingError, repo.con.execute, 'SELECT 1')
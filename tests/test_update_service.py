@@ -0,0 +1,101 @@
+""" Tests for BackgroundUpdateService """
+import os
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+from ytsm.model import SuccessUpdateResponse
+from ytsm.repository.sqlite_repository import SQLiteRepository
+from ytsm.uis.update_service import BackgroundUpdateService
+from ytsm.uis.ytsm_controller import YTSMController
+from ytsm.ytsubmanager import YTSubManager
+
+
+class TestBackgroundUpdateService(TestCase):
+    def setUp(self) -> None:
+        """ Set up a temporary DB with two Channels, and the service """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.tmp_dir.name, 'ytsm')
+        SQLiteRepository.create_db(db_path)
+        self.ytsm = YTSubManager(repository=SQLiteRepository(db_path))
+        self.ytsm._add_channel('a', 'A', 'Url', 'Thumbnail')
+        self.ytsm._add_channel('b', 'B', 'Url', 'Thumbnail')
+        self.ytsmc = YTSMController(self.ytsm)
+        self.service = BackgroundUpdateService(self.ytsmc)
+        self.progress, self.done = [], []
+
+    def tearDown(self) -> None:
+        """ Remove the temporary DB """
+        self.ytsm.close()
+        self.tmp_dir.cleanup()
+
+    def _poll_until_done(self) -> None:
+        """ Poll the service, as the UI would, until the update is over """
+        deadline = time.monotonic() + 5
+        while self.service.running and time.monotonic() < deadline:
+            self.service.poll()
+            time.sleep(0.01)
+        self.assertFalse(self.service.running)
+
+    def _start(self) -> bool:
+        return self.service.start(lambda *progress: self.progress.append(progress),
+                                  lambda *result: self.done.append(result))
+
+    def test_update(self):
+        release = threading.Event()
+        threads = []
+
+        def mp_iter_video_list_multiple(channel_ids, validators):
+            """ MP, the feeds arrive once the test lets them """
+            threads.append(threading.current_thread())
+            release.wait(5)
+            for channel_id in channel_ids:
+                videos = [{'id': f'{channel_id}1', 'name': 'Name', 'url': 'Url', 'pubdate': '22-02-01',
+                           'description': 'Desc', 'thumbnail': 'Thumbnail'}] if channel_id == 'b' else []
+                yield SuccessUpdateResponse(channel_id, videos)
+
+        self.ytsm.scraper.iter_video_list_multiple = mp_iter_video_list_multiple
+        self.assertTrue(self._start())
+        self.assertFalse(self._start())  # Already running
+        self.assertEqual(0, self.service.poll())  # The UI thread is not blocked meanwhile
+        release.set()
+        self._poll_until_done()
+
+        self.assertNotEqual(threading.current_thread(), threads[0])
+        self.assertEqual([(1, 2), (2, 2)], [(done, total) for done, total, _ in self.progress])
+        self.assertEqual([({'total': 1, 'details': [('B', 1)], 'errs': {}}, None)], self.done)
+        self.assertEqual(['b1'], [v.idx for v in self.ytsm.get_all_new_videos()])
+        self.assertTrue(self._start())  # Can run again
+        self._poll_until_done()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual([self.ytsm.repository.con], self.ytsm.repository._readers)  # Only this thread's is left
+
+    def test_update_fails(self):
+        def raiser(channel_ids, validators):
+            """ MP, a Channel removed during the update """
+            raise YTSubManager.ChannelDoesNotExist('a')
+            yield
+
+        self.ytsm.scraper.iter_video_list_multiple = raiser
+        self._start()
+        self._poll_until_done()
+        self.assertEqual(1, len(self.done))
+        self.assertIsNone(self.done[0][0])
+        self.assertIsInstance(self.done[0][1], YTSMController.UpdateAllChannelsError)
+
+    def test_unexpected_exception(self):
+        def raiser(channel_ids, validators):
+            """ MP, a bug """
+            raise KeyError('a')
+            yield
+
+        self.ytsm.scraper.iter_video_list_multiple = raiser
+        self._start()
+        with self.assertRaises(KeyError):
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                self.service.poll()
+        self.assertFalse(self.service.running)
+        self.assertEqual([], self.done)
@@ -0,0 +1,66 @@
+""" Tests for the urwid TUI widgets """
+from typing import Optional
+from unittest import TestCase
+
+from urwid import Text
+
+from ytsm.uis.tui_urwid.widgets import LazyListWalker, VerticalScrollListBox
+
+
+class TestLazyListWalker(TestCase):
+    def setUp(self) -> None:
+        """ Set up a LazyListWalker over 0..24, in pages of 10 """
+        self.pages_fetched = []
+        self.walker = LazyListWalker(self._get_page, lambda item: Text(str(item)), page_size=10, cache_margin=5)
+
+    def _get_page(self, after: Optional[int]) -> list[int]:
+        """ Get the page of numbers after after """
+        self.pages_fetched.append(after)
+        start = 0 if after is None else after + 1
+        return list(range(start, min(start + 10, 25)))
+
+    def test_pages_are_fetched_on_demand(self):
+        self.assertEqual([None], self.pages_fetched)
+        self.assertEqual('9', self.walker[9].text)
+        self.assertEqual([None], self.pages_fetched)
+        self.assertEqual(10, self.walker.next_position(9))
+        self.assertEqual([None, 9], self.pages_fetched)
+        self.assertEqual('24', self.walker[24].text)
+        self.assertFalse(self.walker.has_more_items)
+        self.assertRaises(IndexError, self.walker.next_position, 24)
+        self.assertRaises(IndexError, self.walker.__getitem__, 25)
+        self.assertRaises(IndexError, self.walker.prev_position, 0)
+        self.assertEqual([None, 9, 19], self.pages_fetched)
+
+    def test_widgets_are_cached_near_the_focus(self):
+        widget = self.walker[0]
+        self.assertIs(widget, self.walker[0])
+        self.walker[12]
+        self.walker.set_focus(8)
+        self.assertCountEqual([8, 12], self.walker.widgets)
+        self.assertIsNot(widget, self.walker[0])
+        self.assertRaises(IndexError, self.walker.set_focus, 30)
+        self.assertEqual(8, self.walker.focus)
+
+    def test_single_page(self):
+        walker = LazyListWalker(lambda after: ['a', 'b'], lambda item: Text(item))
+        self.assertEqual(['a', 'b'], walker.items)
+        self.assertFalse(walker.has_more_items)
+        self.assertEqual((None, None), LazyListWalker(lambda after: [], lambda item: Text(item)).get_focus())
+
+    def test_list_box_renders_only_what_is_shown(self):
+        listbox = VerticalScrollListBox(lambda ends_visible: None)
+        listbox.load_walker(self.walker)
+        listbox.render((10, 5))
+        self.assertEqual([None], self.pages_fetched)
+        self.assertLessEqual(len(self.walker.widgets), 6)
+
+        # Reloading keeps the focus, unless asked not to
+        listbox.focus_position = 12
+        listbox.load_walker(LazyListWalker(self._get_page, lambda item: Text(str(item)), page_size=10))
+        self.assertEqual(12, listbox.focus_position)
+        listbox.load_walker(LazyListWalker(self._get_page, lambda item: Text(str(item)), page_size=10),
+                            reset_position=True)
+        self.assertEqual(0, listbox.focus_position)
+        listbox.load_data([Text('a')])
+        self.assertEqual(0, listbox.focus_position)
@@ -1,10 +1,14 @@
 """ Tests for YTScraper, uses files at /files_for_tests. """
+import functools
 import json
 import os.path
-from unittest import TestCase
-from ytsm.scraper.yt_scraper import YTScraper
+from unittest import TestCase, mock
+from xml.etree import ElementTree
+from ytsm.scraper.yt_scraper import YTScraper, parse_feeds
+from ytsm.settings import SETTINGS
 from ytsm.model import SuccessUpdateResponse, ErrorUpdateResponse, MultipleUpdateResponse
 from ytsm.scraper.helpers.req_handler import InvalidStatusCode, ReqHandlerError
+from tests.feed_server import LocalFeedServer
 
 FILE_PATH = os.path.dirname(os.path.abspath(__file__)) + '/files_for_tests'
 XML_EXAMPLE_CNN = FILE_PATH + '/example_xml_cnn.xml'
@@ -188,7 +192,7 @@ class TestYTScraper(TestCase):
             def __init__(self):
                 self.urls: list[str] = []
 
-            def make_bulk_queries(self, url_list: list[str]):
+            def make_bulk_queries(self, url_list: list[str], url_headers: dict, **kwargs):
                 """ MP method """
                 self.urls = url_list
                 return [], []
@@ -199,16 +203,148 @@ class TestYTScraper(TestCase):
         self.assertEqual(expected, MPR.urls)
 
         # 2 - Check it creates return dictionary right
-        self.ytscraper._get_urls_parallel = lambda x: ({'aaa': 1, 'bbb': 2}, {})
+        self.ytscraper._get_urls_parallel = lambda x, url_headers: ({'aaa': 1, 'bbb': 2}, {}, {})
         self.ytscraper._extract_video_information_from_xml = lambda x, y: 777
         expected = [SuccessUpdateResponse('aaa', 777), SuccessUpdateResponse('bbb', 777)]
         self.assertEqual(expected, self.ytscraper.get_video_list_multiple(['test']).successes)
 
+    def test_get_video_list_multiple_conditional_requests(self):
+        # 1 - Check validators are sent as conditional headers
+        class MonkeyPatchedResponse:
+            """ MP """
+            def __init__(self):
+                self.url_headers: dict = {}
+
+            def make_bulk_queries(self, url_list: list[str], url_headers: dict, **kwargs):
+                """ MP method """
+                self.url_headers = url_headers
+                return [], []
+
+        MPR = MonkeyPatchedResponse()
+        self.ytscraper.scrap_wrapper.make_bulk_queries = MPR.make_bulk_queries
+        self.ytscraper.get_video_list_multiple(['a', 'b', 'c'], validators={'a': ('"etag"', None),
+                                                                            'b': ('"etag"', 'Sat, 01 Jan 2000'),
+                                                                            'c': (None, None)})
+        expected = {self.ytscraper._rss_base_url % 'a': {'If-None-Match': '"etag"'},
+                    self.ytscraper._rss_base_url % 'b': {'If-None-Match': '"etag"',
+                                                         'If-Modified-Since': 'Sat, 01 Jan 2000'}}
+        self.assertEqual(expected, MPR.url_headers)
+
+        # 2 - Check 304s skip parsing and validators are passed through
+        self.ytscraper._get_urls_parallel = lambda x, url_headers: ({'a': None, 'b': 'xml'}, {},
+                                                                    {'a': ('"etag"', None), 'b': (None, 'Sat')})
+        self.ytscraper._extract_video_information_from_xml = lambda x, y: 777
+        expected = [SuccessUpdateResponse('a', [], not_modified=True, etag='"etag"'),
+                    SuccessUpdateResponse('b', 777, last_modified='Sat')]
+        self.assertEqual(expected, self.ytscraper.get_video_list_multiple(['a', 'b']).successes)
+
+    def test_get_video_list_multiple_local_server(self):
+        channel_id = 'UCupvZG-5ko_eiXAupbDfxWw'
+        with open(JSON_EXAMPLE_VIDEOS_CNN, 'r', encoding='utf-8') as json_file:
+            expected_videos = json.loads(json_file.read())
+
+        with LocalFeedServer() as server:
+            self.ytscraper._rss_base_url = server.base_url
+            response = self.ytscraper.get_video_list_multiple([channel_id])
+            self.assertEqual([SuccessUpdateResponse(channel_id, expected_videos, etag=server.etag)], response.successes)
+
+            response = self.ytscraper.get_video_list_multiple([channel_id],
+                                                              validators={channel_id: (server.etag, None)})
+            self.assertEqual([SuccessUpdateResponse(channel_id, [], not_modified=True, etag=server.etag)],
+                             response.successes)
+
+    def test_iter_video_list_multiple(self):
+        channel_id = 'UCupvZG-5ko_eiXAupbDfxWw'
+        with open(JSON_EXAMPLE_VIDEOS_CNN, 'r', encoding='utf-8') as json_file:
+            expected_videos = json.loads(json_file.read())
+
+        with LocalFeedServer() as server:
+            self.ytscraper._rss_base_url = server.base_url
+            self.ytscraper.scrap_wrapper.make_bulk_queries = functools.partial(
+                self.ytscraper.scrap_wrapper.make_bulk_queries, n_passes=0)
+            response = list(self.ytscraper.iter_video_list_multiple(['missing', channel_id, 'not_modified'],
+                                                                    validators={'not_modified': (server.etag, None)}))
+
+        successes = sorted([r for r in response if isinstance(r, SuccessUpdateResponse)], key=lambda r: r.channel_id)
+        self.assertEqual([SuccessUpdateResponse(channel_id, expected_videos, etag=server.etag),
+                          SuccessUpdateResponse('not_modified', [], not_modified=True, etag=server.etag)], successes)
+        # Errors come last
+        self.assertEqual(ErrorUpdateResponse, response[-1].__class__)
+        self.assertEqual(('missing', YTScraper.YTUrl404), (response[-1].channel_id, response[-1].exception.__class__))
+
+    def test_get_video_list_multiple_parse_processes(self):
+        with open(XML_EXAMPLE_CNN, 'r', encoding='utf-8') as xml_file:
+            xml = xml_file.read()
+        xmls = {f'c{i}': xml for i in range(30)} | {'broken': '<entry></entry>', 'not_modified': None}
+        self.ytscraper._get_urls_parallel = lambda x, url_headers: (xmls, {}, {'c0': ('"etag"', None)})
+        in_process = self.ytscraper.get_video_list_multiple([])
+
+        with mock.patch.object(SETTINGS.advanced_settings, 'parse_processes_threshold', 1), \
+                mock.patch.object(SETTINGS.advanced_settings, 'parse_processes', 2):
+            self.assertEqual(2, self.ytscraper._get_parse_processes(len(xmls)))
+            in_processes = self.ytscraper.get_video_list_multiple([])
+
+        self.assertEqual(in_process.successes, in_processes.successes)
+        self.assertEqual([('broken', YTScraper.VideoListParsingError)],
+                         [(e.channel_id, e.exception.__class__) for e in in_processes.errors])
+
+    def test_iter_video_list_multiple_parse_processes(self):
+        with open(JSON_EXAMPLE_VIDEOS_CNN, 'r', encoding='utf-8') as json_file:
+            expected_videos = json.loads(json_file.read())
+        channel_ids = [f'c{i}' for i in range(30)]
+
+        with LocalFeedServer() as server, \
+                mock.patch.object(SETTINGS.advanced_settings, 'parse_processes_threshold', 1), \
+                mock.patch.object(SETTINGS.advanced_settings, 'parse_processes', 2):
+            self.ytscraper._rss_base_url = server.base_url
+            response = list(self.ytscraper.iter_video_list_multiple(channel_ids + ['not_modified'],
+                                                                    validators={'not_modified': (server.etag, None)}))
+
+        expected = [SuccessUpdateResponse(c, [v | {'channel_id': c} for v in expected_videos], etag=server.etag)
+                    for c in channel_ids] + [SuccessUpdateResponse('not_modified', [], not_modified=True,
+                                                                   etag=server.etag)]
+        self.assertEqual(sorted(expected, key=lambda r: r.channel_id),
+                         sorted(response, key=lambda r: r.channel_id))
+
+    def test_iter_video_list_multiple_parse_pool_counts_bodies(self):
+        channel_ids = [f'c{i}' for i in range(10)]
+        made_pools = []
+        self.ytscraper._make_parse_pool = lambda n_processes: made_pools.append(n_processes)
+
+        with LocalFeedServer() as server, \
+                mock.patch.object(SETTINGS.advanced_settings, 'parse_processes_threshold', 3), \
+                mock.patch.object(SETTINGS.advanced_settings, 'parse_processes', 2):
+            self.ytscraper._rss_base_url = server.base_url
+            response = list(self.ytscraper.iter_video_list_multiple(  # Only 2 bodies, the rest are 304s
+                channel_ids, validators={c: (server.etag, None) for c in channel_ids[2:]}))
+
+        self.assertEqual([], made_pools)
+        self.assertEqual(8, sum(r.not_modified for r in response))
+
+    def test__make_parse_pool(self):
+        pool = self.ytscraper._make_parse_pool(1)
+        self.assertNotEqual('fork', pool._mp_context.get_start_method())
+        self.assertEqual([('a', None)], pool.submit(parse_feeds, [('a', 'not xml')]).result())
+        pool.shutdown()
+
+    def test_parse_feeds(self):
+        with open(XML_EXAMPLE_CNN, 'r', encoding='utf-8') as xml_file:
+            xml = xml_file.read()
+        parsed = parse_feeds([('a', xml), ('b', '<entry></entry>'), ('c', 'not xml')])
+        self.assertEqual(['a', 'b', 'c'], [channel_id for channel_id, _ in parsed])
+        self.assertEqual(self.ytscraper._extract_video_information_from_xml(xml, 'a'),
+                         [self.ytscraper._make_video_information('a', e) for e in parsed[0][1]])
+        self.assertEqual([None, None], [entries for _, entries in parsed[1:]])
+
+    def test_iter_video_list_multiple_raises_on_caller(self):
+        self.ytscraper.scrap_wrapper.make_bulk_queries = lambda x, **kw: self._raiser_helper(ReqHandlerError('666'))
+        self.assertRaises(ReqHandlerError, list, self.ytscraper.iter_video_list_multiple(['666']))
+
     def test_get_video_list_multiple_error_update_responses(self):
-        self.ytscraper._get_urls_parallel = lambda x: ({'d': 666},
-                                                       {'a': YTScraper.YTUrl404(),
-                                                        'b': YTScraper.YTUrlUnexpectedStatusCode(),
-                                                        'c': YTScraper.GettingError()})
+        self.ytscraper._get_urls_parallel = lambda x, url_headers: ({'d': 666},
+                                                                    {'a': YTScraper.YTUrl404(),
+                                                                     'b': YTScraper.YTUrlUnexpectedStatusCode(),
+                                                                     'c': YTScraper.GettingError()}, {})
 
         self.ytscraper._extract_video_information_from_xml = \
             lambda x, y: self._raiser_helper(YTScraper.VideoListParsingError(''))
@@ -234,6 +370,16 @@ class TestYTScraper(TestCase):
         broken_xml = '<entry></entry>'
         self.assertRaises(YTScraper.VideoListParsingError, self.ytscraper._extract_video_information_from_xml,
                           broken_xml, 'Test')
+        with open(XML_EXAMPLE_CNN, 'r', encoding='utf-8') as xml_file:
+            truncated_xml = xml_file.read()[:5000]
+        self.assertRaises(YTScraper.VideoListParsingError, self.ytscraper._extract_video_information_from_xml,
+                          truncated_xml, 'Test')
+
+    def test__get_xml_tag(self):
+        self.assertEqual(['feed', 'yt:videoId', 'media:group', '{urn:other}tag', 'entry'],
+                         [self.ytscraper._get_xml_tag(ElementTree.Element(tag)) for tag in (
+                             '{http://www.w3.org/2005/Atom}feed', '{http://www.youtube.com/xml/schemas/2015}videoId',
+                             '{http://search.yahoo.com/mrss/}group', '{urn:other}tag', 'entry')])
 
     def test__get_url(self):
         # Monkey patch self.scrap_wrapper.make_unique_query to make sure method return's response.text
@@ -263,10 +409,26 @@ class TestYTScraper(TestCase):
             def __init__(self, url: str):
                 self.url = f'channel_id={url}'
                 self.text = 'test'
-        self.ytscraper.scrap_wrapper.make_bulk_queries = lambda x: [[MonkeyPatchedResponse('1'),
-                                                                    MonkeyPatchedResponse('2'),
-                                                                    MonkeyPatchedResponse('3')], []]
-        expected = ({'1': 'test', '2': 'test', '3': 'test'}, {})
+                self.status_code = 200
+                self.headers = {}
+        self.ytscraper.scrap_wrapper.make_bulk_queries = lambda x, **kw: [[MonkeyPatchedResponse('1'),
+                                                                           MonkeyPatchedResponse('2'),
+                                                                           MonkeyPatchedResponse('3')], []]
+        expected = ({'1': 'test', '2': 'test', '3': 'test'}, {}, {})
+        self.assertEqual(expected, self.ytscraper._get_urls_parallel(['test']))
+
+    def test__get_urls_parallel_not_modified(self):
+        class MonkeyPatchedResponse:
+            """ MP """
+            def __init__(self, url: str, status_code: int, headers: dict):
+                self.url = f'channel_id={url}'
+                self.text = ''
+                self.status_code = status_code
+                self.headers = headers
+        self.ytscraper.scrap_wrapper.make_bulk_queries = lambda x, **kw: [
+            [MonkeyPatchedResponse('1', 304, {'ETag': '"a"'}),
+             MonkeyPatchedResponse('2', 200, {'Last-Modified': 'Sat'})], []]
+        expected = ({'1': None, '2': ''}, {}, {'1': ('"a"', None), '2': (None, 'Sat')})
         self.assertEqual(expected, self.ytscraper._get_urls_parallel(['test']))
 
     def test__get_urls_parallel_reports_YTUrl404_on_InvalidStatusCode404(self):
@@ -274,9 +436,9 @@ class TestYTScraper(TestCase):
             """ MP """
             def __init__(self):
                 self.status_code = 404
-        self.ytscraper.scrap_wrapper.make_bulk_queries = lambda x: [[], [{'error': InvalidStatusCode,
-                                                                          'response': MonkeyPatchedStatusCode(),
-                                                                          'url': 'channel_id=test'}]]
+        self.ytscraper.scrap_wrapper.make_bulk_queries = lambda x, **kw: [[], [{'error': InvalidStatusCode,
+                                                                                'response': MonkeyPatchedStatusCode(),
+                                                                                'url': 'channel_id=test'}]]
         expected = YTScraper.YTUrl404
         self.assertEqual(expected, self.ytscraper._get_urls_parallel(['channel_id=test'])[1]['test'].__class__)
 
@@ -285,15 +447,15 @@ class TestYTScraper(TestCase):
             """ MP """
             def __init__(self):
                 self.status_code = 666
-        self.ytscraper.scrap_wrapper.make_bulk_queries = lambda x: [[], [{'error': InvalidStatusCode,
-                                                                          'response': MonkeyPatchedStatusCode(),
-                                                                          'url': 'channel_id=test'}]]
+        self.ytscraper.scrap_wrapper.make_bulk_queries = lambda x, **kw: [[], [{'error': InvalidStatusCode,
+                                                                                'response': MonkeyPatchedStatusCode(),
+                                                                                'url': 'channel_id=test'}]]
 
         self.assertEqual(YTScraper.YTUrlUnexpectedStatusCode,
                               self.ytscraper._get_urls_parallel(['channel_id=test'])[1]['test'].__class__)
 
     def test__get_urls_parallel_reports_GettingError_on_ReqHandlerError(self):
-        self.ytscraper.scrap_wrapper.make_bulk_queries = lambda x: [[], [{'error': ReqHandlerError,
-                                                                          'url': 'channel_id=test'}]]
+        self.ytscraper.scrap_wrapper.make_bulk_queries = lambda x, **kw: [[], [{'error': ReqHandlerError,
+                                                                                'url': 'channel_id=test'}]]
         self.assertEqual(YTScraper.GettingError,
                           self.ytscraper._get_urls_parallel(['channel_id=test'])[1]['test'].__class__)
@@ -38,6 +38,11 @@ class TestYTSMController(TestCase):
         expected_vdto = YTSMController.VideoDTO(video=video, channel_name='Test')
         self.assertEqual(expected_vdto, self.ytsmc.make_video_dto(video))
 
+        # Videos queried along their Channel don't need a lookup per Video
+        self._ytsm.get_channel = lambda channel_id: self.fail('Looked up the Channel')
+        self.assertEqual(expected_vdto, self.ytsmc.make_video_dto(video))
+        self.assertEqual([expected_vdto], self.ytsmc.get_video_dto_list('', all_videos=True))
+
     def test_get_channel_dto_list(self):
         self._ytsm._add_channel('test', 'bTest', 'abcd', 'thumbnail')  # Check sorting (bTest / aTest)
         self._ytsm._add_channel('test2', 'aTest', 'abcd', 'thumbnail')
@@ -47,6 +52,21 @@ class TestYTSMController(TestCase):
         expected = [YTSMController.ChannelDTO(c1, 0, 0, 0), YTSMController.ChannelDTO(c, 0, 0, 0)]
         self.assertEqual(expected, self.ytsmc.get_channel_dto_list())
 
+    def test_get_channel_dto_list_counts(self):
+        self._ytsm._add_channel('test', 'bTest', 'abcd', 'thumbnail')
+        self._ytsm._add_channel('test2', 'aTest', 'abcd', 'thumbnail')
+        self._ytsm._add_video('v1', 'test', 'Name', 'Url', '22-02-01', 'Desc', 'Thumbnail')
+        self._ytsm._add_video('v2', 'test', 'Name', 'Url', '22-02-02', 'Desc', 'Thumbnail')
+        self._ytsm.mark_video_as_watched('v1')
+
+        # Counts come from a single query, not from one per Channel
+        self._ytsm.get_amt_videos = lambda channel_id: self.fail('Counted per Channel')
+        expected = [YTSMController.ChannelDTO(self._ytsm.get_channel('test2'), 0, 0, 0),
+                    YTSMController.ChannelDTO(self._ytsm.get_channel('test'), total=2, new=1, unwatched=1)]
+        self.assertEqual(expected, self.ytsmc.get_channel_dto_list())
+        self.ytsmc.set_channel_search_term('bTe')
+        self.assertEqual(expected[1:], self.ytsmc.get_channel_dto_list())
+
     def test_set_channel_search_term(self):
         self._ytsm._add_channel('test', 'Test', 'abcd', 'thumbnail')
         self._ytsm._add_channel('test2', '666', 'abcd', 'thumbnail')
@@ -55,6 +75,33 @@ class TestYTSMController(TestCase):
         self.ytsmc.set_channel_search_term('666')
         self.assertEqual(expected, self.ytsmc.get_channel_dto_list())
 
+    def test_set_channel_search_term_ranked(self):
+        self._ytsm._add_channel('test', 'A Test', 'abcd', 'thumbnail')
+        self._ytsm._add_channel('test2', 'Tests', 'abcd', 'thumbnail')
+        self._ytsm._add_channel('test3', 'Test', 'abcd', 'thumbnail')
+        self.ytsmc.set_channel_search_term('test')
+        self.assertEqual(['test3', 'test2', 'test'], [cdto.channel.idx for cdto in self.ytsmc.get_channel_dto_list()])
+
+        # Searches don't read every Channel, only the ones that match
+        self._ytsm.get_all_channels = lambda: self.fail('Read every Channel')
+        self.ytsmc.set_channel_search_term('tests')
+        self.assertEqual(['test2'], [cdto.channel.idx for cdto in self.ytsmc.get_channel_dto_list()])
+        del self._ytsm.get_all_channels
+
+        # Channels removed elsewhere are left out, and the ones added elsewhere are picked up on a full reload
+        self._ytsm._add_channel('test4', 'Latest', 'abcd', 'thumbnail')
+        self._ytsm.remove_channel('test3')
+        self.ytsmc.set_channel_search_term('test')
+        self.assertEqual(['test2', 'test'], [cdto.channel.idx for cdto in self.ytsmc.get_channel_dto_list()])
+        self.ytsmc.set_channel_search_term('')
+        self.ytsmc.get_channel_dto_list()
+        self.ytsmc.set_channel_search_term('test')
+        self.assertEqual(['test2', 'test', 'test4'], [cdto.channel.idx for cdto in self.ytsmc.get_channel_dto_list()])
+
+        # Channels added and removed through the controller are picked up right away
+        self.ytsmc.remove_channel(self.ytsmc.get_channel_dto_from_id('test4'))
+        self.assertEqual(['test2', 'test'], [cdto.channel.idx for cdto in self.ytsmc.get_channel_dto_list()])
+
     def test_get_video_dto_list(self):
         # Set up
         self._ytsm._add_channel('test', 'Test', 'abcd', 'thumbnail')
@@ -80,6 +127,37 @@ class TestYTSMController(TestCase):
                          YTSMController.VideoDTO(v3, 'Test2')],
                          self.ytsmc.get_video_dto_list('test', all_videos=True))
 
+    def test_get_video_dto_list_pages(self):
+        self._ytsm._add_channel('test', 'Test', 'abcd', 'thumbnail')
+        for i in range(5):
+            self._ytsm._add_video(f'test{i}', 'test', 'Name', 'Url', f'22-02-0{i}', 'Desc', 'Thumbnail')
+
+        first_page = self.ytsmc.get_video_dto_list('test', limit=2)
+        self.assertEqual(['test4', 'test3'], [vdto.video.idx for vdto in first_page])
+        self.assertTrue(all(vdto.video.new for vdto in first_page))  # Only the page is marked old, after it is fetched
+        self.assertEqual(['test0', 'test1', 'test2'], sorted(v.idx for v in self._ytsm.get_all_new_videos()))
+
+        second_page = self.ytsmc.get_video_dto_list('test', limit=2, after=first_page[-1])
+        self.assertEqual(['test2', 'test1'], [vdto.video.idx for vdto in second_page])
+        self.assertEqual(['test0'], [vdto.video.idx for vdto in self.ytsmc.get_video_dto_list(
+            'test', limit=2, after=second_page[-1])])
+        self.assertFalse(any(v.new for v in self._ytsm.get_all_videos()))
+
+    def test_get_video_dto_list_new_pages(self):
+        self._ytsm._add_channel('test', 'Test', 'abcd', 'thumbnail')
+        for i in range(5):
+            self._ytsm._add_video(f'test{i}', 'test', 'Name', 'Url', f'22-02-0{i}', 'Desc', 'Thumbnail')
+        self.ytsmc.set_video_filter(YTSMController.NEW)
+
+        # Paging through more new Videos than fit on a page gets all of them, as they were when the Channel was visited
+        pages = [self.ytsmc.get_video_dto_list('test', limit=2)]
+        while len(pages[-1]) == 2:
+            pages.append(self.ytsmc.get_video_dto_list('test', limit=2, after=pages[-1][-1]))
+        self.assertEqual([['test4', 'test3'], ['test2', 'test1'], ['test0']],
+                         [[vdto.video.idx for vdto in page] for page in pages])
+        self.assertTrue(all(vdto.video.new for page in pages for vdto in page))
+        self.assertEqual([], self.ytsmc.get_video_dto_list('test', limit=2))
+
     def test_set_video_filter(self):
         # Set up
         self._ytsm._add_channel('test', 'Test', 'abcd', 'thumbnail')
@@ -118,6 +196,21 @@ class TestYTSMController(TestCase):
                           ],
                          self.ytsmc.get_video_dto_list(channel_id='999', all_videos=True))
 
+    def test_set_video_filter_single_query(self):
+        self._ytsm._add_channel('test', 'Test', 'abcd', 'thumbnail')
+        self._ytsm._add_video('test', 'test', 'Name', 'Url', '22-02-04', 'Desc', 'Thumbnail')
+        self._ytsm._add_video('test2', 'test', 'Other', 'Url', '22-02-03', 'Desc', 'Thumbnail')
+        self._ytsm._add_video('test3', 'test', 'Name', 'Url', '22-02-02', 'Desc', 'Thumbnail')
+        self._ytsm.mark_video_as_watched('test')
+
+        # Search and filter are done by the repository, Videos are never fetched only to be dropped
+        self.ytsmc.set_video_filter(YTSMController.UNWATCHED)
+        self.ytsmc.set_video_search_term('nam')
+        statements = []
+        self._ytsm.repository.con.set_trace_callback(statements.append)
+        self.assertEqual(['test3'], [vdto.video.idx for vdto in self.ytsmc.get_video_dto_list('', all_videos=True)])
+        self.assertEqual(1, len(statements))
+
     def test_set_video_filter_raises_ValueError(self):
         self.assertRaises(ValueError, self.ytsmc.set_video_filter, '666')
 
@@ -234,14 +327,22 @@ class TestYTSMController(TestCase):
         self._ytsm._add_channel('test', 'Test', 'abc', 'thumbnail')
         self._ytsm._add_channel('test2', 'Test', 'abc', 'thumbnail')
         self._ytsm._add_channel('test3', 'Test', 'abc', 'thumbnail')
-        self._ytsm.update_all_channels = lambda: {'total': 666, 'new': {'test': 1, 'test2': 2, 'test3': 8},
-                                                  'errs': {'test4': 11, 'test5': 12, 'test6': 13}}
+        self._ytsm.update_all_channels = lambda progress_callback: {
+            'total': 666, 'new': {'test': 1, 'test2': 2, 'test3': 8}, 'errs': {'test4': 11, 'test5': 12, 'test6': 13}}
         expected = {'total': 666, 'details': [('Test', 1), ('Test', 2), ('Test', 8)],
                     'errs': {'test4': 11, 'test5': 12, 'test6': 13}}
         self.assertEqual(expected, self.ytsmc.update_all_channels())
 
+    def test_update_all_channels_progress_callback(self):
+        passed_callbacks = []
+        self._ytsm.update_all_channels = lambda progress_callback: \
+            passed_callbacks.append(progress_callback) or {'total': 0, 'new': {}, 'errs': {}}
+        callback = lambda done, total, ur: None
+        self.ytsmc.update_all_channels(progress_callback=callback)
+        self.assertEqual([callback], passed_callbacks)
+
     def test_update_all_channels_raises_UpdateAllChannelsError(self):
-        def raiser():
+        def raiser(progress_callback):
             """ Monkeypatch a raise """
             raise YTSubManager.BaseYTSMError()
         self._ytsm.update_all_channels = raiser
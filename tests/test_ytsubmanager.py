@@ -2,7 +2,7 @@
 from unittest import TestCase
 from ytsm.ytsubmanager import YTSubManager, YTScraper
 from ytsm.repository.sqlite_repository import SQLiteRepository
-from ytsm.model import Channel, Video, SuccessUpdateResponse, ErrorUpdateResponse, MultipleUpdateResponse
+from ytsm.model import Channel, Video, SuccessUpdateResponse, ErrorUpdateResponse
 from ytsm.settings import SETTINGS, SQLITE_DB_CREATION_STATEMENTS
 
 class TestYTSubManager(TestCase):
@@ -78,6 +78,13 @@ class TestYTSubManager(TestCase):
         self.ytsm.update_channel = lambda x, use_cache: self._raiser_helper(YTSubManager.ChannelAlreadyExists)
         self.assertRaises(YTSubManager.ChannelAlreadyExists, self.ytsm.add_channel, '666')
 
+    def test_add_channel_is_atomic(self):
+        self.ytsm.scraper.get_channel_id_and_thumbnail_from_url = lambda x: ('test', 'test')
+        self.ytsm.scraper.get_channel_information = lambda x: {'id': 'test', 'name': 'name', 'url': 'url'}
+        self.ytsm.update_channel = lambda x, use_cache: self._raiser_helper(YTSubManager.ScraperError)
+        self.assertRaises(YTSubManager.ScraperError, self.ytsm.add_channel, '666')
+        self.assertEqual([], self.ytsm.get_all_channels())
+
     def test_update_channel(self):
         # Just check it funnels the result from _update_video_list
         self.ytsm.scraper.get_video_list = lambda x, use_cache: SuccessUpdateResponse('test', [])
@@ -101,19 +108,28 @@ class TestYTSubManager(TestCase):
         # Empty check
         self.ytsm.update_all_channels()
         # Just check it funnels the results from _update_video_list
-        self.ytsm.scraper.get_video_list_multiple = lambda x: {'a': 'b', 'b': 'a'}
-        self.ytsm.scraper.get_video_list_multiple = lambda x: MultipleUpdateResponse(errors=[], successes=[
+        self.ytsm.scraper.iter_video_list_multiple = lambda x, validators: iter([
             SuccessUpdateResponse('a', []), SuccessUpdateResponse('b', [])
         ])
         self.ytsm._update_video_list = lambda x, y: 388.5  # cute
         self.assertEqual({'total': 777, 'new': {'a': 388.5, 'b': 388.5}, 'errs': {}}, self.ytsm.update_all_channels())
 
+    def test_update_all_channels_commits(self):
+        self.ytsm.scraper.iter_video_list_multiple = lambda x, validators: iter([
+            SuccessUpdateResponse('a', [], etag='"a"'), SuccessUpdateResponse('b', [])])
+        in_transaction = []
+        self.ytsm._update_video_list = lambda x, y: in_transaction.append(self.ytsm.repository._in_transaction) or 0
+        callback = lambda done, total, ur: in_transaction.append(self.ytsm.repository._in_transaction)
+        self.ytsm._add_channel('a', 'Name', 'URL', 'thumbnail')
+        self.ytsm.update_all_channels(progress_callback=callback)  # Each Channel is written in its own transaction
+        self.assertEqual([True, False, True, False], in_transaction)
+        self.assertEqual({'a': ('"a"', None)}, self.ytsm.repository.get_feed_validators())  # Committed with it
+
     def test_update_all_channels_reports_errors_on_YTScraper_errors(self):
-        self.ytsm.scraper.get_video_list_multiple = lambda x: MultipleUpdateResponse(errors=[
+        self.ytsm.scraper.iter_video_list_multiple = lambda x, validators: iter([
+            SuccessUpdateResponse('a', []), SuccessUpdateResponse('b', []),
             ErrorUpdateResponse('c', YTScraper.YTUrl404),
             ErrorUpdateResponse('d', YTScraper.VideoListParsingError)
-        ], successes=[
-            SuccessUpdateResponse('a', []), SuccessUpdateResponse('b', [])
         ])
         self.ytsm._update_video_list = lambda x, y: 388.5  # cute
 
@@ -121,9 +137,55 @@ class TestYTSubManager(TestCase):
                           'errs': {'c': YTScraper.YTUrl404, 'd': YTScraper.VideoListParsingError}},
                          self.ytsm.update_all_channels())
 
+    def test_update_all_channels_conditional_requests(self):
+        self.ytsm._add_channel('a', 'a', 'a', 'a')
+        self.ytsm._add_channel('b', 'b', 'b', 'b')
+        self.ytsm.repository.set_feed_validators('a', '"old"', None)
+
+        # Check stored validators are passed to the scraper
+        passed_validators = []
+        def mp_iter_video_list_multiple(x, validators):
+            """ MP """
+            passed_validators.append(validators)
+            yield SuccessUpdateResponse('a', [], not_modified=True)
+            yield SuccessUpdateResponse('b', [], etag='"new"', last_modified='Sat')
+
+        self.ytsm.scraper.iter_video_list_multiple = mp_iter_video_list_multiple
+        updated = []
+        self.ytsm._update_video_list = lambda x, y: updated.append(y) or 1
+
+        self.assertEqual({'total': 1, 'new': {'b': 1}, 'errs': {}}, self.ytsm.update_all_channels())
+        self.assertEqual([{'a': ('"old"', None)}], passed_validators)
+        # Not modified feeds are not updated, and validators are kept
+        self.assertEqual(['b'], updated)
+        self.assertEqual({'a': ('"old"', None), 'b': ('"new"', 'Sat')}, self.ytsm.repository.get_feed_validators())
+
+        # Removing a channel removes its validators
+        self.ytsm.remove_channel('b')
+        self.assertEqual({'a': ('"old"', None)}, self.ytsm.repository.get_feed_validators())
+
+    def test_update_all_channels_progress_callback(self):
+        self.ytsm._add_channel('a', 'a', 'a', 'a')
+        self.ytsm._add_channel('b', 'b', 'b', 'b')
+        self.ytsm.scraper.iter_video_list_multiple = lambda x, validators: iter([
+            SuccessUpdateResponse('a', []), ErrorUpdateResponse('b', YTScraper.YTUrl404)
+        ])
+        self.ytsm._update_video_list = lambda x, y: 2
+        progress = []
+        self.ytsm.update_all_channels(progress_callback=lambda done, total, ur: progress.append((done, total, ur)))
+        self.assertEqual([(1, 2, SuccessUpdateResponse('a', [], new_videos=2)),
+                          (2, 2, ErrorUpdateResponse('b', YTScraper.YTUrl404))], progress)
+
+    def test_iter_update_all_channels(self):
+        self.ytsm._add_channel('a', 'a', 'a', 'a')
+        video = {'id': '1', 'channel_id': 'a', 'name': '', 'url': '', 'pubdate': '', 'description': '', 'thumbnail': ''}
+        self.ytsm.scraper.iter_video_list_multiple = lambda x, validators: iter([SuccessUpdateResponse('a', [video])])
+        iterator = self.ytsm.iter_update_all_channels()
+        self.assertEqual([SuccessUpdateResponse('a', [video], new_videos=1)], list(iterator))
+        self.assertEqual(['1'], [v.idx for v in self.ytsm.get_all_videos()])
+
     def test_update_all_channels_raises_ChannelDoesNotExist(self):
-        self.ytsm.scraper.get_video_list_multiple = lambda x: MultipleUpdateResponse(errors=[], successes=[
-            SuccessUpdateResponse('666', [])])
+        self.ytsm.scraper.iter_video_list_multiple = lambda x, validators: iter([SuccessUpdateResponse('666', [])])
         self.assertRaises(YTSubManager.ChannelDoesNotExist, self.ytsm.update_all_channels)
 
     def test__update_video_list(self):
@@ -145,6 +207,35 @@ class TestYTSubManager(TestCase):
              {'id': '1', 'channel_id': '1', 'name': '', 'url': '', 'pubdate': '', 'description': '', 'thumbnail': ''}],
             '1'))
 
+    def test__update_video_list_single_transaction(self):
+        self.ytsm._add_channel('1', '', '', '')
+        statements = []
+        self.ytsm.repository.con.set_trace_callback(statements.append)
+        self.assertEqual(15, self.ytsm._update_video_list(
+            [{'id': str(i), 'channel_id': '1', 'name': '', 'url': '', 'pubdate': f'22-02-{i:02}', 'description': '',
+              'thumbnail': ''} for i in range(15, 0, -1)], '1'))
+        self.ytsm.repository.con.set_trace_callback(None)
+        self.assertEqual(1, len([s for s in statements if s == 'COMMIT']))
+        # One executemany, the trace repeats a statement for each trigger it fires
+        self.assertEqual(15, len({s for s in statements if s.startswith('INSERT')}))
+
+    def test__update_video_list_max_videos(self):
+        # Only the newest videos are kept, by pubdate
+        SETTINGS.advanced_settings.max_videos_per_channel = 3
+        self.ytsm._add_channel('1', '', '', '')
+        self.ytsm._add_video('old', '1', '', '', '22-01-01', '', '')
+        self.assertEqual(3, self.ytsm._update_video_list(  # 1 is deleted again, it is over the limit
+            [{'id': str(i), 'channel_id': '1', 'name': '', 'url': '', 'pubdate': f'22-02-{i:02}', 'description': '',
+              'thumbnail': ''} for i in (4, 2, 3, 1)], '1'))
+        self.assertEqual(['2', '3', '4'], sorted(v.idx for v in self.ytsm.get_all_videos(channel_id='1')))
+
+        # Clean up
+        SETTINGS.advanced_settings.max_videos_per_channel = 100
+
+    def test__add_videos_raises_ChannelDoesNotExist(self):
+        self.assertRaises(YTSubManager.ChannelDoesNotExist, self.ytsm._add_videos, '666',
+                          [('1', '', '', '', '', '', True, False)])
+
     def test__update_video_list_raises_ChannelDoesNotExist(self):
         self.assertRaises(YTSubManager.ChannelDoesNotExist, self.ytsm._update_video_list,
                           [{}], '666')
@@ -208,12 +299,36 @@ class TestYTSubManager(TestCase):
             Channel('test2', 'Name', 'URL', True, 'thumbnail'),
             Channel('test3', 'Name', 'URL', True, 'thumbnail')], self.ytsm.get_all_channels())
 
+    def test_get_channels(self):
+        self.ytsm._add_channel('test', 'Name', 'URL', 'thumbnail')
+        self.ytsm._add_channel('test2', 'Name', 'URL', 'thumbnail')
+        self.ytsm._add_channel('test3', 'Name', 'URL', 'thumbnail')
+
+        self.assertEqual(['test', 'test3'], sorted(c.idx for c in self.ytsm.get_channels(['test3', 'test', 'no'])))
+        self.assertEqual([], self.ytsm.get_channels([]))
+        self.ytsm.repository._max_variables = 2  # Chunked under SQLite's limit of host parameters
+        self.assertEqual(['test', 'test2', 'test3'],
+                         sorted(c.idx for c in self.ytsm.get_channels(['test', 'test2', 'test3'])))
+
     def test__add_video(self):
         self.ytsm._add_channel('test', 'Name', 'URL', 'thumbnail')
         self.ytsm._add_video('test', 'test', 'Name', 'Url', '22-02-01', 'Desc', 'Thumbnail')
         self.assertEqual(Video('test', 'test', 'Name', 'Url', '22-02-01', 'Desc', 'Thumbnail', True, False),
                          self.ytsm.get_video('test'))
 
+    def test_videos_carry_channel_name(self):
+        self.ytsm._add_channel('test', 'Test Name', 'URL', 'thumbnail')
+        self.ytsm._add_channel('test2', 'Other Name', 'URL', 'thumbnail')
+        self.ytsm._add_video('test', 'test', 'Name', 'Url', '22-02-01', 'Desc', 'Thumbnail')
+        self.ytsm._add_video('test2', 'test2', 'Name', 'Url', '22-02-02', 'Desc', 'Thumbnail')
+        self.assertEqual('Test Name', self.ytsm.get_video('test').channel_name)
+        self.assertEqual({'test': 'Test Name', 'test2': 'Other Name'},
+                         {v.idx: v.channel_name for v in self.ytsm.get_all_videos()})
+        self.assertEqual(['Test Name'], [v.channel_name for v in self.ytsm.find_video_by_name('Name',
+                                                                                              channel_id='test')])
+        self.assertEqual(['Other Name'], [v.channel_name for v in self.ytsm.get_all_new_videos(channel_id='test2')])
+        self.assertEqual('Other Name', self.ytsm._get_last_video_from_channel('test2').channel_name)
+
     def test__add_video_max_videos(self):
         # Check older videos get deleted to make place for new ones when they reach the SETTINGS limit
         SETTINGS.advanced_settings.max_videos_per_channel = 5
@@ -228,24 +343,40 @@ class TestYTSubManager(TestCase):
         self.ytsm._add_video('test6', 'test', 'Name', 'Url', '22-02-01', 'Desc', 'Thumbnail')
 
         self.assertEqual((5, 5, 5), self.ytsm.get_amt_videos(channel_id='test'))
-        self.assertEqual([Video('test', 'test', 'Name', 'Url', '22-02-06', 'Desc', 'Thumbnail', True, False),
-                          Video('test3', 'test', 'Name', 'Url', '22-02-03', 'Desc', 'Thumbnail', True, False),
-                          Video('test4', 'test', 'Name', 'Url', '22-02-04', 'Desc', 'Thumbnail', True, False),
-                          Video('test5', 'test', 'Name', 'Url', '22-02-05', 'Desc', 'Thumbnail', True, False),
-                          Video('test6', 'test', 'Name', 'Url', '22-02-01', 'Desc', 'Thumbnail', True, False),
-                          ], self.ytsm.get_all_videos(channel_id='test'))
+        self.assertCountEqual([Video('test', 'test', 'Name', 'Url', '22-02-06', 'Desc', 'Thumbnail', True, False),
+                              Video('test3', 'test', 'Name', 'Url', '22-02-03', 'Desc', 'Thumbnail', True, False),
+                              Video('test4', 'test', 'Name', 'Url', '22-02-04', 'Desc', 'Thumbnail', True, False),
+                              Video('test5', 'test', 'Name', 'Url', '22-02-05', 'Desc', 'Thumbnail', True, False),
+                              Video('test6', 'test', 'Name', 'Url', '22-02-01', 'Desc', 'Thumbnail', True, False),
+                              ], self.ytsm.get_all_videos(channel_id='test'))
 
         # Test it works when we change to a lower setting
         SETTINGS.advanced_settings.max_videos_per_channel = 2
         self.ytsm._add_video('test7', 'test', 'Name', 'Url', '22-02-10', 'Desc', 'Thumbnail')
         self.assertEqual((2, 2, 2), self.ytsm.get_amt_videos(channel_id='test'))
-        self.assertEqual([Video('test', 'test', 'Name', 'Url', '22-02-06', 'Desc', 'Thumbnail', True, False),
-                          Video('test7', 'test', 'Name', 'Url', '22-02-10', 'Desc', 'Thumbnail', True, False)],
-                         self.ytsm.get_all_videos(channel_id='test'))
+        self.assertCountEqual([Video('test', 'test', 'Name', 'Url', '22-02-06', 'Desc', 'Thumbnail', True, False),
+                              Video('test7', 'test', 'Name', 'Url', '22-02-10', 'Desc', 'Thumbnail', True, False)],
+                             self.ytsm.get_all_videos(channel_id='test'))
 
         # Clean up
         SETTINGS.advanced_settings.max_videos_per_channel = 100
 
+    def test_trim_videos(self):
+        self.ytsm._add_channel('a', 'Name', 'URL', 'thumbnail')
+        self.ytsm._add_channel('b', 'Name', 'URL', 'thumbnail')
+        for i in range(1, 6):
+            self.ytsm._add_video(f'a{i}', 'a', 'Name', 'Url', f'22-02-0{i}', 'Desc', 'Thumbnail')
+            self.ytsm._add_video(f'b{i}', 'b', 'Name', 'Url', f'22-03-0{6 - i}', 'Desc', 'Thumbnail')
+
+        self.assertEqual(6, self.ytsm.trim_videos(2))  # Newest by pubdate are kept in every Channel
+        self.assertEqual(['a4', 'a5'], sorted(v.idx for v in self.ytsm.get_all_videos(channel_id='a')))
+        self.assertEqual(['b1', 'b2'], sorted(v.idx for v in self.ytsm.get_all_videos(channel_id='b')))
+        self.assertEqual(0, self.ytsm.trim_videos(2))
+
+        self.assertEqual(1, self.ytsm.repository.trim_videos(1, channel_id='a'))
+        self.assertEqual((['a5'], 2), ([v.idx for v in self.ytsm.get_all_videos(channel_id='a')],
+                                       len(self.ytsm.get_all_videos(channel_id='b'))))
+
     def test__add_video_raises_ChannelDoesNotExist(self):
         self.assertRaises(YTSubManager.ChannelDoesNotExist, self.ytsm._add_video, 'test', 'test', 'Name', 'Url',
                           '22-02-01', 'Desc', 'Thumbnail')
@@ -368,6 +499,15 @@ class TestYTSubManager(TestCase):
         self.assertEqual(False, self.ytsm.get_video('test').new)
         self.assertEqual(True, self.ytsm.get_video('test2').new)
 
+    def test_mark_videos_old(self):
+        self.ytsm._add_channel('test', 'Name', 'URL', 'thumbnail')
+        for i in range(5):
+            self.ytsm._add_video(f'test{i}', 'test', 'Name', 'Url', '22-02-01', 'Desc', 'Thumbnail')
+        self.ytsm.repository._max_variables = 2  # Over more than one chunk
+        self.ytsm.mark_videos_old(['test0', 'test1', 'test3', 'test4', 'missing'])
+        self.assertEqual([False, False, True, False, False], [self.ytsm.get_video(f'test{i}').new for i in range(5)])
+        self.ytsm.mark_videos_old([])
+
     def test_mark_all_videos_old(self):
         self.ytsm._add_channel('test', 'Name', 'URL', 'thumbnail')
         self.ytsm._add_video('test1', 'test', 'Name', 'Url', '22-02-01', 'Desc', 'Thumbnail')
@@ -514,6 +654,28 @@ class TestYTSubManager(TestCase):
         self.assertEqual((3, 1, 2), self.ytsm.get_amt_videos(channel_id='test'))
         self.assertEqual((0, 0, 0), self.ytsm.get_amt_videos(channel_id='666'))
 
+    def test_get_amt_videos_by_channel(self):
+        self.ytsm._add_channel('test', 'Name', 'URL', 'thumbnail')
+        self.ytsm._add_channel('test2', 'Name', 'URL', 'thumbnail')
+        self.ytsm._add_channel('test3', 'Name', 'URL', 'thumbnail')
+        self.ytsm._add_video('test', 'test', 'Name', 'Url', '22-02-01', 'Desc', 'Thumbnail')
+        self.ytsm._add_video('test2', 'test', 'Name', 'Url', '22-02-02', 'Desc', 'Thumbnail')
+        self.ytsm._add_video('test3', 'test', 'Name', 'Url', '22-02-03', 'Desc', 'Thumbnail')
+        self.ytsm._add_video('test4', 'test2', 'Name', 'Url', '22-02-03', 'Desc', 'Thumbnail')
+        self.ytsm.mark_video_as_old('test3')
+        self.ytsm.mark_video_as_old('test2')
+        self.ytsm.mark_video_as_watched('test3')
+
+        statements = []
+        self.ytsm.repository.con.set_trace_callback(statements.append)
+        self.assertEqual({'test': (3, 1, 2), 'test2': (1, 1, 1)}, self.ytsm.get_amt_videos_by_channel())
+        self.assertEqual(1, len(statements))
+        self.ytsm.repository.con.set_trace_callback(None)
+
+        # Channels without videos are left out
+        self.assertEqual({'test2': (1, 1, 1)}, self.ytsm.get_amt_videos_by_channel(['test2', 'test3', '666']))
+        self.assertEqual({}, self.ytsm.get_amt_videos_by_channel([]))
+
     def test__remove_video(self):
         self.ytsm._add_channel('test', 'Name', 'URL', 'thumbnail')
         self.ytsm._add_video('test', 'test', 'Name', 'Url', '22-02-01', 'Desc', 'Thumbnail')
@@ -45,7 +45,7 @@ def _echo(msg: str, fg_color: str = SETTINGS.cli_settings.foreground_normal):
 def _echo_channels(channel_list: list[model.Channel]):
     """ Echo a list of channels """
     for c in channel_list:
-        total, new, unwatched = YTSM.get_amt_videos(channel_id=c.idx)
+        total, new, unwatched = c.total_count, c.new_count, c.unwatched_count
         color = SETTINGS.cli_settings.foreground_new_video if new \
             else SETTINGS.cli_settings.foreground_unwatched_video \
             if unwatched else SETTINGS.cli_settings.foreground_old_video
@@ -60,10 +60,9 @@ def _echo_videos(video_list: list[model.Video], show_channel_name: bool = False)
             else SETTINGS.cli_settings.foreground_unwatched_video \
             if not video.watched else SETTINGS.cli_settings.foreground_old_video
         _echo(f'\t{video.sensible_pubdate()} - '
-              f'{YTSM.get_channel(video.channel_id).name + " - " if show_channel_name else ""} {video.name}', color)
+              f'{video.channel_name + " - " if show_channel_name else ""} {video.name}', color)
 
-    for video in video_list:  # TODO: Put on parallel thread? Why does this take so long? Because of .commit()
-        YTSM.mark_video_as_old(video.idx)
+    YTSM.mark_videos_old([video.idx for video in video_list if video.new])
 
 
 def _find_and_confirm(s_term: str, possibilities: list, obj_name: str) -> Optional[Any]:
@@ -126,8 +125,9 @@ def ytsm():
     # 6 - Load repo
     repo = sqlite_repository.SQLiteRepository(db_path=SQL_REPO_FILEPATH)
 
-    # 7 - Load YTSM instance
+    # 7 - Load YTSM instance, and close its connections when the command is done
     YTSM = ytsubmanager.YTSubManager(repository=repo)
+    click.get_current_context().call_on_close(YTSM.close)
 
 
 @click.command('factory-restore')
@@ -217,13 +217,8 @@ def list_channels(new: bool = False, unwatched: bool = False):
     _success_echo('Listing channels with new videos:'
                   if new else 'Listing channels with unwatched videos:' if unwatched else 'Listing all channels:')
     channels = sorted(YTSM.get_all_channels(), key=lambda x: x.name.lower())
-    filtered_channels = [c for c in channels]
-    for c in channels:
-        videos = YTSM.get_all_videos(channel_id=c.idx)
-        new_videos = sum([1 for v in videos if v.new])
-        unwatched_videos = sum([1 for v in videos if not v.watched])
-        if (new and new_videos == 0) or (unwatched and unwatched_videos == 0):
-            filtered_channels.remove(c)
+    filtered_channels = [c for c in channels if not (new and c.new_count == 0) and not
+                         (unwatched and c.unwatched_count == 0)]
 
     _echo_channels(filtered_channels)
 
@@ -393,11 +388,10 @@ def list_videos(channel_name: str, new: bool = False, unwatched: bool = False, l
         else:
             channel_idx = viewing_channel.idx
 
-    video_list = YTSM.get_all_new_videos(channel_id=channel_idx) if new else YTSM.get_all_unwatched_videos(
-        channel_id=channel_idx) if unwatched else YTSM.get_all_videos(channel_id=channel_idx)
-
-    videos = sorted(video_list, key=lambda x: x.pubdate, reverse=True)
-    videos = videos if no_limit else videos[:limit]
+    video_state_type = model.VideoStateType.new if new else model.VideoStateType.unwatched if unwatched else \
+        model.VideoStateType.all
+    videos = YTSM.query_videos(channel_id=channel_idx, video_state_type=video_state_type,
+                               limit=None if no_limit else limit)  # Newest first
     filter_msg_part = f'new' if new else 'unwatched' if unwatched else ''
     limit_msg_part = f'Viewing last {len(videos)}/{limit} {filter_msg_part} videos' \
         if not no_limit else f'Viewing all {len(videos)} videos'
@@ -413,7 +407,7 @@ def video_detail(name: str):
     detail_video = _find_and_confirm(name, YTSM.find_video_by_name(name), 'videos')
     if detail_video:
         _echo(detail_video.name, 'green' if detail_video.new else 'blue' if not detail_video.watched else 'white')
-        _echo(YTSM.get_channel(detail_video.channel_id).name, 'yellow')
+        _echo(detail_video.channel_name, 'yellow')
         _echo(detail_video.sensible_pubdate())
         _echo(detail_video.description)
 
@@ -443,7 +437,21 @@ def mark_watched(name: str, c: bool = False):
         if mark_video_watched_and_old:
             YTSM.mark_video_as_watched(mark_video_watched_and_old.idx)
             _success_echo(f'Marked video: "{mark_video_watched_and_old.name}" in channel: '
-                          f'"{YTSM.get_channel(mark_video_watched_and_old.channel_id).name}" as watched.')
+                          f'"{mark_video_watched_and_old.channel_name}" as watched.')
+
+
+@click.command('max-videos')
+@click.argument('AMOUNT', type=click.IntRange(min=1))
+def max_videos(amount: int):
+    """ Set the maximum amount of videos kept per channel, deleting the oldest videos over it in every channel. """
+    if amount < SETTINGS.advanced_settings.max_videos_per_channel and \
+            not click.confirm(f'Videos over {amount} per channel will be deleted, are you sure?', prompt_suffix=' > '):
+        return None
+
+    n_deleted = YTSM.trim_videos(amount)
+    SETTINGS.advanced_settings.max_videos_per_channel = amount
+    SETTINGS.save_settings()
+    _success_echo(f'Set max videos per channel to {amount}, deleted {n_deleted} videos.')
 
 
 @click.command('tui')
@@ -481,6 +489,7 @@ if __name__ == '__main__':
     ytsm.add_command(video_detail)
     ytsm.add_command(watch_video)
     ytsm.add_command(mark_watched)
+    ytsm.add_command(max_videos)
     ytsm.add_command(tui)
     ytsm.add_command(gui)
     ytsm()
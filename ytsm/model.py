@@ -1,6 +1,7 @@
 """ Model objects """
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
+from typing import Optional
 
 class VideoStateType(Enum):
     """ State of Video """
@@ -9,6 +10,12 @@ class VideoStateType(Enum):
     old = "Old"
     all = "All"
 
+class VideoOrderType(Enum):
+    """ Order of queried Videos """
+    newest = "Newest"
+    oldest = "Oldest"
+    relevance = "Relevance"
+
 @dataclass
 class Channel:
     """ Channel object """
@@ -17,6 +24,11 @@ class Channel:
     url: str
     notify_on: bool
     thumbnail: str
+    # Counters kept by the database, they don't take part in comparisons
+    total_count: int = field(default=0, compare=False)
+    new_count: int = field(default=0, compare=False)
+    unwatched_count: int = field(default=0, compare=False)
+    last_pubdate: Optional[str] = field(default=None, compare=False)
 
 @dataclass
 class Video:
@@ -30,6 +42,7 @@ class Video:
     thumbnail: str
     new: bool
     watched: bool
+    channel_name: Optional[str] = field(default=None, compare=False)  # Filled when queried along its Channel
 
     def sensible_pubdate(self) -> str:
         """ Return smaller pubdate """
@@ -50,8 +63,15 @@ class ErrorUpdateResponse(BaseUpdateResponse):
 
 @dataclass
 class SuccessUpdateResponse(BaseUpdateResponse):
-    """ Update response for successes """
+    """
+    Update response for successes, not_modified means the feed didn't change since the last update, new_videos is
+    the amount of Videos added once the response is written
+    """
     video_list: list[dict]
+    not_modified: bool = False
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    new_videos: int = 0
 
 
 @dataclass
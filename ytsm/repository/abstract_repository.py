@@ -1,16 +1,31 @@
 """ Abstract Repository """
-from typing import Optional
+from typing import ContextManager, Optional
 from abc import ABCMeta, abstractmethod
 
-from ytsm.model import Channel, Video, VideoStateType
+from ytsm.model import Channel, Video, VideoStateType, VideoOrderType
 
 
 class AbstractRepository(metaclass=ABCMeta):
     """ Abstract repository class """
+    @abstractmethod
+    def close(self) -> None:
+        """ Close the connections to the DB """
+
+    @abstractmethod
+    def release_thread(self) -> None:
+        """ Close the calling thread's own connections to the DB, call it before a thread that used them exits """
+
     @abstractmethod
     def commit(self) -> None:
         """ Calls a commit on the DB """
 
+    @abstractmethod
+    def transaction(self) -> ContextManager[None]:
+        """
+        Unit of work, the changes made inside are committed once at the end, or rolled back if it raises.
+        A transaction inside another one is part of the outer one.
+        """
+
     @abstractmethod
     def add_channel(self, channel_id: str, channel_name: str, channel_uri: str, thumbnail_url: str) -> None:
         """
@@ -29,6 +44,10 @@ class AbstractRepository(metaclass=ABCMeta):
     def get_all_channels(self) -> list[Channel]:
         """ Get all the Channels from the database """
 
+    @abstractmethod
+    def get_channels(self, channel_ids: list[str]) -> list[Channel]:
+        """ Get the Channels with an id in channel_ids from the database, in no particular order """
+
     @abstractmethod
     def remove_channel(self, channel_id: str) -> None:
         """ Remove a Channel from the database """
@@ -41,6 +60,11 @@ class AbstractRepository(metaclass=ABCMeta):
     def amt_channel_videos(self, channel_id: str, video_state_type: VideoStateType = VideoStateType.all) -> int:
         """ Returns the amount of videos in Channel with channel_id, specified by video_state_type """
 
+    @abstractmethod
+    def amt_channels_videos(self, channel_ids: Optional[list[str]] = None) -> dict[str, tuple[int, int, int]]:
+        """ Returns {channel_id: (all videos, new videos, unwatched videos)} for every Channel, or only for the ones
+        with channel_ids, in a single query. Channels without Videos are left out """
+
     @abstractmethod
     def add_video(self, video_id: str, channel_id: str, video_name: str, video_url: str, video_pubdate: str,
                   video_description: str, video_thumbnail: str, video_new: bool, video_watched: bool, *,
@@ -53,6 +77,27 @@ class AbstractRepository(metaclass=ABCMeta):
         :raises ObjectAlreadyExist: if there is already a Video with video_id
         """
 
+    @abstractmethod
+    def add_videos(self, channel_id: str, rows: list[tuple[str, str, str, str, str, str, bool, bool]]) -> int:
+        """
+        Add Videos to Channel with channel_id in a single transaction, then delete the oldest ones over the SETTINGS
+        limit for max videos. Rows are (id, name, url, pubdate, description, thumbnail, new, watched), rows whose id is
+        already in the database are skipped.
+
+        :raises ObjectDoesNotExist: if Channel with channel_id does not exist in the database
+
+        :return int, the number of Videos added
+        """
+
+    @abstractmethod
+    def trim_videos(self, max_videos: int, channel_id: Optional[str] = None) -> int:
+        """
+        Delete the oldest Videos over max_videos, based on published date, in a single transaction. Optionally trim
+        only a specific Channel, else every Channel is trimmed at once.
+
+        :return int, the number of Videos deleted
+        """
+
     @abstractmethod
     def _remove_video(self, video_id: str):
         """
@@ -67,14 +112,35 @@ class AbstractRepository(metaclass=ABCMeta):
         """
 
     @abstractmethod
-    def find_video_by_key(self, find_str: str, *, desc: bool = False, channel_id: Optional[str] = None) -> list[Video]:
+    def find_video_by_key(self, find_str: str, *, desc: bool = False, channel_id: Optional[str] = None,
+                          ranked: bool = False) -> list[Video]:
         """ Find Videos which names (or desc if desk is True) contains find_str, case-insensitive. Optionally look only
-        inside a specific Channel """
+        inside a specific Channel, or order them by relevance with ranked, where the implementation supports it """
+
+    @abstractmethod
+    def query_videos(self, *, channel_id: Optional[str] = None, video_state_type: VideoStateType = VideoStateType.all,
+                     name_str: Optional[str] = None, desc_str: Optional[str] = None,
+                     date_range: Optional[tuple[str, str]] = None,
+                     order: Optional[VideoOrderType] = VideoOrderType.newest,
+                     limit: Optional[int] = None, after: Optional[tuple[str, str]] = None) -> list[Video]:
+        """
+        Get Videos from the database in a single query, every argument narrows it down: look only inside a specific
+        Channel, filter them by VideoStateType, by names or desc containing name_str or desc_str (case-insensitive),
+        or by date_range[0] < pubdate < date_range[1]. Ordered by VideoOrderType, or not at all if None.
+        VideoOrderType.relevance only applies to searches where the implementation supports it, else falls back to
+        VideoOrderType.newest. At most limit Videos are returned, for pages pass the (pubdate, id) of the last Video of
+        the previous page as after, Videos are ordered by (pubdate, id) so pages don't skip or repeat any.
+        :raises ValueError: if after is passed without VideoOrderType.newest or VideoOrderType.oldest
+        """
 
     @abstractmethod
     def mark_video_as_old(self, video_id: str) -> None:
         """ Edit Video with video_id to new=False """
 
+    @abstractmethod
+    def mark_videos_old(self, video_ids: list[str]) -> None:
+        """ Edit every Video with an id in video_ids to new=False """
+
     @abstractmethod
     def mark_all_videos_old(self, channel_id: str) -> None:
         """ Edit all Videos in a Channel to new=False """
@@ -117,6 +183,17 @@ class AbstractRepository(metaclass=ABCMeta):
     def set_channel_notify_on_status(self, channel_id: str, notify_status: bool) -> None:
         """ Set the Channel with channel_id's notify_on to notify_status """
 
+    @abstractmethod
+    def get_feed_validators(self) -> dict[str, tuple[Optional[str], Optional[str]]]:
+        """ Get the stored feed validators for every Channel that has them: {channel_id: (etag, last_modified)} """
+
+    @abstractmethod
+    def set_feed_validators(self, channel_id: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """
+        Set the feed validators (ETag and Last-Modified) for Channel with channel_id
+        :raises ObjectDoesNotExist: if Channel with channel_id does not exist in the database
+        """
+
     class BaseRepositoryError(Exception):
         """ Base class for Repository errors """
 
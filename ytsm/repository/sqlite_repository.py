@@ -1,31 +1,198 @@
 """ SQLite Repository """
+import functools
 import sqlite3
-from typing import Optional
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
 
-from ytsm.model import Channel, Video, VideoStateType
-from ytsm.settings import SETTINGS, SQLITE_DB_CREATION_STATEMENTS
+from ytsm.model import Channel, Video, VideoStateType, VideoOrderType
+from ytsm.settings import SETTINGS, SQLITE_DB_CREATION_STATEMENTS, SQLITE_DB_MIGRATIONS, SQLITE_DB_FTS_STATEMENTS
 from ytsm.repository.abstract_repository import AbstractRepository
 
 
+def _writes(method: Callable) -> Callable:
+    """ Decorator, for SQLiteRepository methods that write, run them holding the writer connection """
+    @functools.wraps(method)
+    def wrapper(self: 'SQLiteRepository', *args, **kwargs):
+        with self._writing():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class SQLiteRepository(AbstractRepository):
-    """ SQLite Repository implementation"""
-    def __init__(self, db_path: str):
-        self.con = sqlite3.connect(db_path)
-        self.cur = self.con.cursor()
+    """
+    SQLite Repository implementation, safe to use from several threads.
+    Writes are serialized through a single writer connection, while each thread reads on its own reader connection,
+    which on a WAL db doesn't wait for the writer.
+    """
+    _max_variables = 999  # SQLITE_MAX_VARIABLE_NUMBER of SQLite < 3.32
+    _fts_objects = ('videos_fts', 'videos_fts_insert', 'videos_fts_delete', 'videos_fts_update')  # From the statements
+    # Videos are selected along their Channel's name, to fill Video.channel_name
+    _select_videos = 'SELECT videos.*, channels.name FROM videos JOIN channels ON channels.id=videos.channel_id'
 
-        self.cur.execute("PRAGMA foreign_keys=on")  # Ensure we are using foreign_keys
-        self.con.commit()
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()  # Each thread's reader connection and cursors
+        self._readers: list[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._in_transaction = False
+        self.writer = self._connect()
+
+        with self._writing():
+            # Persisted on the db. By default WAL, so other processes (a cron update, another UI) can read while one
+            # writes. Validated by AdvancedSettings
+            self.cur.execute(f'PRAGMA journal_mode={SETTINGS.advanced_settings.sqlite_journal_mode}')
+        self._migrate()  # Bring older dbs up to date
+        self.has_fts = self._set_up_fts()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open a connection to the db, tuned from the SETTINGS, validated by AdvancedSettings. The busy timeout makes
+        writers wait for each other instead of failing.
+        """
+        con = sqlite3.connect(self.db_path, check_same_thread=False)  # Used by one thread at a time, closed by any
+        advanced_settings = SETTINGS.advanced_settings
+        con.execute("PRAGMA foreign_keys=on")  # Ensure we are using foreign_keys
+        con.execute(f'PRAGMA busy_timeout={advanced_settings.sqlite_busy_timeout}')
+        con.execute(f'PRAGMA synchronous={advanced_settings.sqlite_synchronous}')
+        con.execute(f'PRAGMA mmap_size={advanced_settings.sqlite_mmap_size}')
+        con.execute(f'PRAGMA cache_size=-{advanced_settings.sqlite_cache_size}')  # Negative, in KiB
+        return con
+
+    @property
+    def _is_writing(self) -> bool:
+        """ Whether the calling thread holds the writer connection """
+        return getattr(self._local, 'writing', 0) > 0
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """ Hold the writer connection, con and cur are the writer's on the calling thread meanwhile """
+        with self._write_lock:
+            self._local.writing = getattr(self._local, 'writing', 0) + 1
+            try:
+                yield
+            finally:
+                self._local.writing -= 1
+
+    @property
+    def con(self) -> sqlite3.Connection:
+        """
+        The calling thread's connection: the writer while it holds it, so it reads its own changes, else its reader.
+        In-memory dbs can't be shared between connections, the writer is used for everything.
+        """
+        if self._is_writing or self.db_path == ':memory:':
+            return self.writer
+
+        reader = getattr(self._local, 'reader', None)
+        if reader is None:
+            reader = self._local.reader = self._connect()
+            reader.execute('PRAGMA query_only=on')  # Writes go through the writer
+            with self._readers_lock:
+                self._readers.append(reader)
+        return reader
+
+    @property
+    def cur(self) -> sqlite3.Cursor:
+        """ The calling thread's cursor on con, so that threads don't read each other's results """
+        con = self.con
+        cursors = getattr(self._local, 'cursors', None)
+        if cursors is None:
+            cursors = self._local.cursors = {}
+        if con not in cursors:
+            cursors[con] = con.cursor()
+        return cursors[con]
+
+    def close(self) -> None:
+        """ Close the writer and every reader connection """
+        with self._writing():
+            self.writer.close()
+        with self._readers_lock:
+            for reader in self._readers:
+                reader.close()
+            self._readers.clear()
+
+    def release_thread(self) -> None:
+        """ Close the calling thread's reader connection, if it has one, call it before a thread that read exits """
+        reader = getattr(self._local, 'reader', None)
+        self._local.cursors = None
+        if reader is None:
+            return
+        self._local.reader = None
+        with self._readers_lock:
+            if reader in self._readers:  # Unless close() got to it first
+                self._readers.remove(reader)
+            reader.close()
 
     @staticmethod
     def create_db(db_path: str):
-        """ Creates the DB on db_path """
+        """ Creates the DB on db_path, on the latest migration """
         con = sqlite3.connect(db_path)
         cur = con.cursor()
         for sqlite_statement in SQLITE_DB_CREATION_STATEMENTS:
             cur.execute(sqlite_statement)
+        cur.execute(f'PRAGMA user_version={len(SQLITE_DB_MIGRATIONS)}')
         con.commit()
         con.close()
 
+    @_writes
+    def _migrate(self) -> None:
+        """ Run the SQLITE_DB_MIGRATIONS the db is missing, according to its PRAGMA user_version, each one in its own
+        transaction. Dbs with no tables yet are left alone, as there is nothing to migrate """
+        self.cur.execute('PRAGMA user_version')
+        version = self.cur.fetchone()[0]
+        self.cur.execute("SELECT COUNT() FROM sqlite_master WHERE type='table' AND name='videos'")
+        if not self.cur.fetchone()[0]:
+            return
+
+        for n_migration in range(version, len(SQLITE_DB_MIGRATIONS)):
+            self.cur.execute('BEGIN')
+            for sqlite_statement in SQLITE_DB_MIGRATIONS[n_migration]:
+                self.cur.execute(sqlite_statement)
+            self.cur.execute(f'PRAGMA user_version={n_migration + 1}')
+            self.con.commit()
+
+    @_writes
+    def _set_up_fts(self) -> bool:
+        """
+        Set up the full-text search index on videos, filling it if it is new. Dbs with no tables yet are left alone.
+        Only writes if the index is missing, so opening a db that has it, or can't have it, doesn't wait on writers.
+        :raises sqlite3.OperationalError: if setting it up fails, for example because the db is locked
+        :return bool, whether full-text search is available, as it needs FTS5 with the trigram tokenizer
+        """
+        self.cur.execute(f"SELECT name FROM sqlite_master WHERE name IN ('videos', {', '.join('?' * 4)})",
+                         self._fts_objects)
+        objects = {f[0] for f in self.cur.fetchall()}
+        if 'videos' not in objects:
+            return False
+        if objects.issuperset(self._fts_objects):
+            return True
+        if not self._has_fts5_trigram():
+            return False
+
+        self.cur.execute('BEGIN')
+        try:
+            for sqlite_statement in SQLITE_DB_FTS_STATEMENTS:
+                self.cur.execute(sqlite_statement)
+            if 'videos_fts' not in objects:
+                self.cur.execute("INSERT INTO videos_fts (videos_fts) VALUES ('rebuild')")
+            self.con.commit()
+        except sqlite3.Error:
+            self.con.rollback()
+            raise
+        return True
+
+    def _has_fts5_trigram(self) -> bool:
+        """ Whether SQLite has FTS5 with the trigram tokenizer (3.34+), probed on a temporary table """
+        try:
+            self.cur.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x, tokenize='trigram')")
+        except sqlite3.OperationalError as e:  # no such module: fts5, or no such tokenizer: trigram
+            if 'no such' not in str(e):
+                raise
+            return False
+        self.cur.execute('DROP TABLE temp.fts5_probe')
+        return True
+
     def _get_all_channel_keys(self) -> list[str]:
         self.cur.execute("SELECT id FROM channels")
         return [t[0] for t in self.cur.fetchall()]
@@ -34,19 +201,47 @@ class SQLiteRepository(AbstractRepository):
         self.cur.execute("SELECT id FROM videos")
         return [t[0] for t in self.cur.fetchall()]
 
+    @_writes
     def commit(self) -> None:
         """ Calls a commit on the DB """
         self.con.commit()
 
+    def _commit(self) -> None:
+        """ Commit, unless inside a transaction(), which commits once when it ends """
+        if not self._in_transaction:
+            self.con.commit()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Unit of work, the changes made inside are committed once at the end, or rolled back if it raises.
+        A transaction inside another one is part of the outer one.
+        """
+        with self._writing():  # Other threads wait to write until it ends
+            if self._in_transaction:
+                yield
+                return
+
+            self._in_transaction = True
+            try:
+                yield
+                self.con.commit()
+            except BaseException:
+                self.con.rollback()
+                raise
+            finally:
+                self._in_transaction = False
+
+    @_writes
     def add_channel(self, channel_id: str, channel_name: str, channel_url: str, thumbnail_url: str) -> None:
         """
         Add a Channel to the database
         :raises ObjectAlreadyExist: if there is already a Channel with channel_id
         """
         try:
-            self.cur.execute('INSERT into channels values(?, ?, ?, ?, ?)', (channel_id, channel_name, channel_url,
-                                                                            True, thumbnail_url))
-            self.con.commit()
+            self.cur.execute('INSERT into channels (id, name, url, notify_on, thumbnail) values(?, ?, ?, ?, ?)',
+                             (channel_id, channel_name, channel_url, True, thumbnail_url))
+            self._commit()
         except sqlite3.IntegrityError:
             raise self.ObjectAlreadyExists(channel_id)
 
@@ -67,10 +262,20 @@ class SQLiteRepository(AbstractRepository):
         found = self.cur.fetchall()
         return [Channel(*f) for f in found]
 
+    def get_channels(self, channel_ids: list[str]) -> list[Channel]:
+        """ Get the Channels with an id in channel_ids from the database, in no particular order """
+        found = []
+        for i in range(0, len(channel_ids), self._max_variables):  # Keep under SQLite's limit of host parameters
+            chunk = channel_ids[i:i + self._max_variables]
+            self.cur.execute(f'SELECT * FROM channels WHERE id IN ({", ".join("?" * len(chunk))})', chunk)
+            found.extend(self.cur.fetchall())
+        return [Channel(*f) for f in found]
+
+    @_writes
     def remove_channel(self, channel_id: str) -> None:
         """ Remove a Channel from the database """
         self.cur.execute('DELETE FROM channels WHERE id=?', (channel_id,))
-        self.con.commit()
+        self._commit()
 
     def find_channels(self, name_str: str) -> list[Channel]:
         """ Find Channels which names contain name_str, case-insensitive"""
@@ -80,13 +285,24 @@ class SQLiteRepository(AbstractRepository):
 
     def amt_channel_videos(self, channel_id: str, video_state_type: VideoStateType = VideoStateType.all) -> int:
         """ Returns the amount of videos in Channel with channel_id, specified by video_state_type """
-        curs = {VideoStateType.all: 'SELECT COUNT() FROM videos WHERE channel_id=?',
-                VideoStateType.new: 'SELECT COUNT() FROM videos WHERE channel_id=? AND new=TRUE',
-                VideoStateType.unwatched: 'SELECT COUNT() FROM videos WHERE channel_id=? AND watched=FALSE'}
+        curs = {VideoStateType.all: 'SELECT total_count FROM channels WHERE id=?',
+                VideoStateType.new: 'SELECT new_count FROM channels WHERE id=?',
+                VideoStateType.unwatched: 'SELECT unwatched_count FROM channels WHERE id=?'}
         self.cur.execute(curs[video_state_type], (channel_id,))
-        found = self.cur.fetchone()[0]
-        return found
+        found = self.cur.fetchone()
+        return found[0] if found else 0
+
+    def amt_channels_videos(self, channel_ids: Optional[list[str]] = None) -> dict[str, tuple[int, int, int]]:
+        """ Returns {channel_id: (all videos, new videos, unwatched videos)} for every Channel, or only for the ones
+        with channel_ids, in a single query. Channels without Videos are left out """
+        query = 'SELECT id, total_count, new_count, unwatched_count FROM channels WHERE total_count > 0'
+        if channel_ids is None:
+            self.cur.execute(query)
+        else:
+            self.cur.execute(f'{query} AND id IN ({", ".join("?" * len(channel_ids))})', channel_ids)
+        return {f[0]: (f[1], f[2], f[3]) for f in self.cur.fetchall()}
 
+    @_writes
     def add_video(self, video_id: str, channel_id: str, video_name: str, video_url: str, video_pubdate: str,
                   video_description: str, video_thumbnail: str, video_new: bool, video_watched: bool, *,
                   deferred_commit: bool = False) -> None:
@@ -98,11 +314,7 @@ class SQLiteRepository(AbstractRepository):
         :raises ObjectAlreadyExist: if there is already a Video with video_id
         """
         # Delete older videos if appropriate
-        amt_videos = self.amt_channel_videos(channel_id)
-        while amt_videos >= SETTINGS.advanced_settings.max_videos_per_channel:
-            v = self.get_oldest_video_from_channel(channel_id)
-            self._remove_video(v.idx)
-            amt_videos -= 1
+        self._delete_videos_over(max(SETTINGS.advanced_settings.max_videos_per_channel - 1, 0), channel_id)
 
         # Insert new video
         try:
@@ -110,85 +322,205 @@ class SQLiteRepository(AbstractRepository):
                              (video_id, channel_id, video_name, video_url, video_pubdate, video_description,
                               video_thumbnail, video_new, video_watched))
             if not deferred_commit:
-                self.con.commit()
+                self._commit()
         except sqlite3.IntegrityError as e:
             if "UNIQUE" in str(e):
                 raise self.ObjectAlreadyExists(video_id)
             elif "FOREIGN KEY" in str(e):
                 raise self.ObjectDoesNotExist(channel_id)
 
+    @_writes
+    def add_videos(self, channel_id: str, rows: list[tuple[str, str, str, str, str, str, bool, bool]]) -> int:
+        """
+        Add Videos to Channel with channel_id in a single transaction, then delete the oldest ones over the SETTINGS
+        limit for max videos. Rows are (id, name, url, pubdate, description, thumbnail, new, watched), rows whose id is
+        already in the database are skipped.
+
+        :raises ObjectDoesNotExist: if Channel with channel_id does not exist in the database
+
+        :return int, the number of Videos added, and still there after deleting the oldest ones
+        """
+        if not rows:
+            return 0
+        try:
+            self.cur.execute('SELECT MAX(rowid) FROM videos')
+            last_rowid = self.cur.fetchone()[0] or 0  # Inserted rows get rowids over it
+            self.cur.executemany('INSERT OR IGNORE into videos values(?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                 [(row[0], channel_id, *row[1:]) for row in rows])
+            self._delete_videos_over(SETTINGS.advanced_settings.max_videos_per_channel, channel_id)
+            self.cur.execute('SELECT COUNT() FROM videos WHERE channel_id=? AND rowid>?', (channel_id, last_rowid))
+            amt_added = self.cur.fetchone()[0]
+            self._commit()
+        except sqlite3.IntegrityError:
+            if not self._in_transaction:  # Else nothing was written, the first row already fails
+                self.con.rollback()
+            raise self.ObjectDoesNotExist(channel_id)
+        return amt_added
+
+    @_writes
+    def trim_videos(self, max_videos: int, channel_id: Optional[str] = None) -> int:
+        """
+        Delete the oldest Videos over max_videos, based on published date, in a single transaction. Optionally trim
+        only a specific Channel, else every Channel is trimmed at once.
+
+        :return int, the number of Videos deleted
+        """
+        amt_deleted = self._delete_videos_over(max_videos, channel_id)
+        self._commit()
+        return amt_deleted
+
+    def _delete_videos_over(self, max_videos: int, channel_id: Optional[str] = None) -> int:
+        """
+        Delete the oldest Videos over max_videos in Channel with channel_id, or in every Channel, without committing
+        :return int, the number of Videos deleted
+        """
+        if channel_id:
+            self.cur.execute('DELETE FROM videos WHERE id IN ('
+                             'SELECT id FROM videos WHERE channel_id=? ORDER BY pubdate DESC LIMIT -1 OFFSET ?)',
+                             (channel_id, max_videos))
+        else:
+            self.cur.execute('DELETE FROM videos WHERE id IN ('
+                             'SELECT id FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY channel_id ORDER BY pubdate '
+                             'DESC) AS position FROM videos) WHERE position > ?)', (max_videos,))
+        return self.cur.rowcount
+
+    @_writes
     def _remove_video(self, video_id: str):
         """
         Remove a Video from the database
         """
         self.cur.execute('DELETE FROM videos WHERE id=?', (video_id,))
-        self.con.commit()
+        self._commit()
 
     def get_video(self, video_id: str) -> Video:
         """
         Get a Video from the database
         :raises ObjectDoesNotExist: if there is no Video with video_id
         """
-        self.cur.execute('SELECT * FROM videos WHERE id=?', (video_id,))
+        self.cur.execute(f'{self._select_videos} WHERE videos.id=?', (video_id,))
         found = self.cur.fetchone()
         if not found:
             raise self.ObjectDoesNotExist(video_id)
         return Video(*found)
 
-    def find_video_by_key(self, find_str: str, *, desc: bool = False, channel_id: Optional[str] = None) -> list[Video]:
+    def find_video_by_key(self, find_str: str, *, desc: bool = False, channel_id: Optional[str] = None,
+                          ranked: bool = False) -> list[Video]:
         """ Find Videos which names (or desc if desk is True) contains find_str, case-insensitive. Optionally look only
-        inside a specific Channel """
-        if not channel_id:
-            if not desc:
-                self.cur.execute('SELECT * FROM videos WHERE UPPER(name) LIKE ?', (f'%{find_str.upper()}%',))
-            else:
-                self.cur.execute('SELECT * FROM videos WHERE UPPER(description) LIKE ?', (f'%{find_str.upper()}%',))
-        else:
-            if not desc:
-                self.cur.execute('SELECT * FROM videos WHERE UPPER(name) LIKE ? AND channel_id=?',
-                                 (f'%{find_str.upper()}%', channel_id))
+        inside a specific Channel, or order them by relevance with ranked, when the full-text search index is used """
+        search = {'desc_str' if desc else 'name_str': find_str}
+        return self.query_videos(channel_id=channel_id, order=VideoOrderType.relevance if ranked else None, **search)
+
+    def query_videos(self, *, channel_id: Optional[str] = None, video_state_type: VideoStateType = VideoStateType.all,
+                     name_str: Optional[str] = None, desc_str: Optional[str] = None,
+                     date_range: Optional[tuple[str, str]] = None,
+                     order: Optional[VideoOrderType] = VideoOrderType.newest,
+                     limit: Optional[int] = None, after: Optional[tuple[str, str]] = None) -> list[Video]:
+        """
+        Get Videos from the database in a single query, every argument narrows it down: look only inside a specific
+        Channel, filter them by VideoStateType, by names or desc containing name_str or desc_str (case-insensitive),
+        or by date_range[0] < pubdate < date_range[1]. Ordered by VideoOrderType, or not at all if None.
+        VideoOrderType.relevance only applies when searching through the full-text search index, else falls back to
+        VideoOrderType.newest. At most limit Videos are returned, for pages pass the (pubdate, id) of the last Video of
+        the previous page as after, Videos are ordered by (pubdate, id) so pages don't skip or repeat any.
+        Searches use the full-text search index when available and the searched string is long enough for it
+        (3 characters)
+        :raises ValueError: if after is passed without VideoOrderType.newest or VideoOrderType.oldest
+        """
+        if after and order not in (VideoOrderType.newest, VideoOrderType.oldest):
+            raise ValueError('after needs VideoOrderType.newest or VideoOrderType.oldest')
+
+        query = self._select_videos
+        conditions, params, match_terms = [], [], []
+        for key, find_str in (('name', name_str), ('description', desc_str)):
+            if find_str is None:
+                continue
+            if self.has_fts and len(find_str) >= 3:
+                match_terms.append(f'{key} : "{find_str.replace(chr(34), chr(34) * 2)}"')  # Quoted, as a substring
             else:
-                self.cur.execute('SELECT * FROM videos WHERE UPPER(description) LIKE ? AND channel_id=?',
-                                 (f'%{find_str.upper()}%', channel_id))
-
+                conditions.append(f'UPPER(videos.{key}) LIKE ?')
+                params.append(f'%{find_str.upper()}%')
+        if match_terms:
+            query += ' JOIN videos_fts ON videos_fts.rowid=videos.rowid'
+            conditions.append('videos_fts MATCH ?')
+            params.append(' AND '.join(match_terms))
+
+        if channel_id:
+            conditions.append('videos.channel_id=?')
+            params.append(channel_id)
+        state_conditions = {VideoStateType.new: 'videos.new=TRUE', VideoStateType.unwatched: 'videos.watched=FALSE',
+                            VideoStateType.old: 'videos.new=FALSE'}
+        if video_state_type in state_conditions:
+            conditions.append(state_conditions[video_state_type])
+        if date_range:
+            conditions.append('videos.pubdate > ? AND videos.pubdate < ?')
+            params.extend(date_range)
+        if after:  # Keyset pagination, seeks past the previous page instead of counting an OFFSET
+            conditions.append(f'(videos.pubdate, videos.id) {">" if order == VideoOrderType.oldest else "<"} (?, ?)')
+            params.extend(after)
+
+        if conditions:
+            query += f' WHERE {" AND ".join(conditions)}'
+        if order == VideoOrderType.relevance and match_terms:
+            query += ' ORDER BY videos_fts.rank'
+        elif order == VideoOrderType.oldest:
+            query += ' ORDER BY videos.pubdate ASC, videos.id ASC'
+        elif order is not None:
+            query += ' ORDER BY videos.pubdate DESC, videos.id DESC'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+
+        self.cur.execute(query, params)
         found = self.cur.fetchall()
         return [Video(*f) for f in found]
 
+    @_writes
     def mark_video_as_old(self, video_id: str) -> None:
         """ Edit Video with video_id to new=False """
         self.cur.execute('UPDATE videos SET new=FALSE WHERE id=?', (video_id,))
-        self.con.commit()
+        self._commit()
+
+    @_writes
+    def mark_videos_old(self, video_ids: list[str]) -> None:
+        """ Edit every Video with an id in video_ids to new=False, in a single transaction """
+        for i in range(0, len(video_ids), self._max_variables):  # Keep under SQLite's limit of host parameters
+            chunk = video_ids[i:i + self._max_variables]
+            self.cur.execute(f'UPDATE videos SET new=FALSE WHERE new AND id IN ({", ".join("?" * len(chunk))})', chunk)
+        self._commit()
 
+    @_writes
     def mark_all_videos_old(self, channel_id: str) -> None:
         """ Edit all Videos in a Channel to new=False """
         self.cur.execute('UPDATE videos SET new=FALSE WHERE channel_id=?', (channel_id,))
-        self.con.commit()
+        self._commit()
 
+    @_writes
     def mark_video_as_watched(self, video_id: str) -> None:
         """ Edit Video with video_id to watched=True and new=False """
         self.cur.execute('UPDATE videos SET watched=TRUE, new=FALSE WHERE id=?', (video_id,))
-        self.con.commit()
+        self._commit()
 
+    @_writes
     def mark_all_videos_watched(self, channel_id: str) -> None:
         """ Edit all Videos in a Channel to watched=True and new=False """
         self.cur.execute('UPDATE videos SET watched=TRUE, new=FALSE WHERE channel_id=?', (channel_id,))
-        self.con.commit()
+        self._commit()
 
     def get_videos(self, *, channel_id: Optional[str] = None,
                    video_state_type: VideoStateType = VideoStateType.all) -> list[Video]:
         """ Get Videos from the database. Optionally look only inside a specific Channel, or filter them by
         VideoStateType """
         select_selector = {
-            VideoStateType.all: 'SELECT * FROM videos',
-            VideoStateType.new: 'SELECT * FROM videos WHERE new=TRUE',
-            VideoStateType.unwatched: 'SELECT * FROM videos WHERE watched=FALSE'
+            VideoStateType.all: self._select_videos,
+            VideoStateType.new: f'{self._select_videos} WHERE new=TRUE',
+            VideoStateType.unwatched: f'{self._select_videos} WHERE watched=FALSE'
         }
 
         if not channel_id:
             self.cur.execute(select_selector[video_state_type])
         else:
             if video_state_type == VideoStateType.all:
-                self.cur.execute(f'SELECT * FROM videos WHERE channel_id=?', (channel_id,))
+                self.cur.execute(f'{self._select_videos} WHERE channel_id=?', (channel_id,))
             else:
                 self.cur.execute(f'{select_selector[video_state_type]} AND channel_id=?', (channel_id,))
 
@@ -200,9 +532,9 @@ class SQLiteRepository(AbstractRepository):
         """ Get all the Videos from the database that have date_min < pubdate < date_max. Optionally look only inside a
         specific Channel """
         if not channel_id:
-            self.cur.execute('SELECT * FROM videos WHERE pubdate > ? AND pubdate < ?', (date_min, date_max))
+            self.cur.execute(f'{self._select_videos} WHERE pubdate > ? AND pubdate < ?', (date_min, date_max))
         else:
-            self.cur.execute('SELECT * FROM videos WHERE pubdate > ? AND pubdate < ? AND channel_id=?',
+            self.cur.execute(f'{self._select_videos} WHERE pubdate > ? AND pubdate < ? AND channel_id=?',
                              (date_min, date_max, channel_id))
 
         found = self.cur.fetchall()
@@ -210,10 +542,15 @@ class SQLiteRepository(AbstractRepository):
 
     def get_last_video_from_channel(self, channel_id: str) -> Optional[Video]:
         """
-        Get last Video from Channel with channel_id, based on published date
+        Get last Video from Channel with channel_id, based on published date, read from the Channel's last_pubdate
         :raises ObjectDoesNotExist: if Channel with channel_id does not exist in the database
         """
-        return self.__get_last_old_video(channel_id, 'DESC')
+        last_pubdate = self.get_channel(channel_id).last_pubdate
+        if last_pubdate is None:
+            return None
+        self.cur.execute(f'{self._select_videos} WHERE channel_id=? AND pubdate=? LIMIT 1', (channel_id, last_pubdate))
+        found = self.cur.fetchone()
+        return Video(*found) if found else None
 
     def get_oldest_video_from_channel(self, channel_id: str) -> Optional[Video]:
         """
@@ -229,11 +566,30 @@ class SQLiteRepository(AbstractRepository):
         :raises ObjectDoesNotExist: if Channel with channel_id does not exist in the database
         """
         self.get_channel(channel_id)
-        self.cur.execute(f'SELECT * FROM videos WHERE channel_id=? ORDER BY pubdate {order}', (channel_id,))
+        self.cur.execute(f'{self._select_videos} WHERE channel_id=? ORDER BY pubdate {order} LIMIT 1', (channel_id,))
         found = self.cur.fetchone()
         return Video(*found) if found else None
 
+    @_writes
     def set_channel_notify_on_status(self, channel_id: str, notify_status: bool) -> None:
         """ Set the Channel with channel_id's notify_on to notify_status """
         self.cur.execute('UPDATE channels SET notify_on=? WHERE id=?', (notify_status, channel_id,))
-        self.con.commit()
+        self._commit()
+
+    def get_feed_validators(self) -> dict[str, tuple[Optional[str], Optional[str]]]:
+        """ Get the stored feed validators for every Channel that has them: {channel_id: (etag, last_modified)} """
+        self.cur.execute('SELECT * FROM feed_validators')
+        return {f[0]: (f[1], f[2]) for f in self.cur.fetchall()}
+
+    @_writes
+    def set_feed_validators(self, channel_id: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """
+        Set the feed validators (ETag and Last-Modified) for Channel with channel_id
+        :raises ObjectDoesNotExist: if Channel with channel_id does not exist in the database
+        """
+        try:
+            self.cur.execute('INSERT OR REPLACE into feed_validators values(?, ?, ?)',
+                             (channel_id, etag, last_modified))
+            self._commit()
+        except sqlite3.IntegrityError:
+            raise self.ObjectDoesNotExist(channel_id)
@@ -1,4 +1,9 @@
+import asyncio
+import concurrent.futures
+import itertools
+import queue
 import requests
+import requests.adapters
 import threading
 import time
 
@@ -7,7 +12,34 @@ import time
 
 
 VALID_METHODS = [GET, POST] = 'get', 'post'
+VALID_ENGINES = [THREADED, ASYNC] = 'threaded', 'async'
 TOO_MANY_REQUESTS = 429
+BACKOFF_BASE, BACKOFF_MAX = 0.1, 8
+
+
+def backoff_delay(n_try):
+    """
+    Exponential backoff for retrying a connection
+
+    :param n_try: integer, times the connection has already failed
+    :return: float, seconds to wait before trying again
+    """
+    return min(BACKOFF_BASE * (2 ** n_try), BACKOFF_MAX)
+
+
+def create_session(pool_size=10):
+    """
+    Creates a requests.Session whose connection pools keep pool_size connections alive per host, so it can be shared
+    between handlers and threads without paying a new TCP + TLS handshake on every request.
+
+    :param pool_size: integer, the number of connections to keep alive per host, should match the number of threads
+    :return: requests.Session
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
 
 
 class RequestData(object):
@@ -16,12 +48,13 @@ class RequestData(object):
     """
     def __init__(self, method, data=None, json=None, headers=None, cookies=None,
                  files=None, auth=None, timeout=60, allow_redirects=True,
-                 proxies=None, stream=None, cert=None):
+                 proxies=None, stream=None, cert=None, url_headers=None):
 
         """
         Raises InvalidMethod
 
         :param method: GET or POST defined at the top of this file
+        :param url_headers: dict, {url: headers}, extra headers to merge over headers for specific urls
         """
         self.method = method
         self.data = data
@@ -35,6 +68,7 @@ class RequestData(object):
         self.proxies = proxies
         self.stream = stream
         self.cert = cert
+        self.url_headers = url_headers if url_headers else {}
 
         # Validate method
         if self.method not in VALID_METHODS:
@@ -72,15 +106,20 @@ class RequestHandler(object):
     """
     Class that executes a request over a list of links
     """
-    def __init__(self, url_list, request_data, request_error_data):
+    def __init__(self, url_list, request_data, request_error_data, session=None, on_response=None):
         """
         :param url_list: list of strings
         :param request_data: RequestData object
         :param request_error_data: RequestErrorData object
+        :param session: requests.Session, to reuse connections between requests, if None, requests.request() is used
+        :param on_response: callable, called with every valid ResponseObject as soon as it is appended to
+        self.responses
         """
         self.url_list = url_list
         self.request_data = request_data
         self.request_error_data = request_error_data
+        self.session = session
+        self.on_response = on_response
 
         self.responses = []
         self.errors = []
@@ -94,21 +133,27 @@ class RequestHandler(object):
 
     def _request_wrapper(self, url):
         """
-        Wraps the requests.request() function
+        Wraps the requests.request() function, or self.session.request() if there is a session
 
         Raises InvalidYTURL and ConnectivityError
 
         :param url: string
         :return: request's ResponseObject instance
         """
+        headers = self.request_data.headers
+        if url in self.request_data.url_headers:
+            headers = dict(headers if headers else {}, **self.request_data.url_headers[url])
+
+        request = self.session.request if self.session else requests.request
+
         try:
-            response_object = requests.request(self.request_data.method, url, data=self.request_data.data,
-                                               json=self.request_data.json, headers=self.request_data.headers,
-                                               cookies=self.request_data.cookies, files=self.request_data.files,
-                                               auth=self.request_data.auth, timeout=self.request_data.timeout,
-                                               allow_redirects=self.request_data.allow_redirects,
-                                               proxies=self.request_data.proxies, stream=self.request_data.stream,
-                                               cert=self.request_data.cert)
+            response_object = request(self.request_data.method, url, data=self.request_data.data,
+                                      json=self.request_data.json, headers=headers,
+                                      cookies=self.request_data.cookies, files=self.request_data.files,
+                                      auth=self.request_data.auth, timeout=self.request_data.timeout,
+                                      allow_redirects=self.request_data.allow_redirects,
+                                      proxies=self.request_data.proxies, stream=self.request_data.stream,
+                                      cert=self.request_data.cert)
             return response_object
 
         except (requests.exceptions.MissingSchema, requests.exceptions.InvalidSchema, requests.exceptions.InvalidURL):
@@ -145,6 +190,20 @@ class RequestHandler(object):
             else:
                 raise ConnectivityError(url)
 
+        self._validate_response(url, response_object)
+
+    def _validate_response(self, url, response_object):
+        """
+        Error checks the response, and appends either the ResponseObject to self.responses, or a dictionary comprising
+        of {'error':Exception, 'url':url, 'response':ResponseObject} to self.errors. Valid responses are also passed to
+        self.on_response.
+
+        Raise InvalidStatusCode, NoValidationString, ContainsErrorString
+
+        :param url: string
+        :param response_object: request's ResponseObject instance
+        :return: None
+        """
         # Validate by status_code
         if response_object.status_code not in self.request_error_data.expected_status_codes:
             if self.request_error_data.allow_errors:
@@ -173,13 +232,112 @@ class RequestHandler(object):
                     raise ContainsErrorString(url)
 
         self.responses.append(response_object)
+        if self.on_response:
+            self.on_response(response_object)
+
+
+class AsyncRequestHandler(RequestHandler):
+    """
+    Class that executes requests over a list of links on an asyncio event loop. Instead of splitting the list between
+    threads beforehand, every url is a task, and at most concurrency of them are in flight at the same time, so a slow
+    url only holds its own slot.
+
+    requests is blocking, so each request runs on an executor of concurrency threads sharing the session, and its
+    timeout is the one of request_data, enforced by requests itself.
+    """
+    def __init__(self, url_list, request_data, request_error_data, concurrency=10, max_passes=1, sleep_pass=0,
+                 session=None, on_response=None):
+        """
+        :param url_list: list of strings
+        :param request_data: RequestData object
+        :param request_error_data: RequestErrorData object
+        :param concurrency: integer, the maximum number of requests in flight
+        :param max_passes: integer, the number of passes over the errors before returning
+        :param sleep_pass: integer, the time to sleep between passes, 0 by default.
+        :param session: requests.Session, if None, one is created with a pool of concurrency
+        :param on_response: callable, called with every valid ResponseObject as soon as it arrives
+        """
+        super().__init__(url_list, request_data, request_error_data,
+                         session=session if session else create_session(concurrency), on_response=on_response)
+        self.concurrency = concurrency
+        self.max_passes = max_passes
+        self.sleep_pass = sleep_pass
+
+    def run(self):
+        """
+        Runs the event loop until every url has been handled
+
+        Raise InvalidURL, ConnectivityError, InvalidStatusCode, NoValidationString, ContainsErrorString if not
+        allow_errors
+
+        :return: None
+        """
+        asyncio.run(self._run())
+
+    async def _run(self):
+        """
+        Handles all urls, then does up to self.max_passes more passes over the urls in self.errors.
+
+        :return: None
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            url_list = self.url_list
+            for n_pass in range(self.max_passes + 1):
+                self.errors = []
+                await asyncio.gather(*[self._handle_url_async(url, semaphore, executor) for url in url_list])
+
+                if not self.errors or n_pass == self.max_passes:
+                    break
+
+                url_list = [err['url'] for err in self.errors]
+                await asyncio.sleep(self.sleep_pass)
+
+    async def _handle_url_async(self, url, semaphore, executor):
+        """
+        Performs a request on the executor, then error checks the response like _handle_url.
+
+        In case of ConnectivityError, timeouts included, the request is tried
+        self.request_error_data.error_connection_max_tries more times, with an exponential backoff.
+
+        Raise InvalidURL, ConnectivityError, InvalidStatusCode, NoValidationString, ContainsErrorString
+
+        :param url: string
+        :param semaphore: asyncio.Semaphore, bounds the requests in flight
+        :param executor: concurrent.futures.Executor, where the blocking requests run
+        :return: None
+        """
+        loop = asyncio.get_running_loop()
+
+        for connectivity_n_try in range(self.request_error_data.error_connection_max_tries + 1):
+            async with semaphore:
+                try:
+                    response_object = await loop.run_in_executor(executor, self._request_wrapper, url)
+                except ConnectivityError:
+                    if not self.request_error_data.allow_errors:
+                        raise ConnectivityError(url)
+                except InvalidURL:
+                    if not self.request_error_data.allow_errors:
+                        raise
+                    self.errors.append({'error': InvalidURL, 'url': url, 'response': None})
+                    return None
+                else:
+                    return self._validate_response(url, response_object)
+
+            if connectivity_n_try < self.request_error_data.error_connection_max_tries:
+                await asyncio.sleep(backoff_delay(connectivity_n_try))  # Backoff without holding a slot
+
+        self.errors.append({'error': ConnectivityError, 'url': url, 'response': None})
 
 
 class ThreadedRequestHandler(object):
     """
-    Class that divides a big url_list around of number of threads.
+    Class that handles a big url_list with a pool of threads fed from a shared queue, so any idle thread picks up the
+    next url. Urls that fail to connect are put back in the queue with an exponential backoff instead of blocking
+    their thread.
     """
-    def __init__(self, url_list, request_data, request_error_data, thread_num=1, max_passes=1, sleep_pass=0):
+    def __init__(self, url_list, request_data, request_error_data, thread_num=1, max_passes=1, sleep_pass=0,
+                 session=None, on_response=None):
         """
         :param url_list: list of strings
         :param request_data: RequestData object
@@ -187,10 +345,14 @@ class ThreadedRequestHandler(object):
         :param thread_num: integer, the number of threads to use
         :param max_passes: integer, the number of passes over the url list before returning
         :param sleep_pass: integer, the time to sleep between passes, 0 by default.
+        :param session: requests.Session, shared by all threads, if None, one is created with a pool of thread_num
+        :param on_response: callable, called from the threads with every valid ResponseObject as soon as it arrives
         """
         self.url_list = url_list
         self.request_data = request_data
         self.request_error_data = request_error_data
+        self.session = session if session else create_session(thread_num)
+        self.on_response = on_response
 
         self.thread_num = thread_num
         self.max_passes = max_passes
@@ -203,33 +365,95 @@ class ThreadedRequestHandler(object):
 
     def _init_threads(self, url_list):
         """
-        Creates the threads by dividing the url_list between self.thread_num. Fills self.threads and self.handlers.
+        Creates the threads and fills the queue with url_list. Fills self.threads and self.handler, a RequestHandler
+        shared by all threads to make and validate the requests.
 
         :param url_list: list of strings
         :return: None
         """
         self.threads = []
-        self.handlers = []
+        self.handler = RequestHandler([], self.request_data, self.request_error_data, session=self.session,
+                                      on_response=self.on_response)
+        self.exception = None
+
+        # Queue of (ready_at, count, url, connectivity_n_try), ready_at is a time.monotonic() value
+        self.queue = queue.PriorityQueue()
+        self.count = itertools.count()
+        for url in url_list:
+            self.queue.put((0, next(self.count), url, 0))
 
         # Don't use more threads than urls
         self.thread_num = len(url_list) if len(url_list) < self.thread_num else self.thread_num
 
-        t_lists = [[] for _ in range(self.thread_num)]
+        for _ in range(self.thread_num):
+            self.threads.append(threading.Thread(target=self._worker, daemon=True))
 
-        count = 0
-        for url in url_list:
-            t_lists[(count % self.thread_num)].append(url)
-            count += 1
+    def _worker(self):
+        """
+        Takes urls from self.queue until it gets a None url.
 
-        for thread_list in t_lists:
-            rh = RequestHandler(thread_list, self.request_data, self.request_error_data)
-            t = threading.Thread(target=rh.run)
-            self.handlers.append(rh)
-            self.threads.append(t)
+        :return: None
+        """
+        while True:
+            item = self.queue.get()
+            ready_at, _, url, connectivity_n_try = item
+            if url is None:
+                self.queue.task_done()
+                return
+
+            wait = ready_at - time.monotonic()
+            if wait > 0 and self.exception is None:  # Put it back, so we don't hold it while waiting
+                self.queue.put(item)
+                self.queue.task_done()
+                time.sleep(min(wait, 0.05))
+                continue
+
+            try:
+                if self.exception is None:  # After an exception, just drain the queue
+                    self._handle_url(url, connectivity_n_try)
+            except Exception as e:  # Also anything else requests or on_response may raise, re-raised by do_threads
+                self.exception = e
+            finally:
+                self.queue.task_done()
+
+    def _handle_url(self, url, connectivity_n_try):
+        """
+        Performs a request with self.handler, which error checks the response. In case of ConnectivityError the url is
+        put back in the queue with a backoff, self.request_error_data.error_connection_max_tries times.
+
+        Raise InvalidURL, ConnectivityError, InvalidStatusCode, NoValidationString, ContainsErrorString
+
+        :param url: string
+        :param connectivity_n_try: integer, times the url has failed to connect
+        :return: None
+        """
+        try:
+            response_object = self.handler._request_wrapper(url)
+
+        except ConnectivityError:
+            if not self.request_error_data.allow_errors:
+                raise ConnectivityError(url)
+            if connectivity_n_try < self.request_error_data.error_connection_max_tries:
+                self.queue.put((time.monotonic() + backoff_delay(connectivity_n_try), next(self.count), url,
+                                connectivity_n_try + 1))
+            else:
+                self.handler.errors.append({'error': ConnectivityError, 'url': url, 'response': None})
+            return None
+
+        except InvalidURL:
+            if not self.request_error_data.allow_errors:
+                raise
+            self.handler.errors.append({'error': InvalidURL, 'url': url, 'response': None})
+            return None
+
+        self.handler._validate_response(url, response_object)
 
     def do_threads(self, n_pass=0):
         """
-        Start all threads, when they end recollect them and then call itself again but with the content of self.errors.
+        Start all threads, when the queue is empty stop them, and then call itself again but with the content of
+        self.errors.
+
+        Raise the first exception any thread raised: ReqHandlerErrors if not allow_errors, and any unexpected one.
 
         :param n_pass: integer, takes count of recursive calls
         :return: None
@@ -239,12 +463,17 @@ class ThreadedRequestHandler(object):
         for t in self.threads:
             t.start()
 
+        self.queue.join()
+        for _ in self.threads:
+            self.queue.put((float('inf'), next(self.count), None, 0))
         for t in self.threads:
             t.join()
 
-        for handler in self.handlers:
-            self.responses += handler.responses
-            self.errors += handler.errors
+        if self.exception is not None:
+            raise self.exception
+
+        self.responses += self.handler.responses
+        self.errors += self.handler.errors
 
         if (len(self.errors) > 0) and (n_pass < self.max_passes):
             url_list = [err['url'] for err in self.errors]
@@ -265,6 +494,10 @@ class InvalidMethod(ReqHandlerError):
     pass
 
 
+class InvalidEngine(ReqHandlerError):
+    pass
+
+
 class InvalidURL(ReqHandlerError):
     pass
 
@@ -6,8 +6,21 @@ Wrapper class for using req_handler when scraping
 
 
 class ScrapWrapper(object):
-    def __init__(self, headers):
+    def __init__(self, headers, pool_size=10):
+        """
+        :param headers: dict, headers to use by default
+        :param pool_size: int, number of connections kept alive per host by the shared session, also the default and
+        maximum number of threads for bulk requests
+        """
         self.headers = headers
+        self.pool_size = pool_size
+        self.session = req_handler.create_session(pool_size)
+
+    def close(self):
+        """
+        Close the pooled connections of the session
+        """
+        self.session.close()
 
     def dict_to_url(self, dict_query, base_url):
         """
@@ -31,50 +44,73 @@ class ScrapWrapper(object):
 
         return query_url
 
-    def make_bulk_queries(self, query_list, *, allow_errors=True, n_threads=10, n_passes=5, sleep_pass=2, headers=True):
+    def make_bulk_queries(self, query_list, *, allow_errors=True, n_threads=None, n_passes=5, sleep_pass=2,
+                          headers=True, url_headers=None, engine=req_handler.THREADED, on_response=None):
         """
-        Wraps bulk threaded queries.
+        Wraps bulk threaded or async queries.
 
         :param query_list: list, strs with urls to query
         :param allow_errors: bool, should scraping allow errors, default to True
-        :param n_threads: int, number of threads to use
+        :param n_threads: int, number of threads to use, or maximum requests in flight for the async engine, defaults
+        to self.pool_size, and is capped at it so every thread gets a pooled connection
         :param n_passes: int, number of passes to do when there are errors
         :param sleep_pass: int, time to sleep between passes
+        :param url_headers: dict, {url: headers}, per-url headers, used for conditional requests. When passed, 304
+        responses are considered valid.
+        :param engine: str, one of req_handler.VALID_ENGINES
+        :param on_response: callable, called with every valid response as soon as it arrives, from the engine's threads
 
+        :raise req_handler.InvalidEngine: if engine is not one of req_handler.VALID_ENGINES
         :return: list, [responses, errors] : [list, list]
         """
+        if engine not in req_handler.VALID_ENGINES:
+            raise req_handler.InvalidEngine(engine)
 
         headers = self.headers if headers is True else None
+        n_threads = min(n_threads, self.pool_size) if n_threads else self.pool_size
+        expected_status_codes = [200, 304] if url_headers else [200]
 
-        TRH = req_handler.ThreadedRequestHandler(query_list,
-                                                 req_handler.RequestData(req_handler.GET, headers=headers),
-                                                 req_handler.RequestErrorData(allow_errors=allow_errors,
-                                                                              expected_status_codes=[200]),
-                                                 thread_num=n_threads, max_passes=n_passes, sleep_pass=sleep_pass)
+        request_data = req_handler.RequestData(req_handler.GET, headers=headers, url_headers=url_headers)
+        request_error_data = req_handler.RequestErrorData(allow_errors=allow_errors,
+                                                          expected_status_codes=expected_status_codes)
+
+        if engine == req_handler.ASYNC:
+            ARH = req_handler.AsyncRequestHandler(query_list, request_data, request_error_data, concurrency=n_threads,
+                                                  max_passes=n_passes, sleep_pass=sleep_pass, session=self.session,
+                                                  on_response=on_response)
+            ARH.run()
+
+            return ARH.responses, ARH.errors
+
+        TRH = req_handler.ThreadedRequestHandler(query_list, request_data, request_error_data,
+                                                 thread_num=n_threads, max_passes=n_passes, sleep_pass=sleep_pass,
+                                                 session=self.session, on_response=on_response)
         TRH.do_threads()
 
         return TRH.responses, TRH.errors
 
-    def make_bulk_posts_single(self, query_list, *, data, allow_errors=True, n_threads=10, n_passes=5, sleep_pass=2):
+    def make_bulk_posts_single(self, query_list, *, data, allow_errors=True, n_threads=None, n_passes=5, sleep_pass=2):
         """
         Wraps bulk threaded posts with a single payload.
 
         :param query_list: list, strs with urls to query
         :param data: str, data to pass through
         :param allow_errors: bool, should scraping allow errors, default to True
-        :param n_threads: int, number of threads to use
+        :param n_threads: int, number of threads to use, defaults to self.pool_size, and is capped at it
         :param n_passes: int, number of passes to do when there are errors
         :param sleep_pass: int, time to sleep between passes
 
         :return: list, [responses, errors] : [list, list]
         """
+        n_threads = min(n_threads, self.pool_size) if n_threads else self.pool_size
 
         TRH = req_handler.ThreadedRequestHandler(query_list,
                                                  req_handler.RequestData(req_handler.POST, headers=self.headers,
                                                                          data=data),
                                                  req_handler.RequestErrorData(allow_errors=allow_errors,
                                                                               expected_status_codes=[200, 201]),
-                                                 thread_num=n_threads, max_passes=n_passes, sleep_pass=sleep_pass)
+                                                 thread_num=n_threads, max_passes=n_passes, sleep_pass=sleep_pass,
+                                                 session=self.session)
         TRH.do_threads()
 
         return TRH.responses, TRH.errors
@@ -95,7 +131,8 @@ class ScrapWrapper(object):
         
         RH = req_handler.RequestHandler([query_url], req_handler.RequestData(req_handler.GET, headers=headers),
                                         req_handler.RequestErrorData(allow_errors=allow_errors,
-                                                                     expected_status_codes=[200]))
+                                                                     expected_status_codes=[200]),
+                                        session=self.session)
 
         RH.run()
 
@@ -121,7 +158,8 @@ class ScrapWrapper(object):
         RH = req_handler.RequestHandler([query_url], req_handler.RequestData(req_handler.POST, headers=headers,
                                                                              data=data),
                                         req_handler.RequestErrorData(allow_errors=allow_errors,
-                                                                     expected_status_codes=[200]))
+                                                                     expected_status_codes=[200]),
+                                        session=self.session)
 
         RH.run()
 
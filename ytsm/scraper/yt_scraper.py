@@ -1,9 +1,15 @@
 """ Scrapping class and exceptions. """
+import io
+import multiprocessing
+import os
+import queue
 import re
-from typing import Union
-
-from bs4 import BeautifulSoup  # type: ignore
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterator, Optional, Union
+from xml.etree import ElementTree
 
+from ytsm.settings import SETTINGS
 from ytsm.model import BaseUpdateResponse, SuccessUpdateResponse, ErrorUpdateResponse, MultipleUpdateResponse
 from ytsm.scraper.helpers.scrap_wrappers import ScrapWrapper
 from ytsm.scraper.helpers.req_handler import InvalidStatusCode, ReqHandlerError
@@ -25,9 +31,14 @@ class YTScraper:
     _channel_id_re_second = re.compile(r'"browseId":"(?P<channel_id>[\w\-]+)"')
     _channel_thumbnail_re = re.compile(r'"url":"https://yt3(?P<channel_thumbnail>[\w\-./_:]+)=')
     _euro_channel_redirect_re = re.compile(r'https://policies.google.com/technologies/cookies')
+    _xml_namespaces = {'http://www.w3.org/2005/Atom': '', 'http://www.youtube.com/xml/schemas/2015': 'yt:',
+                       'http://search.yahoo.com/mrss/': 'media:'}
+    _video_keys = ('id', 'name', 'url', 'pubdate', 'description', 'thumbnail')  # Order of a parsed entry's values
+    _parse_batch_size = 25  # Feeds sent to a parse process at once
 
     def __init__(self):
-        self.scrap_wrapper = ScrapWrapper(headers=None)
+        # Kept for the whole life of the YTScraper, so connections are reused between updates
+        self.scrap_wrapper = ScrapWrapper(headers=None, pool_size=SETTINGS.advanced_settings.fetch_connections)
         self.cache = {}  # We use this to not waste the xml when getting Channel information
 
     @staticmethod
@@ -50,6 +61,10 @@ class YTScraper:
         if not any(url_type in input_url for url_type in self._supported_url_types):
             raise self.YTUrlNotSupported(input_url)
 
+    def close(self) -> None:
+        """ Close the pooled connections """
+        self.scrap_wrapper.close()
+
     def clear_cache(self) -> None:
         """ Clears the cache """
         self.cache = {}
@@ -138,14 +153,16 @@ class YTScraper:
 
         :return: {{'id': str, 'name': str, 'uri': str}
         """
-        bs = BeautifulSoup(xml, 'xml')
-        author = bs.find('author')
-        if author:
-            return {  # Raise here seems quite impossible
-                'id': channel_id,
-                'name': author.find('name').getText(),
-                'url': author.find('uri').getText()
-            }
+        try:
+            for author in self._iter_xml_elements(xml, 'author'):
+                children = self._get_xml_children(author)
+                return {
+                    'id': channel_id,
+                    'name': children['name'].text or '',
+                    'url': children['uri'].text or ''
+                }
+        except (ElementTree.ParseError, KeyError):
+            pass
 
         raise self.ChannelInfoParsingError(channel_id)
 
@@ -174,27 +191,179 @@ class YTScraper:
         except (YTScraper.GettingError, YTScraper.VideoListParsingError) as e:
             return ErrorUpdateResponse(channel_id, e)
 
-    def get_video_list_multiple(self, channel_ids: list[str]) -> MultipleUpdateResponse:
+    def get_video_list_multiple(self, channel_ids: list[str],
+                                validators: Optional[dict[str, tuple[Optional[str], Optional[str]]]] = None) \
+            -> MultipleUpdateResponse:
         """
         Gets a video list for multiple Channel id's
 
+        If validators {channel_id: (etag, last_modified)} are passed, conditional requests are made, and Channels whose
+        feed didn't change get a SuccessUpdateResponse with not_modified == True and an empty video_list.
+
         :raises VideoListParsingError: If there is a missing key on the XML
         """
         url_list = [self._rss_base_url % c for c in channel_ids]
-        xmls, errors = self._get_urls_parallel(url_list)
+        xmls, errors, response_validators = self._get_urls_parallel(url_list,
+                                                                    url_headers=self._make_url_headers(validators))
+
+        feeds = [(key, xml) for key, xml in xmls.items() if xml is not None]
+        parsed_entries = {}
+        n_processes = self._get_parse_processes(len(feeds))
+        if n_processes > 1:
+            with self._make_parse_pool(n_processes) as pool:
+                for batch in pool.map(parse_feeds, self._make_parse_batches(feeds)):
+                    parsed_entries.update(batch)
 
         errors_list = [ErrorUpdateResponse(channel_id, exception) for channel_id, exception in errors.items()]
         successes_list = []
         for key in xmls.keys():
-            try:
-                video_list = self._extract_video_information_from_xml(xmls[key], key)
-            except YTScraper.VideoListParsingError as e:
-                errors_list.append(ErrorUpdateResponse(key, e))
+            etag, last_modified = response_validators.get(key, (None, None))
+            if key in parsed_entries:
+                update_response = self._make_update_response_from_entries(key, parsed_entries[key], etag,
+                                                                          last_modified)
+            else:
+                update_response = self._make_update_response(key, xmls[key], etag, last_modified)
+            if isinstance(update_response, ErrorUpdateResponse):
+                errors_list.append(update_response)
             else:
-                successes_list.append(SuccessUpdateResponse(key, video_list))
+                successes_list.append(update_response)
 
         return MultipleUpdateResponse(successes_list, errors_list)
 
+    def iter_video_list_multiple(self, channel_ids: list[str],
+                                 validators: Optional[dict[str, tuple[Optional[str], Optional[str]]]] = None) \
+            -> Iterator[Union[SuccessUpdateResponse, ErrorUpdateResponse]]:
+        """
+        Like get_video_list_multiple, but yields each Channel's update response as soon as its feed arrives and is
+        parsed. Feeds are fetched and parsed on the fetching engine's threads, while the caller consumes the responses
+        on its own thread. Errors are yielded once fetching is over, as urls with errors are retried until then.
+        Once parse_processes_threshold feeds have arrived with a body, the rest are parsed in batches across a process
+        pool instead. Not modified feeds don't count, so updates that mostly get 304s don't start the pool.
+        """
+        url_list = [self._rss_base_url % c for c in channel_ids]
+        update_responses: queue.Queue = queue.Queue()
+        pool: Optional[ProcessPoolExecutor] = None
+        n_bodies = 0
+        batch: list[tuple[str, str, Optional[str], Optional[str]]] = []
+        batch_lock = threading.Lock()
+
+        def submit_batch() -> None:
+            """ Parse the batch of (channel_id, xml, etag, last_modified) on the pool, must hold batch_lock """
+            feed_validators = {channel_id: (etag, last_modified) for channel_id, _, etag, last_modified in batch}
+
+            def put_parsed(future: Future) -> None:
+                """ Put the parsed batch's update responses """
+                try:
+                    for channel_id, entries in future.result():
+                        update_responses.put(self._make_update_response_from_entries(channel_id, entries,
+                                                                                     *feed_validators[channel_id]))
+                except Exception as e:  # Re-raised on the caller's thread
+                    update_responses.put(e)
+
+            pool.submit(parse_feeds, [(channel_id, xml) for channel_id, xml, _, _ in batch]).add_done_callback(
+                put_parsed)
+            batch.clear()
+
+        def on_response(response) -> None:
+            """ Parse the response on the fetching thread, or batch it for the pool """
+            nonlocal pool, n_bodies
+            channel_id = self._channel_id_from_url(response.url)
+            etag, last_modified = self._get_response_validators(response)
+            xml = self._get_response_xml(response)
+            if xml is not None:
+                with batch_lock:
+                    n_bodies += 1
+                    if pool is None and (n_processes := self._get_parse_processes(n_bodies)) > 1:
+                        pool = self._make_parse_pool(n_processes)
+                    if pool:
+                        batch.append((channel_id, xml, etag, last_modified))
+                        if len(batch) >= self._parse_batch_size:
+                            submit_batch()
+                        return
+            update_responses.put(self._make_update_response(channel_id, xml, etag, last_modified))
+
+        def fetch() -> None:
+            """ Fetch all feeds, then put the errors, and None to signal the end """
+            try:
+                _, errs = self.scrap_wrapper.make_bulk_queries(url_list, url_headers=self._make_url_headers(validators),
+                                                               engine=SETTINGS.advanced_settings.fetch_engine,
+                                                               on_response=on_response)
+                with batch_lock:
+                    if batch:
+                        submit_batch()
+                if pool:
+                    pool.shutdown()  # Waits until every parsed batch is put
+                for e in errs:
+                    update_responses.put(ErrorUpdateResponse(self._channel_id_from_url(e['url']),
+                                                             self._translate_error(e)))
+            except Exception as e:  # Re-raised on the caller's thread
+                update_responses.put(e)
+            finally:
+                if pool:
+                    pool.shutdown()
+                update_responses.put(None)
+
+        threading.Thread(target=fetch, daemon=True).start()
+        while (update_response := update_responses.get()) is not None:
+            if isinstance(update_response, Exception):
+                raise update_response
+            yield update_response
+
+    def _make_url_headers(self, validators: Optional[dict[str, tuple[Optional[str], Optional[str]]]]) \
+            -> dict[str, dict]:
+        """
+        Make the conditional request headers for each feed url, from validators {channel_id: (etag, last_modified)}
+        """
+        url_headers = {}
+        for channel_id, (etag, last_modified) in (validators if validators else {}).items():
+            conditional_headers = {}
+            if etag:
+                conditional_headers['If-None-Match'] = etag
+            if last_modified:
+                conditional_headers['If-Modified-Since'] = last_modified
+            if conditional_headers:
+                url_headers[self._rss_base_url % channel_id] = conditional_headers
+        return url_headers
+
+    def _make_update_response(self, channel_id: str, xml: Optional[str], etag: Optional[str],
+                              last_modified: Optional[str]) -> Union[SuccessUpdateResponse, ErrorUpdateResponse]:
+        """ Parse a feed's xml into an update response, xml is None when the feed was not modified (304) """
+        if xml is None:  # 304, nothing to parse
+            return SuccessUpdateResponse(channel_id, [], not_modified=True, etag=etag, last_modified=last_modified)
+        try:
+            video_list = self._extract_video_information_from_xml(xml, channel_id)
+        except YTScraper.VideoListParsingError as e:
+            return ErrorUpdateResponse(channel_id, e)
+        return SuccessUpdateResponse(channel_id, video_list, etag=etag, last_modified=last_modified)
+
+    def _make_update_response_from_entries(self, channel_id: str, entries: Optional[list[tuple]], etag: Optional[str],
+                                           last_modified: Optional[str]) -> Union[SuccessUpdateResponse,
+                                                                                  ErrorUpdateResponse]:
+        """ Make an update response from a feed parsed by parse_feeds, entries is None when the feed was broken """
+        if entries is None:
+            return ErrorUpdateResponse(channel_id, self.VideoListParsingError(channel_id))
+        return SuccessUpdateResponse(channel_id, [self._make_video_information(channel_id, e) for e in entries],
+                                     etag=etag, last_modified=last_modified)
+
+    def _get_parse_processes(self, n_feeds: int) -> int:
+        """ Get how many processes to parse n_feeds across, 1 means parsing in-process """
+        if n_feeds < SETTINGS.advanced_settings.parse_processes_threshold:
+            return 1
+        return SETTINGS.advanced_settings.parse_processes or os.cpu_count() or 1
+
+    @staticmethod
+    def _make_parse_pool(n_processes: int) -> ProcessPoolExecutor:
+        """
+        Make a pool of n_processes to parse feeds. Its processes are not forked from this one, as it runs the fetching
+        threads (and the GUI's), and forking a multi-threaded process can deadlock the child
+        """
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        return ProcessPoolExecutor(n_processes, mp_context=multiprocessing.get_context(start_method))
+
+    def _make_parse_batches(self, feeds: list[tuple[str, str]]) -> list[list[tuple[str, str]]]:
+        """ Split feeds in batches of _parse_batch_size, to be sent to the parse processes """
+        return [feeds[i:i + self._parse_batch_size] for i in range(0, len(feeds), self._parse_batch_size)]
+
     def _extract_video_information_from_xml(self, xml: str, channel_id: str):
         """
         Extract video information from a https://www.youtube.com/feeds/videos.xml?channel_id=
@@ -205,24 +374,72 @@ class YTScraper:
         :return: [{'id': str, 'channel_id': str, 'name': str, 'url': str, 'pubdate': str, 'description': str,
         'thumbnail': str}]
         """
-        bs = BeautifulSoup(xml, 'xml')
-        entries = bs.findAll('entry')
-        videos = []
-        for entry in entries:
-            try:
-                videos.append({  # Raise here seems quite impossible
-                    'id': entry.find('yt:videoId').getText(),
-                    'channel_id': channel_id,
-                    'name': entry.find('title').getText(),
-                    'url': entry.find('link').get('href'),
-                    'pubdate': entry.find('published').getText(),
-                    'description': entry.find('media:group').find('media:description').getText(),
-                    'thumbnail': entry.find('media:group').find('media:thumbnail').get('url'),
-                })
-            except AttributeError:
-                raise self.VideoListParsingError(channel_id)
-
-        return videos
+        try:
+            entries = self._parse_entries(xml)
+        except (ElementTree.ParseError, KeyError):
+            raise self.VideoListParsingError(channel_id)
+
+        return [self._make_video_information(channel_id, entry) for entry in entries]
+
+    @classmethod
+    def _make_video_information(cls, channel_id: str, entry: tuple) -> dict:
+        """ Make a video information dict from a parsed entry """
+        video_information = dict(zip(cls._video_keys, entry))
+        video_information['channel_id'] = channel_id
+        return video_information
+
+    @classmethod
+    def _parse_entries(cls, xml: str) -> list[tuple]:
+        """
+        Parse the entries of a feed's xml into tuples of values ordered as _video_keys.
+
+        :raises ElementTree.ParseError: If xml is not well-formed
+        :raises KeyError: If there is a missing key on an entry
+        """
+        entries = []
+        for entry in cls._iter_xml_elements(xml, 'entry'):
+            children = cls._get_xml_children(entry)
+            media_group = cls._get_xml_children(children['media:group'])
+            entries.append((
+                children['yt:videoId'].text or '',
+                children['title'].text or '',
+                children['link'].get('href'),
+                children['published'].text or '',
+                media_group['media:description'].text or '',
+                media_group['media:thumbnail'].get('url'),
+            ))
+            entry.clear()  # Done with it, don't keep the whole tree around
+        return entries
+
+    @classmethod
+    def _get_xml_tag(cls, element: ElementTree.Element) -> str:
+        """ Get element's tag with its namespace replaced by the feed's prefix, ie: 'yt:videoId' """
+        if element.tag.startswith('{'):
+            namespace, tag = element.tag[1:].split('}', 1)
+            return cls._xml_namespaces.get(namespace, f'{{{namespace}}}') + tag
+        return element.tag
+
+    @classmethod
+    def _get_xml_children(cls, element: ElementTree.Element) -> dict:
+        """ Get {tag: child} for element's first child of each tag """
+        children = {}
+        for child in element:
+            children.setdefault(cls._get_xml_tag(child), child)
+        return children
+
+    @classmethod
+    def _iter_xml_elements(cls, xml: str, tag: str) -> Iterator[ElementTree.Element]:
+        """
+        Parse xml in a single streaming pass, yielding every element with tag as soon as it is closed.
+        An empty xml has no elements.
+
+        :raises ElementTree.ParseError: If xml is not well-formed
+        """
+        if not xml.strip():
+            return
+        for _, element in ElementTree.iterparse(io.BytesIO(xml.encode('utf-8'))):
+            if cls._get_xml_tag(element) == tag:
+                yield element
 
     def _get_url(self, url: str) -> str:
         """
@@ -245,7 +462,8 @@ class YTScraper:
         else:
             return response.text
 
-    def _get_urls_parallel(self, url_list: list[str]) -> tuple[dict[str, str], dict[str, Exception]]:
+    def _get_urls_parallel(self, url_list: list[str], url_headers: Optional[dict[str, dict]] = None) \
+            -> tuple[dict[str, Optional[str]], dict[str, Exception], dict[str, tuple[Optional[str], Optional[str]]]]:
         """
         Wraps and translates calls to self.scrap_wrapper.make_bulk_queries()
 
@@ -253,24 +471,48 @@ class YTScraper:
         :raise YTUrlUnexpectedStatusCode: if YT returns something else than 404
         :raise GettingError : if there is any other requests error
 
-        :return dict, dict: {channel_id: response}, {chanel-id:
+        :return dict, dict, dict: {channel_id: response text, None if 304}, {channel_id: exception},
+        {channel_id: (etag, last_modified)}
         """
-        res, errs = self.scrap_wrapper.make_bulk_queries(url_list)
-        xmls, errors = {}, {}
+        res, errs = self.scrap_wrapper.make_bulk_queries(url_list, url_headers=url_headers,
+                                                         engine=SETTINGS.advanced_settings.fetch_engine)
+        xmls, errors, validators = {}, {}, {}
         for r in res:
-            key = r.url.split('channel_id=')[1]
-            xmls[key] = r.text
+            key = self._channel_id_from_url(r.url)
+            xmls[key] = self._get_response_xml(r)
+            if any(self._get_response_validators(r)):
+                validators[key] = self._get_response_validators(r)
         for e in errs:
-            key = e['url'].split('channel_id=')[1]
-            if e['error'] == InvalidStatusCode:
-                if e['response'].status_code == 404:
-                    errors[key] = YTScraper.YTUrl404(e['url'])
-                else:
-                    errors[key] = YTScraper.YTUrlUnexpectedStatusCode(e['response'].status_code)
-            else:
-                errors[key] = YTScraper.GettingError(e['error'])
+            errors[self._channel_id_from_url(e['url'])] = self._translate_error(e)
 
-        return xmls, errors
+        return xmls, errors, validators
+
+    @staticmethod
+    def _channel_id_from_url(url: str) -> str:
+        """ Get the channel_id from a feed url """
+        return url.split('channel_id=')[1]
+
+    @staticmethod
+    def _get_response_xml(response) -> Optional[str]:
+        """ Get a feed response's xml, None if the feed was not modified (304) """
+        return response.text if response.status_code != 304 else None
+
+    @staticmethod
+    def _get_response_validators(response) -> tuple[Optional[str], Optional[str]]:
+        """ Get a feed response's validators: (etag, last_modified) """
+        return response.headers.get('ETag'), response.headers.get('Last-Modified')
+
+    @staticmethod
+    def _translate_error(error: dict) -> Exception:
+        """
+        Translate a req_handler error dict into a YTScraper exception:
+        YTUrl404 if YT returned 404, YTUrlUnexpectedStatusCode if YT returned something else, else GettingError
+        """
+        if error['error'] == InvalidStatusCode:
+            if error['response'].status_code == 404:
+                return YTScraper.YTUrl404(error['url'])
+            return YTScraper.YTUrlUnexpectedStatusCode(error['response'].status_code)
+        return YTScraper.GettingError(error['error'])
 
     class YTScraperError(Exception):
         """ Base exception for YTScraper errors """
@@ -310,3 +552,17 @@ class YTScraper:
 
     class EuroIPError(ParsingError):
         """ Attempted to add a Channel via a channel-type url while using an Euro IP """
+
+
+def parse_feeds(feeds: list[tuple[str, str]]) -> list[tuple[str, Optional[list[tuple]]]]:
+    """
+    Parse a batch of (channel_id, xml) feeds, meant to run on a worker process, so it lives at module level to be
+    picklable. Entries come back as compact tuples, or None for feeds that can't be parsed.
+    """
+    parsed = []
+    for channel_id, xml in feeds:
+        try:
+            parsed.append((channel_id, YTScraper._parse_entries(xml)))
+        except (ElementTree.ParseError, KeyError):
+            parsed.append((channel_id, None))
+    return parsed
@@ -5,13 +5,21 @@ SETTINGS -> A global Settings() class to use as a Singleton
 NEW_VIDEO, UNWATCHED_VIDEO, OLD_VIDEO -> Constants for video tagging
 VALID_CLI_COLORS -> A list of valid colorama colors for click usage
 VALID_TUI_COLORS -> A list of valid urwid colors
+VALID_FETCH_ENGINES -> A list of valid engines for fetching feeds
+VALID_SQLITE_JOURNAL_MODES, VALID_SQLITE_SYNCHRONOUS -> Lists of valid SQLite journal_mode and synchronous PRAGMAs
 SQLITE_DB_CREATION_STATEMENTS -> A list of strings for generating the db structure
+SQLITE_DB_MIGRATIONS -> A list of migrations, each a list of strings, migration i takes a db on PRAGMA user_version i
+                        to i + 1
+SQLITE_DB_FTS_STATEMENTS -> A list of idempotent strings for the optional full-text search index on videos, it needs
+                            FTS5 with the trigram tokenizer (SQLite 3.34+)
 """
 import dataclasses
 import json
 from collections.abc import Mapping
 from typing import Union
 
+from ytsm.scraper.helpers import req_handler
+
 NEW_VIDEO, UNWATCHED_VIDEO, OLD_VIDEO = 'NEW', 'UNWATCHED', 'OLD'
 VALID_CLI_COLORS = ['black', 'red', 'green', 'yellow', 'blue', 'magenta', 'cyan', 'white', 'bright_black', 'bright_red',
                     'bright_green', 'bright_yellow', 'bright_blue', 'bright_magenta', 'bright_cyan', 'bright_white']
@@ -20,6 +28,11 @@ VALID_TUI_COLORS = ['black', 'dark red', 'dark green', 'brown', 'dark blue', 'da
                     'dark gray', 'light red', 'light green', 'yellow', 'light blue', 'light magenta', 'light cyan',
                     'white']
 
+VALID_FETCH_ENGINES = req_handler.VALID_ENGINES
+
+VALID_SQLITE_JOURNAL_MODES = ['DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF']
+VALID_SQLITE_SYNCHRONOUS = ['OFF', 'NORMAL', 'FULL', 'EXTRA']
+
 SQLITE_DB_CREATION_STATEMENTS = [
     """
     CREATE TABLE channels (
@@ -48,6 +61,110 @@ SQLITE_DB_CREATION_STATEMENTS = [
     """
 ]
 
+SQLITE_DB_MIGRATIONS = [
+    [  # 1 - Feed validators for conditional requests
+        """
+        CREATE TABLE IF NOT EXISTS feed_validators (
+            channel_id    TEXT PRIMARY KEY REFERENCES channels (id) ON DELETE CASCADE
+                               NOT NULL,
+            etag          TEXT,
+            last_modified TEXT
+        );
+        """
+    ],
+    [  # 2 - Video indexes, per Channel by pubdate, by pubdate, and partial ones for new and unwatched Videos
+        'CREATE INDEX IF NOT EXISTS videos_channel_id_pubdate ON videos (channel_id, pubdate);',
+        'CREATE INDEX IF NOT EXISTS videos_pubdate ON videos (pubdate);',
+        'CREATE INDEX IF NOT EXISTS videos_new ON videos (channel_id) WHERE new=TRUE;',
+        'CREATE INDEX IF NOT EXISTS videos_unwatched ON videos (channel_id) WHERE watched=FALSE;',
+    ],
+    [  # 3 - Per Channel Video counters and last pubdate, kept by triggers on videos
+        'ALTER TABLE channels ADD COLUMN total_count INTEGER NOT NULL DEFAULT 0;',
+        'ALTER TABLE channels ADD COLUMN new_count INTEGER NOT NULL DEFAULT 0;',
+        'ALTER TABLE channels ADD COLUMN unwatched_count INTEGER NOT NULL DEFAULT 0;',
+        'ALTER TABLE channels ADD COLUMN last_pubdate DATETIME;',
+        """
+        UPDATE channels SET
+            total_count = (SELECT COUNT() FROM videos WHERE channel_id=channels.id),
+            new_count = (SELECT COUNT() FROM videos WHERE channel_id=channels.id AND new=TRUE),
+            unwatched_count = (SELECT COUNT() FROM videos WHERE channel_id=channels.id AND watched=FALSE),
+            last_pubdate = (SELECT MAX(pubdate) FROM videos WHERE channel_id=channels.id);
+        """,
+        """
+        CREATE TRIGGER videos_counters_insert AFTER INSERT ON videos
+        BEGIN
+            UPDATE channels SET total_count = total_count + 1,
+                                new_count = new_count + (NEW.new=TRUE),
+                                unwatched_count = unwatched_count + (NEW.watched=FALSE),
+                                last_pubdate = MAX(COALESCE(last_pubdate, NEW.pubdate), NEW.pubdate)
+            WHERE id=NEW.channel_id;
+        END;
+        """,
+        """
+        CREATE TRIGGER videos_counters_delete AFTER DELETE ON videos
+        BEGIN
+            UPDATE channels SET total_count = total_count - 1,
+                                new_count = new_count - (OLD.new=TRUE),
+                                unwatched_count = unwatched_count - (OLD.watched=FALSE),
+                                last_pubdate = (SELECT MAX(pubdate) FROM videos WHERE channel_id=OLD.channel_id)
+            WHERE id=OLD.channel_id;
+        END;
+        """,
+        """
+        CREATE TRIGGER videos_counters_update_state AFTER UPDATE OF new, watched ON videos
+        WHEN OLD.channel_id=NEW.channel_id AND OLD.pubdate=NEW.pubdate
+        BEGIN
+            UPDATE channels SET new_count = new_count - (OLD.new=TRUE) + (NEW.new=TRUE),
+                                unwatched_count = unwatched_count - (OLD.watched=FALSE) + (NEW.watched=FALSE)
+            WHERE id=NEW.channel_id;
+        END;
+        """,
+        """
+        CREATE TRIGGER videos_counters_update_channel AFTER UPDATE OF channel_id, pubdate ON videos
+        WHEN OLD.channel_id<>NEW.channel_id OR OLD.pubdate<>NEW.pubdate
+        BEGIN
+            UPDATE channels SET
+                total_count = (SELECT COUNT() FROM videos WHERE channel_id=channels.id),
+                new_count = (SELECT COUNT() FROM videos WHERE channel_id=channels.id AND new=TRUE),
+                unwatched_count = (SELECT COUNT() FROM videos WHERE channel_id=channels.id AND watched=FALSE),
+                last_pubdate = (SELECT MAX(pubdate) FROM videos WHERE channel_id=channels.id)
+            WHERE id IN (OLD.channel_id, NEW.channel_id);
+        END;
+        """,
+    ],
+]
+
+SQLITE_DB_FTS_STATEMENTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5(
+        name, description, content='videos', content_rowid='rowid', tokenize='trigram'
+    );
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS videos_fts_insert AFTER INSERT ON videos
+    BEGIN
+        INSERT INTO videos_fts (rowid, name, description) VALUES (NEW.rowid, NEW.name, NEW.description);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS videos_fts_delete AFTER DELETE ON videos
+    BEGIN
+        INSERT INTO videos_fts (videos_fts, rowid, name, description)
+            VALUES ('delete', OLD.rowid, OLD.name, OLD.description);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS videos_fts_update AFTER UPDATE OF name, description ON videos
+    BEGIN
+        INSERT INTO videos_fts (videos_fts, rowid, name, description)
+            VALUES ('delete', OLD.rowid, OLD.name, OLD.description);
+        INSERT INTO videos_fts (rowid, name, description) VALUES (NEW.rowid, NEW.name, NEW.description);
+    END;
+    """,
+]
+
+SQLITE_DB_CREATION_STATEMENTS += [statement for migration in SQLITE_DB_MIGRATIONS for statement in migration]
+
 @dataclasses.dataclass
 class GUIColorScheme(Mapping):
     """ Dataclass for holding GUI color scheme settings """
@@ -203,6 +320,36 @@ class TUISettings:
 class AdvancedSettings:
     """ Dataclass for advanced Settings """
     max_videos_per_channel: int = 100
+    fetch_connections: int = 10
+    fetch_engine: str = req_handler.THREADED
+    parse_processes: int = 0  # 0 uses one process per cpu
+    parse_processes_threshold: int = 200  # Fewer feeds than this are parsed in-process
+    sqlite_journal_mode: str = 'WAL'  # WAL lets readers and the writer of the db work at once
+    sqlite_synchronous: str = 'NORMAL'
+    sqlite_busy_timeout: int = 5000  # Milliseconds to wait on a locked db before failing
+    sqlite_mmap_size: int = 256 * 1024 * 1024  # Bytes, 0 disables memory-mapped I/O
+    sqlite_cache_size: int = 16 * 1024  # KiB of page cache per connection
+
+    def __post_init__(self):
+        """ Check fetch_connections and parse_processes_threshold are positive ints, parse_processes and the
+        sqlite_ sizes are non-negative ints, fetch_engine is in VALID_FETCH_ENGINES, sqlite_journal_mode is in
+        VALID_SQLITE_JOURNAL_MODES and sqlite_synchronous is in VALID_SQLITE_SYNCHRONOUS """
+        for key in ['fetch_connections', 'parse_processes_threshold']:
+            if not isinstance(getattr(self, key), int) or getattr(self, key) < 1:
+                raise Settings.InvalidSettingsValue(f'In AdvancedSettings: "{key}": "{getattr(self, key)}", use a '
+                                                    f'positive integer')
+        for key in ['parse_processes', 'sqlite_busy_timeout', 'sqlite_mmap_size', 'sqlite_cache_size']:
+            if not isinstance(getattr(self, key), int) or getattr(self, key) < 0:
+                raise Settings.InvalidSettingsValue(f'In AdvancedSettings: "{key}": "{getattr(self, key)}", use 0 '
+                                                    f'or a positive integer')
+        if self.fetch_engine not in VALID_FETCH_ENGINES:
+            raise Settings.InvalidSettingsValue(f'In AdvancedSettings: "fetch_engine": "{self.fetch_engine}", '
+                                                f'use one of these: {", ".join(VALID_FETCH_ENGINES)}')
+        for key, valid_values in [('sqlite_journal_mode', VALID_SQLITE_JOURNAL_MODES),
+                                  ('sqlite_synchronous', VALID_SQLITE_SYNCHRONOUS)]:
+            if getattr(self, key) not in valid_values:
+                raise Settings.InvalidSettingsValue(f'In AdvancedSettings: "{key}": "{getattr(self, key)}", '
+                                                    f'use one of these: {", ".join(valid_values)}')
 
 
 class Settings:
@@ -0,0 +1,76 @@
+""" In-memory index for searching Channels by name """
+from typing import Iterable
+
+from ytsm.model import Channel
+
+
+class ChannelNameIndex:
+    """
+    Trigram index over Channel names, for case-insensitive "name contains" searches as the user types.
+    Kept in sync incrementally with the Channels it is given, so it's built once per session.
+    """
+    EXACT, PREFIX, WORD, CONTAINS = range(4)  # Match qualities, best first
+
+    def __init__(self):
+        self.names: dict[str, str] = {}  # channel_id -> case folded name
+        self.trigrams: dict[str, set[str]] = {}  # trigram -> channel_ids
+
+    @staticmethod
+    def _get_trigrams(folded_str: str) -> set[str]:
+        """ Get the set of trigrams of a case folded string """
+        return {folded_str[i:i + 3] for i in range(len(folded_str) - 2)}
+
+    def add(self, channel_id: str, name: str) -> None:
+        """ Add, or rename, Channel with channel_id """
+        if channel_id in self.names:
+            self.remove(channel_id)
+        folded_name = name.casefold()
+        self.names[channel_id] = folded_name
+        for trigram in self._get_trigrams(folded_name):
+            self.trigrams.setdefault(trigram, set()).add(channel_id)
+
+    def remove(self, channel_id: str) -> None:
+        """ Remove Channel with channel_id, if it is indexed """
+        folded_name = self.names.pop(channel_id, None)
+        if folded_name is None:
+            return
+        for trigram in self._get_trigrams(folded_name):
+            channel_ids = self.trigrams[trigram]
+            channel_ids.discard(channel_id)
+            if not channel_ids:
+                del self.trigrams[trigram]
+
+    def sync(self, channels: Iterable[Channel]) -> None:
+        """ Bring the index up to date with channels, only touching the Channels added, removed or renamed """
+        current = {c.idx: c.name for c in channels}
+        for channel_id in self.names.keys() - current.keys():
+            self.remove(channel_id)
+        for channel_id, name in current.items():
+            if self.names.get(channel_id) != name.casefold():
+                self.add(channel_id, name)
+
+    def _get_match_quality(self, folded_name: str, folded_str: str) -> int:
+        """ Get how well folded_str matches folded_name, ChannelNameIndex.EXACT to ChannelNameIndex.CONTAINS """
+        if folded_name == folded_str:
+            return self.EXACT
+        elif folded_name.startswith(folded_str):
+            return self.PREFIX
+        elif f' {folded_str}' in folded_name:
+            return self.WORD
+        return self.CONTAINS
+
+    def search(self, name_str: str) -> list[str]:
+        """
+        Find the ids of the Channels which names contain name_str, case-insensitive.
+        Ordered by match quality (exact, prefix, start of a word, anywhere), then by name.
+        """
+        folded_str = name_str.casefold()
+        trigrams = self._get_trigrams(folded_str)
+        if trigrams:  # Only verify the Channels that have all the trigrams
+            candidates = set.intersection(*(self.trigrams.get(t, set()) for t in trigrams))
+        else:  # Too short to have trigrams
+            candidates = self.names.keys()
+
+        found = [(self._get_match_quality(self.names[c], folded_str), self.names[c], c) for c in candidates
+                 if folded_str in self.names[c]]
+        return [channel_id for _, _, channel_id in sorted(found)]
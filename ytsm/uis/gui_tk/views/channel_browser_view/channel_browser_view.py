@@ -1,4 +1,5 @@
 """ Frame for ChannelBrowser window """
+from typing import Callable
 from tkinter import HORIZONTAL
 from tkinter.ttk import Frame, Panedwindow
 
@@ -9,14 +10,15 @@ from ytsm.uis.ytsm_controller import YTSMController
 
 class ChannelBrowserView(Frame):
     """ Frame for ChannelBrowser view """
-    def __init__(self, master, ytsm_controller: YTSMController):
+    def __init__(self, master, ytsm_controller: YTSMController, callback_update_all: Callable):
         super().__init__(master)
         self.ytsm_controller = ytsm_controller
 
         self.pane_win = Panedwindow(self, orient=HORIZONTAL)
         self.channel_selection_pane = ChannelSelection(self.pane_win, self.ytsm_controller,
                                                        self.callback_channel_selection,
-                                                       self.callback_no_channels)
+                                                       self.callback_no_channels,
+                                                       callback_update_all)
         self.video_selection_pane = VideoPane(self.pane_win, self.ytsm_controller,
                                               self.callback_video_alterations)
         self.pane_win.add(self.channel_selection_pane)
@@ -12,11 +12,12 @@ class ChannelSelection(Frame):
     hint_channel_search_str = 'Channel search...'
 
     def __init__(self, master, ytsm_controller: YTSMController, callback_channel_select: Callable,
-                 callback_no_channels: Callable):
+                 callback_no_channels: Callable, callback_update_all: Callable):
         super().__init__(master)
         self.ytsm_controller = ytsm_controller
         self.callback_channel_select = callback_channel_select
         self.callback_no_channels = callback_no_channels
+        self.callback_update_all = callback_update_all
         self.channel_dto_list = []
 
         self.channel_search_entry_value = StringVar(value=ChannelSelection.hint_channel_search_str)
@@ -103,11 +104,13 @@ class ChannelSelection(Frame):
         return None
 
     def _change_channel_search_value(self) -> None:
-        """ Perform a Channel search """
+        """ Perform a Channel search, in the background once the user stops typing """
         search_term = self.channel_search_entry_value.get()
         if search_term != ChannelSelection.hint_channel_search_str:
             self.ytsm_controller.set_channel_search_term(search_term)
-            self.reload_data()
+            self.ytsm_controller.search_scheduler.schedule(
+                self, self.ytsm_controller.get_channel_dto_list,
+                lambda channel_dto_list: self.reload_data(channel_dto_list=channel_dto_list))
 
     def _change_channel_treeview_selection(self) -> None:
         """ channel_treeview selection was changed.
@@ -124,22 +127,24 @@ class ChannelSelection(Frame):
         if channel_dto:
             self.ytsm_controller.visit_channel(channel_dto)
 
-    def reload_data(self, *, select_channel_idx: str = '', selection_activated: bool = True) -> None:
+    def reload_data(self, *, select_channel_idx: str = '', selection_activated: bool = True,
+                    channel_dto_list: Optional[list[YTSMController.ChannelDTO]] = None) -> None:
         """
         Reloads channel_dto_list and channel_treeview
         :param select_channel_idx: id for the currently selected channel if we are reloading under selection
         :param selection_activated: call _change_channel_treeview_selection() after reloading
+        :param channel_dto_list: the ChannelDTOs, if they were already searched in the background
         """
-        [self.channel_treeview.delete(i) for i in self.channel_treeview.get_children()]  # Delete all contents
-        self.channel_dto_list = self.ytsm_controller.get_channel_dto_list()
+        self.ytsm_controller.search_scheduler.cancel(self)  # This reload supersedes any search in the background
+        self.channel_treeview.delete(*self.channel_treeview.get_children())  # Delete all contents
+        self.channel_dto_list = channel_dto_list if channel_dto_list is not None else \
+            self.ytsm_controller.get_channel_dto_list()
 
         selected_index = 0  # We will select this index after loading all channel names into the ListBox
         for c_index, c_dto in enumerate(self.channel_dto_list):
             if c_dto.channel.idx == select_channel_idx:  # Check if it is the one we will have to select
                 selected_index = c_index
-            tag_name = NEW_VIDEO if c_dto.new else UNWATCHED_VIDEO if c_dto.unwatched else OLD_VIDEO
-            muted = '(m) ' if not c_dto.channel.notify_on else ''
-            display_text = f'{muted}{c_dto.channel.name}'
+            display_text, tag_name = self._get_channel_row(c_dto)
             self.channel_treeview.insert('', END, str(c_index), values=(display_text,), tags=(tag_name,))
 
         if self.channel_dto_list and selection_activated:
@@ -147,6 +152,22 @@ class ChannelSelection(Frame):
         elif not self.channel_dto_list:
             self.callback_no_channels()
 
+    def reload_channel(self, channel_id: str) -> None:
+        """ Reload the row of Channel with channel_id, if it is listed, keeping the rest of channel_treeview """
+        for c_index, c_dto in enumerate(self.channel_dto_list):
+            if c_dto.channel.idx == channel_id:
+                c_dto = self.channel_dto_list[c_index] = self.ytsm_controller.get_channel_dto_from_id(channel_id)
+                display_text, tag_name = self._get_channel_row(c_dto)
+                self.channel_treeview.item(str(c_index), values=(display_text,), tags=(tag_name,))
+                return
+
+    @staticmethod
+    def _get_channel_row(channel_dto: YTSMController.ChannelDTO) -> tuple[str, str]:
+        """ Get the (display text, color tag) of channel_dto's row in channel_treeview """
+        tag_name = NEW_VIDEO if channel_dto.new else UNWATCHED_VIDEO if channel_dto.unwatched else OLD_VIDEO
+        muted = '(m) ' if not channel_dto.channel.notify_on else ''
+        return f'{muted}{channel_dto.channel.name}', tag_name
+
     def add_command(self) -> None:
         """ Add a new Channel """
         url = simpledialog.askstring(f'Add Channel', f'Input YT url (/watch, /channel, /c, /user, /@):', parent=self)
@@ -188,21 +209,8 @@ class ChannelSelection(Frame):
                 messagebox.showerror('Update Channel Failed!', f'{str(e)}')
 
     def update_all_command(self) -> None:
-        """ Update all Channels """
-        try:
-            update_data = self.ytsm_controller.update_all_channels()
-        except YTSMController.UpdateAllChannelsError as e:
-            messagebox.showerror('Update All Channels Failed!', f'{str(e)}')
-        else:
-            amt = update_data['total']
-            cns = ", ".join([f'"{ud[0]}"' for ud in update_data['details']])
-            err_dict = update_data['errs']
-            err_msg = "\n".join([f"{self.ytsm_controller.get_channel_dto_from_id(k).channel.name}: "
-                                 f"{err_dict[k]}" for k in err_dict.keys()])
-            err_msg = f'Errors:\n {err_msg}' if err_msg else ''
-            messagebox.showinfo('Updated all Channels', f'All channels updated:\n {amt} total new videos in Channels:'
-                                                        f' {cns}.\n{err_msg}')
-            self.reload_data()
+        """ Update all Channels, in the background """
+        self.callback_update_all()
 
     def mute_unmute_command(self) -> None:
         """ Mute / unmute a Channel """
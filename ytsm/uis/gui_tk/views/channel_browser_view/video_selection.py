@@ -9,7 +9,9 @@ from ytsm.uis.ytsm_controller import YTSMController
 from ytsm.settings import SETTINGS, NEW_VIDEO, UNWATCHED_VIDEO, OLD_VIDEO
 
 class VideoSelection(Frame):
-    """ Frame for Video Selection """
+    """ Frame for Video Selection, Videos are loaded a page at a time as video_treeview is scrolled down """
+    video_page_size = 100  # A window of rows plus a margin, more are loaded when scrolling near the end
+    video_page_threshold = 0.9  # Fraction of video_treeview scrolled that loads the next page
     class VideoSearchFrame(Frame):
         """ Frame for Video Search controls """
         hint_video_search_str = 'Video search...'
@@ -58,11 +60,12 @@ class VideoSelection(Frame):
 
         self.video_dto_list = []
         self.channel_id = ''
+        self.has_more_videos = False
 
         self.video_search_frame = VideoSelection.VideoSearchFrame(self)
         self.video_treeview = Treeview(self, columns=('Video Name',), show='')
         self.video_treeview_scrollbar = Scrollbar(self, command=self.video_treeview.yview)
-        self.video_treeview.config(yscrollcommand=self.video_treeview_scrollbar.set)
+        self.video_treeview.config(yscrollcommand=self._video_treeview_scrolled)
 
         # Grid
         self.video_search_frame.grid(column=0, row=0, columnspan=6, sticky='nsew')
@@ -125,6 +128,37 @@ class VideoSelection(Frame):
             return self.video_dto_list[video_index]
         return None
 
+    def _video_treeview_scrolled(self, first: str, last: str) -> None:
+        """ video_treeview has been scrolled or resized. Move the scrollbar, and load the next page if near the end """
+        self.video_treeview_scrollbar.set(first, last)
+        if self.has_more_videos and float(last) >= VideoSelection.video_page_threshold:
+            self._load_video_page()
+
+    def _get_video_page(self, after: Optional[YTSMController.VideoDTO]) -> list[YTSMController.VideoDTO]:
+        """ Get the page of VideoDTOs after the VideoDTO after, or the first page if it is None """
+        return self.ytsm_controller.get_video_dto_list(self.channel_id, limit=VideoSelection.video_page_size,
+                                                       after=after)
+
+    @staticmethod
+    def _get_video_content(v_dto: YTSMController.VideoDTO) -> str:
+        """ Get the text for a VideoDTO row on video_treeview """
+        return f'{v_dto.video.name}'
+
+    def _load_video_page(self, page: Optional[list[YTSMController.VideoDTO]] = None) -> list[YTSMController.VideoDTO]:
+        """ Load the next page of VideoDTOs into video_dto_list and video_treeview, return it. Get it unless it is
+        passed as page """
+        if page is None:
+            page = self._get_video_page(self.video_dto_list[-1] if self.video_dto_list else None)
+        self.has_more_videos = len(page) == VideoSelection.video_page_size
+        first_index = len(self.video_dto_list)
+        self.video_dto_list.extend(page)
+
+        for v_index, v_dto in enumerate(page, start=first_index):
+            tag_type = NEW_VIDEO if v_dto.video.new else UNWATCHED_VIDEO if not v_dto.video.watched else OLD_VIDEO
+            self.video_treeview.insert('', END, str(v_index), values=(self._get_video_content(v_dto),),
+                                       tags=(tag_type,))
+        return page
+
     def _change_video_filter(self, call_reload_data: bool = True) -> None:
         """
         Change the video filter
@@ -140,13 +174,15 @@ class VideoSelection(Frame):
         self._change_video_search_terms()
 
     def _change_video_search_terms(self) -> None:
-        """ Perform a Video search """
+        """ Perform a Video search, in the background once the user stops typing """
         search_term = self.video_search_frame.video_search_entry.get()
         if search_term != VideoSelection.VideoSearchFrame.hint_video_search_str:
             self.ytsm_controller.set_video_search_term(search_term)
         else:
             self.ytsm_controller.set_video_search_term('')
-        self.reload_data(self.channel_id)
+        channel_id = self.channel_id
+        self.ytsm_controller.search_scheduler.schedule(self, lambda: self._get_video_page(None),
+                                                       lambda page: self.reload_data(channel_id, first_page=page))
 
     def tab_enter(self) -> None:
         """ Tab has been entered. Reload filters and search terms. """
@@ -166,24 +202,25 @@ class VideoSelection(Frame):
         """ Watch the video selected on video_treeview """
         self.video_detail.watch_video_command()
 
-    def reload_data(self, channel_id: str, *, select_video_idx: str = '', selection_activated: bool = True) -> None:
+    def reload_data(self, channel_id: str, *, select_video_idx: str = '', selection_activated: bool = True,
+                    first_page: Optional[list[YTSMController.VideoDTO]] = None) -> None:
         """
         Reloads video_dto_list and video_treeview
         :param channel_id: channel_id to load Videos for
         :param select_video_idx: id for the currently selected video if we are reloading under selection
         :param selection_activated: call _change_channel_treeview_selection() after reloading
+        :param first_page: the first page of VideoDTOs, if it was already searched in the background
         """
+        self.ytsm_controller.search_scheduler.cancel(self)  # This reload supersedes any search in the background
         self.channel_id = channel_id
-        [self.video_treeview.delete(i) for i in self.video_treeview.get_children()]  # Delete all contents
-        self.video_dto_list = self.ytsm_controller.get_video_dto_list(channel_id)
+        self.video_treeview.delete(*self.video_treeview.get_children())  # Delete all contents
+        self.video_dto_list = []
 
-        selected_index = 0
-        for v_index, v_dto in enumerate(self.video_dto_list):
-            content = f'{v_dto.video.name}'
-            tag_type = NEW_VIDEO if v_dto.video.new else UNWATCHED_VIDEO if not v_dto.video.watched else OLD_VIDEO
-            self.video_treeview.insert('', END, str(v_index), values=(content,), tags=(tag_type,))
-            if v_dto.video.idx == select_video_idx:
-                selected_index = v_index
+        # Only the first page, unless the Video to select comes later
+        video_ids = [v_dto.video.idx for v_dto in self._load_video_page(first_page)]
+        while select_video_idx and select_video_idx not in video_ids and self.has_more_videos:
+            video_ids.extend(v_dto.video.idx for v_dto in self._load_video_page())
+        selected_index = video_ids.index(select_video_idx) if select_video_idx in video_ids else 0
 
         if self.video_dto_list and selection_activated:
             self.video_treeview.selection_set(str(selected_index))
@@ -195,6 +232,8 @@ class VideoSelection(Frame):
     def no_channels(self):
         """ There are no Channels in the Channel Selection pane """
         self.channel_id = None
-        [self.video_treeview.delete(i) for i in self.video_treeview.get_children()]  # Delete all contents
+        self.video_treeview.delete(*self.video_treeview.get_children())  # Delete all contents
+        self.video_dto_list = []
+        self.has_more_videos = False
         self.video_detail.ih.clear_caches()
         self.video_detail.clear_detail()
@@ -1,12 +1,15 @@
 """ Tkinter based GUI """
 import platform
+from typing import Optional
 
 from tkinter import Tk, FLAT, messagebox, DISABLED, CENTER
 from tkinter.font import Font
 from tkinter.ttk import Style, Notebook, Progressbar
 
 from ytsm.ytsubmanager import YTSubManager
+from ytsm.model import BaseUpdateResponse, SuccessUpdateResponse
 from ytsm.uis.ytsm_controller import YTSMController
+from ytsm.uis.update_service import BackgroundUpdateService
 from ytsm.uis.gui_tk.views.all_videos_view import AllVideosView
 from ytsm.uis.gui_tk.views.channel_browser_view.channel_browser_view import ChannelBrowserView
 from ytsm.uis.gui_tk.views.settings_window.settings_window import SettingsView
@@ -20,6 +23,7 @@ class YTSMGUI(Tk):
     def __init__(self, ytsm: YTSubManager):
         super().__init__()
         self.ytsm_controller = YTSMController(ytsm)
+        self.update_service = BackgroundUpdateService(self.ytsm_controller)
 
         # Styling
         self.style = Style()
@@ -45,7 +49,8 @@ class YTSMGUI(Tk):
         # Set main notebook
         self.main_window = Notebook(self, padding=(10, 10))
         self.main_window.enable_traversal()
-        self.channel_browser_view = ChannelBrowserView(self.main_window, self.ytsm_controller)
+        self.channel_browser_view = ChannelBrowserView(self.main_window, self.ytsm_controller,
+                                                       self.call_update_all_channels)
         self.all_videos_view = AllVideosView(self.main_window, self.ytsm_controller)
         self.settings_view = SettingsView(self.main_window, self.reload_styles)
         self.about_view = AboutView(self.main_window)
@@ -70,6 +75,8 @@ class YTSMGUI(Tk):
         self.channel_browser_view.channel_selection_pane.reload_data()
         self.channel_browser_view.channel_selection_pane.focus_set()
         self.scheduled_update_caller(first_run=True)
+        self.poll_searches()
+        self.poll_updates()
         self.mainloop()
 
     def enter_tab_reload(self):
@@ -83,52 +90,72 @@ class YTSMGUI(Tk):
     def scheduled_update_caller(self, first_run: bool = False) -> None:
         """
         Schedule update loop.
-        Loop every X minutes, if activated, edit the title, show and activate the progressbar,
-        and call self.call_update_all_channels.
+        Loop every X minutes, if activated, call self.call_update_all_channels.
 
-        :param first_run: Only used on YTSMGUI instantiation, so that updating does not occur when opening app,
-        to prevent freeze when opening.
+        :param first_run: Only used on YTSMGUI instantiation, so that updating does not occur when opening app.
         """
         if SETTINGS.gui_settings.scheduled_update_activated and not first_run:
+            self.after(1000, self.call_update_all_channels, True)
+        self.after(((SETTINGS.gui_settings.scheduled_update_minutes * 60) * 1000), self.scheduled_update_caller)
+
+    def poll_searches(self) -> None:
+        """ Poll loop, show the results of the searches done in the background """
+        try:
+            self.ytsm_controller.search_scheduler.poll()
+        finally:  # Keep polling even if a search raised
+            self.after(50, self.poll_searches)
+
+    def poll_updates(self) -> None:
+        """ Poll loop, show the progress and result of the update done in the background """
+        try:
+            self.update_service.poll()
+        finally:  # Keep polling even if the update raised
+            self.after(100, self.poll_updates)
+
+    def call_update_all_channels(self, scheduled: bool = False) -> None:
+        """
+        Start an update for all channels in the background, unless one is already running. Edit the title, show and
+        reset the progressbar, which then shows the real progress as each channel is written.
+
+        :param scheduled: the update comes from scheduled_update_caller, only open a messagebox if there are new videos
+        """
+        if self.update_service.start(self.update_progress_bar,
+                                     lambda update_data, e: self.update_all_channels_done(update_data, e, scheduled)):
             self.progress_bar.grid(row=1, column=0, sticky='nsew')
             self.title('YTSM - Updating all channels...')
-            # For show, we assume update_all_channels will take ~2/3 secs, the bar will indicate the freeze is normal
-            self.progress_bar.start(interval=10)
-            self.after(1000, self.call_update_all_channels)
-        self.after(((SETTINGS.gui_settings.scheduled_update_minutes * 60) * 1000), self.scheduled_update_caller)
+            self.progress_bar.configure(value=0)
 
-    def call_update_all_channels(self) -> None:
+    def update_progress_bar(self, done: int, total: int, update_response: BaseUpdateResponse) -> None:
+        """ Show the progress of updating all channels, and the Channel that got new videos, as each one is written """
+        self.progress_bar.configure(maximum=total, value=done)
+        self.title(f'YTSM - Updating all channels... {done}/{total}')
+        if isinstance(update_response, SuccessUpdateResponse) and update_response.new_videos:
+            self.channel_browser_view.channel_selection_pane.reload_channel(update_response.channel_id)
+
+    def update_all_channels_done(self, update_data: Optional[dict], e: Optional[Exception], scheduled: bool) -> None:
         """
-        Call an update for all channels.
-        After updating fix the title, stop and hide the progressbar, and open a messagebox if there are new videos.
+        The update for all channels is over, fix the title, hide the progressbar, and open a messagebox with the
+        result, if there are new videos or it was not scheduled.
         """
-        try:
-            update_data = self.ytsm_controller.update_all_channels()
-        except YTSMController.UpdateAllChannelsError as e:
-            messagebox.showerror('Update All Channels Failed!', f'{str(e)}')
-        else:
-            # Display, if new videos
-            if update_data['total'] > 0:
-                amt = update_data['total']
-                cns = ", ".join([f'"{ud[0]}"' for ud in update_data['details']])
-                err_dict = update_data['errs']
-                err_msg = "\n".join([f"{self.ytsm_controller.get_channel_dto_from_id(k).channel.name}: "
-                                     f"{err_dict[k]}" for k in err_dict.keys()])
-                err_msg = f'Errors:\n {err_msg}' if err_msg else ''
-
-                messagebox.showinfo('Updated all Channels',
-                                    f'All channels updated:\n {amt} total new videos in Channels:'
-                                    f' {cns}\n{err_msg}')
-                notebook_index = self.main_window.index(self.main_window.select())
-                if notebook_index == 0 or notebook_index == 1:
-                    self.channel_browser_view.channel_selection_pane.reload_data(selection_activated=False)
-                    self.all_videos_view.video_selection_frame.reload_data('')
-
-        # Clean
         self.title("YTSM")
-        self.progress_bar.stop()
         self.progress_bar.grid_remove()
 
+        if e:
+            messagebox.showerror('Update All Channels Failed!', f'{str(e)}')
+        elif update_data['total'] > 0 or not scheduled:
+            amt = update_data['total']
+            cns = ", ".join([f'"{ud[0]}"' for ud in update_data['details']])
+            err_dict = update_data['errs']
+            err_msg = "\n".join([f"{self.ytsm_controller.get_channel_dto_from_id(k).channel.name}: "
+                                 f"{err_dict[k]}" for k in err_dict.keys()])
+            err_msg = f'Errors:\n {err_msg}' if err_msg else ''
+
+            messagebox.showinfo('Updated all Channels',
+                                f'All channels updated:\n {amt} total new videos in Channels:'
+                                f' {cns}\n{err_msg}')
+            if amt > 0:  # The Channels' rows were already reloaded as they were written
+                self.all_videos_view.video_selection_frame.reload_data('')
+
     def reload_styles(self, reload_tags: bool = True) -> None:
         """ 
         Reload styling
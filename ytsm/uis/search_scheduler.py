@@ -0,0 +1,86 @@
+""" Debounced searches, off the UI thread """
+import queue
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional
+
+
+class SearchScheduler:
+    """
+    Runs searches on a worker thread. Searches scheduled under the same key are debounced: a search only runs once no
+    newer one was scheduled for delay seconds, and the results of superseded searches are discarded.
+    Results are delivered by poll(), so callbacks run on the UI thread that calls it.
+    """
+    def __init__(self, delay: float = 0.2):
+        self.delay = delay
+        self.generations: dict[Hashable, int] = {}  # key -> generation of its latest search
+        self.pending: dict[Hashable, tuple[int, float, Callable[[], Any], Callable[[Any], None]]] = {}
+        self.results: queue.Queue = queue.Queue()
+        self.condition = threading.Condition()
+        self.worker: Optional[threading.Thread] = None
+
+    def schedule(self, key: Hashable, search: Callable[[], Any], callback: Callable[[Any], None]) -> None:
+        """ Schedule search under key, replacing the search pending under it, callback gets its result on poll() """
+        with self.condition:
+            generation = self.generations.get(key, 0) + 1
+            self.generations[key] = generation
+            self.pending[key] = (generation, time.monotonic() + self.delay, search, callback)
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._work, daemon=True)
+                self.worker.start()
+            self.condition.notify()
+
+    def cancel(self, key: Hashable) -> None:
+        """ Cancel the search pending under key, and discard the result of the one running, if any """
+        with self.condition:
+            self.generations[key] = self.generations.get(key, 0) + 1
+            self.pending.pop(key, None)
+
+    def _work(self) -> None:
+        """ Worker loop, run the pending searches as they are due """
+        while True:
+            with self.condition:
+                while True:
+                    if not self.pending:
+                        self.condition.wait()
+                        continue
+                    key, (generation, due, search, callback) = min(self.pending.items(), key=lambda i: i[1][1])
+                    remaining = due - time.monotonic()
+                    if remaining <= 0:
+                        del self.pending[key]
+                        break
+                    self.condition.wait(remaining)
+
+            try:
+                self.results.put((key, generation, callback, search(), None))
+            except Exception as e:  # Raised on poll(), as if the search had run there
+                self.results.put((key, generation, callback, None, e))
+
+    def poll(self, timeout: float = 0) -> int:
+        """
+        Run the callbacks of the finished searches that are still the latest for their key, on the calling thread.
+        :param timeout: seconds to wait for a search to finish, if none has
+        :raises Exception: the exception a search raised, once the callbacks of the other finished searches have run
+        :return int, the number of callbacks run
+        """
+        finished = []
+        try:
+            finished.append(self.results.get(timeout=timeout) if timeout else self.results.get_nowait())
+            while True:
+                finished.append(self.results.get_nowait())
+        except queue.Empty:
+            pass
+
+        amt_run = 0
+        first_exception = None
+        for key, generation, callback, result, exception in finished:
+            if generation != self.generations.get(key):  # A newer search was scheduled, or it was cancelled
+                continue
+            if exception:
+                first_exception = first_exception or exception
+                continue
+            callback(result)
+            amt_run += 1
+        if first_exception:
+            raise first_exception
+        return amt_run
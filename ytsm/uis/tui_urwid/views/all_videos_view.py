@@ -1,14 +1,13 @@
 """ All Videos View """
-from typing import Callable
-from urwid import Columns, LineBox, AttrMap
+from typing import Callable, Optional
+from urwid import Columns, LineBox
 
-from ytsm.uis.tui_urwid.widgets import MenuButton
 from ytsm.uis.tui_urwid.views.channel_browser_view.channel_browser_view import ChannelBrowserView
 from ytsm.uis.tui_urwid.views.channel_browser_view.video_selector_pane import VideoSelectorPane
 
 from ytsm.uis.ytsm_controller import YTSMController
 
-from ytsm.settings import SETTINGS, NEW_VIDEO, UNWATCHED_VIDEO, OLD_VIDEO
+from ytsm.settings import SETTINGS
 
 
 class AllVideosView(ChannelBrowserView):
@@ -36,24 +35,24 @@ class AllVideosVideoSelectorPane(VideoSelectorPane):
     """ Frame for All Videos Video Selector, reimplements VideoSelectorPane but changes reload_data and
     video_search_bar functionality """
     def video_search_bar_edit(self, search_terms: str) -> None:
-        """ Perform a Video search """
+        """ Perform a Video search, in the background once the user stops typing """
         self.ytsm_controller.set_video_search_term(search_terms)
-        self.reload_view('')
+        self.ytsm_controller.search_scheduler.schedule(self, lambda: self._get_video_page(None),
+                                                       lambda first_page: self.reload_view('', first_page=first_page))
 
-    def reload_view(self, channel_id: str, reset_position: bool = False):
+    def reload_view(self, channel_id: str, reset_position: bool = False,
+                    first_page: Optional[list[YTSMController.VideoDTO]] = None):
         """
-        Reload the VSF data
+        Reload the VSF data, with the first page of VideoDTOs if it was already searched in the background
         """
-        self.video_dto_list = self.ytsm_controller.get_video_dto_list('', all_videos=True)
-
-        video_select_vsf_data = []
-        for video_dto in self.video_dto_list:
-            color = NEW_VIDEO if video_dto.video.new else UNWATCHED_VIDEO if not video_dto.video.watched else OLD_VIDEO
-            video_select_vsf_data.append(
-                AttrMap(MenuButton(f'{video_dto.video.sensible_pubdate()} - {video_dto.channel_name} - '
-                                   f'{video_dto.video.name}', video_dto), color)
-            )
-
-        self.video_select_VSF.load_data(video_select_vsf_data, reset_position=reset_position)
-        if not self.video_dto_list:
-            self.focused_video_dto = None
+        self._load_videos(reset_position, first_page)
+
+    def _get_video_page(self, after: Optional[YTSMController.VideoDTO]) -> list[YTSMController.VideoDTO]:
+        """ Get the page of VideoDTOs after the VideoDTO after, or the first page if it is None """
+        return self.ytsm_controller.get_video_dto_list('', all_videos=True,
+                                                       limit=VideoSelectorPane.video_page_size, after=after)
+
+    @staticmethod
+    def _get_video_caption(video_dto: YTSMController.VideoDTO) -> str:
+        """ Get the caption for a VideoDTO's MenuButton """
+        return f'{video_dto.video.sensible_pubdate()} - {video_dto.channel_name} - {video_dto.video.name}'
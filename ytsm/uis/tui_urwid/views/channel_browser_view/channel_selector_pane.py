@@ -1,8 +1,8 @@
 """ Channel Selector Pane """
-from typing import Callable
+from typing import Callable, Optional
 
 from urwid import AttrMap, Frame, Edit, connect_signal
-from ytsm.uis.tui_urwid.widgets import VerticalScrollFrame, CommandBar, MenuButton
+from ytsm.uis.tui_urwid.widgets import VerticalScrollFrame, CommandBar, LazyListWalker, MenuButton
 from ytsm.uis.tui_urwid.views.base_view import BaseView
 
 from ytsm.uis.ytsm_controller import YTSMController
@@ -62,20 +62,22 @@ class ChannelSelectorPane(BaseView):
         else:
             super().keypress(size, key)
 
-    def reload_view(self, reset_position: bool = False) -> None:
-        """ Reload the VSF data """
-        self.channel_dto_list = self.ytsm_controller.get_channel_dto_list()
-
-        channel_select_vsf_data = []
-        for channel_dto in self.channel_dto_list:
-            color = NEW_VIDEO if channel_dto.new else UNWATCHED_VIDEO if channel_dto.unwatched else OLD_VIDEO
-            muted = '(m) ' if not channel_dto.channel.notify_on else ''
-            display_text = f'{muted}{channel_dto.channel.name}'
-            channel_select_vsf_data.append(
-                AttrMap(MenuButton(display_text, channel_dto), color)
-            )
-
-        self.channel_select_VSF.load_data(channel_select_vsf_data, reset_position=reset_position)
+    def reload_view(self, reset_position: bool = False,
+                    channel_dto_list: Optional[list[YTSMController.ChannelDTO]] = None) -> None:
+        """ Reload the VSF data, with the ChannelDTOs if they were already searched in the background """
+        self.ytsm_controller.search_scheduler.cancel(self)  # This reload supersedes any search in the background
+        # A single page, only the widgets are made on demand
+        walker = LazyListWalker(lambda after: self.ytsm_controller.get_channel_dto_list(), self._make_channel_widget,
+                                first_page=channel_dto_list)
+        self.channel_dto_list = walker.items
+        self.channel_select_VSF.load_walker(walker, reset_position=reset_position)
+
+    @staticmethod
+    def _make_channel_widget(channel_dto: YTSMController.ChannelDTO) -> AttrMap:
+        """ Make the widget for a ChannelDTO """
+        color = NEW_VIDEO if channel_dto.new else UNWATCHED_VIDEO if channel_dto.unwatched else OLD_VIDEO
+        muted = '(m) ' if not channel_dto.channel.notify_on else ''
+        return AttrMap(MenuButton(f'{muted}{channel_dto.channel.name}', channel_dto), color)
 
     def channel_select_VSF_render_callback(self, focus_index: int) -> None:
         """ Callback for channel_select_VSF render events """
@@ -93,9 +95,11 @@ class ChannelSelectorPane(BaseView):
             self.keypress_callback(channel_dto, key)
 
     def channel_search_bar_edit(self, input_str: str) -> None:
-        """ Channel search terms on channel_search_bar changed """
+        """ Channel search terms on channel_search_bar changed, search in the background once the user stops typing """
         self.ytsm_controller.set_channel_search_term(input_str)
-        self.reload_view()
+        self.ytsm_controller.search_scheduler.schedule(
+            self, self.ytsm_controller.get_channel_dto_list,
+            lambda channel_dto_list: self.reload_view(channel_dto_list=channel_dto_list))
 
     def remove_channel_command(self, channel_dto: YTSMController.ChannelDTO) -> None:
         """ Remove a Channel """
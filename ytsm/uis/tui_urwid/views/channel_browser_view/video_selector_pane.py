@@ -1,8 +1,8 @@
 """ Channel Selector Pane """
-from typing import Callable
+from typing import Callable, Optional
 
 from urwid import AttrMap, Button, Columns, Frame, Edit, connect_signal
-from ytsm.uis.tui_urwid.widgets import VerticalScrollFrame, MenuButton, CommandBar
+from ytsm.uis.tui_urwid.widgets import VerticalScrollFrame, MenuButton, CommandBar, LazyListWalker
 from ytsm.uis.tui_urwid.views.base_view import BaseView
 
 from ytsm.uis.ytsm_controller import YTSMController
@@ -10,7 +10,8 @@ from ytsm.settings import SETTINGS, NEW_VIDEO, UNWATCHED_VIDEO, OLD_VIDEO
 
 
 class VideoSelectorPane(BaseView):
-    """ Video selector Pane """
+    """ Video selector Pane, Videos are fetched a page at a time as the list is scrolled down """
+    video_page_size = 100
     def __init__(self, master, ytsm_controller: YTSMController, bottom_bar: CommandBar,
                  callback_open_video_detail_view: Callable, callback_video_alterations: Callable):
         self.ytsm_controller = ytsm_controller
@@ -83,10 +84,12 @@ class VideoSelectorPane(BaseView):
             self.keypress_callback(video_dto, key)
 
     def video_search_bar_edit(self, search_terms: str) -> None:
-        """ Perform a Video search """
+        """ Perform a Video search, in the background once the user stops typing """
         if self.channel_id:
             self.ytsm_controller.set_video_search_term(search_terms)
-            self.reload_view(self.channel_id)
+            self.ytsm_controller.search_scheduler.schedule(
+                self, lambda: self._get_video_page(None),
+                lambda first_page: self.reload_view(self.channel_id, first_page=first_page))
         else:
             print("!")
             exit(0)
@@ -143,30 +146,46 @@ class VideoSelectorPane(BaseView):
         # Reload search terms
         self.video_search_bar_edit(self.video_search_bar.get_edit_text())
 
-    def reload_view(self, channel_id: str, reset_position: bool = False) -> None:
+    def reload_view(self, channel_id: str, reset_position: bool = False,
+                    first_page: Optional[list[YTSMController.VideoDTO]] = None) -> None:
         """
-        Reload the VSF data
+        Reload the VSF data, with the first page of VideoDTOs if it was already searched in the background
         """
         if self.video_alterations_happening:  # Don't reload when the reload_view() happens on a video alteration call
             return None
 
         self.channel_id = channel_id
-        self.video_dto_list = self.ytsm_controller.get_video_dto_list(channel_id)
-
-        video_select_vsf_data = []
-        for video_dto in self.video_dto_list:
-            color = NEW_VIDEO if video_dto.video.new else UNWATCHED_VIDEO if not video_dto.video.watched else OLD_VIDEO
-            video_select_vsf_data.append(
-                AttrMap(MenuButton(f'{video_dto.video.name}', video_dto), color)
-            )
-
-        self.video_select_VSF.load_data(video_select_vsf_data, reset_position=reset_position)
+        self._load_videos(reset_position, first_page)
+
+    def _get_video_page(self, after: Optional[YTSMController.VideoDTO]) -> list[YTSMController.VideoDTO]:
+        """ Get the page of VideoDTOs after the VideoDTO after, or the first page if it is None """
+        return self.ytsm_controller.get_video_dto_list(self.channel_id, limit=VideoSelectorPane.video_page_size,
+                                                       after=after)
+
+    @staticmethod
+    def _get_video_caption(video_dto: YTSMController.VideoDTO) -> str:
+        """ Get the caption for a VideoDTO's MenuButton """
+        return f'{video_dto.video.name}'
+
+    def _make_video_widget(self, video_dto: YTSMController.VideoDTO) -> AttrMap:
+        """ Make the widget for a VideoDTO """
+        color = NEW_VIDEO if video_dto.video.new else UNWATCHED_VIDEO if not video_dto.video.watched else OLD_VIDEO
+        return AttrMap(MenuButton(self._get_video_caption(video_dto), video_dto), color)
+
+    def _load_videos(self, reset_position: bool, first_page: Optional[list[YTSMController.VideoDTO]] = None) -> None:
+        """ Load the VSF with a LazyListWalker over the Videos, their widgets are made as they are shown """
+        self.ytsm_controller.search_scheduler.cancel(self)  # This reload supersedes any search in the background
+        walker = LazyListWalker(self._get_video_page, self._make_video_widget,
+                                page_size=VideoSelectorPane.video_page_size, first_page=first_page)
+        self.video_dto_list = walker.items  # Grows as pages are fetched
+        self.video_select_VSF.load_walker(walker, reset_position=reset_position)
         if not self.video_dto_list:
             self.focused_video_dto = None
 
     def no_channels(self) -> None:
         """ There are no Channels in the Channel Selection pane """
         self.channel_id = None
+        self.video_dto_list = []
         self.video_select_VSF.load_data([])
 
     def watch_video_command(self, video_dto: YTSMController.VideoDTO) -> None:
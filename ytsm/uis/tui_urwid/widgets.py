@@ -1,8 +1,8 @@
 """ Custom urwid widgets """
-from typing import Callable
+from typing import Callable, Optional
 
-from urwid import AttrMap, Button, Edit, Frame, ListBox, Padding, \
-    SimpleFocusListWalker, Text, CENTER, LEFT
+from urwid import AttrMap, Button, Edit, Frame, ListBox, ListWalker, Padding, \
+    SimpleFocusListWalker, Text, Widget, CENTER, LEFT
 
 
 class SelectableText(Text):
@@ -24,6 +24,75 @@ class MenuButton(Button):
             self._w = AttrMap(SelectableText(caption, wrap='ellipsis', align=align), None, focus_map='reversed')
 
 
+class LazyListWalker(ListWalker):
+    """
+    ListWalker that fetches its items a page at a time from page_source as the ListBox reaches them, and makes their
+    widgets on demand with make_widget, keeping only the widgets within cache_margin positions of the focus
+    """
+    def __init__(self, page_source: Callable[[Optional[object]], list], make_widget: Callable[[object], Widget], *,
+                 page_size: Optional[int] = None, cache_margin: int = 100, first_page: Optional[list] = None):
+        """
+        :param page_source: called with the last item fetched, or None for the first page, returns the next page
+        :param page_size: pages shorter than page_size are the last one, if None the first page holds every item
+        :param first_page: the first page, if it was already fetched
+        """
+        self.page_source = page_source
+        self.make_widget = make_widget
+        self.page_size = page_size
+        self.cache_margin = cache_margin
+
+        self.items: list = []
+        self.widgets: dict[int, Widget] = {}
+        self.has_more_items = True
+        self.focus = 0
+        self._load_page(first_page)
+
+    def _load_page(self, page: Optional[list] = None) -> None:
+        """ Fetch the next page of items, unless it is passed as page """
+        if page is None:
+            page = self.page_source(self.items[-1] if self.items else None)
+        self.has_more_items = self.page_size is not None and len(page) == self.page_size
+        self.items.extend(page)
+
+    def _load_until(self, position: int) -> None:
+        """ Fetch pages until there is an item at position, or there are no more """
+        while position >= len(self.items) and self.has_more_items:
+            self._load_page()
+
+    def __getitem__(self, position: int) -> Widget:
+        """ Get the widget at position, making it if it isn't cached
+        :raises IndexError: if there is no item at position """
+        if position < 0:
+            raise IndexError(position)
+        self._load_until(position)
+        if position not in self.widgets:
+            self.widgets[position] = self.make_widget(self.items[position])
+        return self.widgets[position]
+
+    def next_position(self, position: int) -> int:
+        """ Get the position after position
+        :raises IndexError: if there is no next position """
+        self._load_until(position + 1)
+        if position + 1 >= len(self.items):
+            raise IndexError(position + 1)
+        return position + 1
+
+    def prev_position(self, position: int) -> int:
+        """ Get the position before position
+        :raises IndexError: if there is no previous position """
+        if position <= 0:
+            raise IndexError(position - 1)
+        return position - 1
+
+    def set_focus(self, position: int) -> None:
+        """ Set the focus position, and drop the widgets far from it
+        :raises IndexError: if there is no item at position """
+        self[position]
+        self.focus = position
+        self.widgets = {p: w for p, w in self.widgets.items() if abs(p - position) <= self.cache_margin}
+        self._modified()
+
+
 class VerticalScrollListBox(ListBox):
     """
     Augmented ListBox widget that scrolls with mouse scroll and notifies when its rendering,
@@ -35,7 +104,21 @@ class VerticalScrollListBox(ListBox):
 
     def load_data(self, data: list) -> None:
         """ Load data into SimpleFocusListWalker """
-        self.body[:] = data
+        if isinstance(self.body, SimpleFocusListWalker):
+            self.body[:] = data
+        else:
+            self.body = SimpleFocusListWalker(data)
+
+    def load_walker(self, walker: LazyListWalker, reset_position: bool = False) -> None:
+        """ Replace the ListWalker with a LazyListWalker, keeping the focus position unless reset_position """
+        focus_position = None if reset_position else self.body.get_focus()[1]
+        self.body = walker
+        if focus_position:
+            try:
+                walker.set_focus(focus_position)
+            except IndexError:  # The list got shorter, focus the last item
+                if walker.items:
+                    walker.set_focus(len(walker.items) - 1)
 
     def mouse_event(self, size, event, button, col, row, focus) -> None:
         """ Transform scrolls up and down into keypress events """
@@ -81,6 +164,10 @@ class VerticalScrollFrame(Frame):
         if reset_position and (len(self.scroll_listbox.body) > 0):
             self.scroll_listbox.focus_position = 0
 
+    def load_walker(self, walker: LazyListWalker, reset_position: bool = False) -> None:
+        """ Load a LazyListWalker into ListBox """
+        self.scroll_listbox.load_walker(walker, reset_position=reset_position)
+
     def render_callback(self, end_visible) -> None:
         """
         Callback function when ListBox is rendering, make overflowing indicators visible or not visible depending
@@ -63,8 +63,14 @@ class YTSMTui:
         self.main_frame = Frame(body=self.channel_browser_view, footer=self.bottom_command_bar)
         self.loop = MainLoop(self.main_frame, palette=self.palette, unhandled_input=self.unhandled_input)
         self.loop.screen.set_terminal_properties(colors=16)
+        self.loop.set_alarm_in(0.05, self.poll_searches)
         self.loop.run()
 
+    def poll_searches(self, loop: MainLoop, _=None) -> None:
+        """ Poll loop, show the results of the searches done in the background """
+        self.ytsm_controller.search_scheduler.poll()
+        loop.set_alarm_in(0.05, self.poll_searches)
+
     def unhandled_input(self, event) -> None:
         """ Handle unhandled input """
 
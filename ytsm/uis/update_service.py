@@ -0,0 +1,80 @@
+""" Updating all Channels, off the UI thread """
+import queue
+import threading
+from typing import Callable, Optional
+
+from ytsm.model import BaseUpdateResponse
+from ytsm.uis.ytsm_controller import YTSMController
+
+
+class BackgroundUpdateService:
+    """
+    Updates all Channels on a worker thread, so the UI doesn't freeze meanwhile. Each Channel is committed as soon as
+    it is written, so the UI can show it, and keep writing, while the rest update.
+    Progress and results are delivered by poll(), so callbacks run on the UI thread that calls it.
+    """
+    PROGRESS, DONE, ERROR = range(3)  # Kinds of events
+
+    def __init__(self, ytsm_controller: YTSMController):
+        self.ytsm_controller = ytsm_controller
+        self.events: queue.Queue = queue.Queue()  # (kind, payload) for poll() to deliver
+        self.worker: Optional[threading.Thread] = None
+        self.progress_callback: Optional[Callable[[int, int, BaseUpdateResponse], None]] = None
+        self.done_callback: Optional[Callable[[Optional[dict], Optional[Exception]], None]] = None
+
+    @property
+    def running(self) -> bool:
+        """ Whether an update is running, or its done_callback is yet to be called """
+        return self.worker is not None
+
+    def start(self, progress_callback: Callable[[int, int, BaseUpdateResponse], None],
+              done_callback: Callable[[Optional[dict], Optional[Exception]], None]) -> bool:
+        """
+        Start updating all Channels, unless an update is already running
+        :param progress_callback: called on poll() with (done, total, update_response) after each Channel is written
+        :param done_callback: called on poll() with (YTSMController.update_all_channels response, None), or with
+        (None, UpdateAllChannelsError) if the update failed
+        :return bool, whether the update was started
+        """
+        if self.running:
+            return False
+        self.progress_callback, self.done_callback = progress_callback, done_callback
+        self.worker = threading.Thread(target=self._work, daemon=True)
+        self.worker.start()
+        return True
+
+    def _work(self) -> None:
+        """ Worker, update all Channels, queueing the progress and the result for poll() """
+        try:
+            update_data = self.ytsm_controller.update_all_channels(
+                progress_callback=lambda *progress: self.events.put((self.PROGRESS, progress)))
+        except YTSMController.UpdateAllChannelsError as e:
+            self.events.put((self.DONE, (None, e)))
+        except Exception as e:  # Raised on poll(), as if the update had run there
+            self.events.put((self.ERROR, e))
+        else:
+            self.events.put((self.DONE, (update_data, None)))
+        finally:
+            self.ytsm_controller.release_thread()  # Each update has its own thread, don't leave its reader open
+
+    def poll(self) -> int:
+        """
+        Call the callbacks for the progress made, and the result of the update once it is over, on the calling thread.
+        :raises Exception: an unexpected exception the update raised
+        :return int, the number of callbacks called
+        """
+        amt_called = 0
+        while True:
+            try:
+                kind, payload = self.events.get_nowait()
+            except queue.Empty:
+                return amt_called
+
+            if kind == self.PROGRESS:
+                self.progress_callback(*payload)
+            else:  # The update is over
+                self.worker = None
+                if kind == self.ERROR:
+                    raise payload
+                self.done_callback(*payload)
+            amt_called += 1
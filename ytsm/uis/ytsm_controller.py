@@ -2,10 +2,14 @@
 from __future__ import annotations
 
 import dataclasses
+import threading
 import webbrowser
+from typing import Callable, Optional
 
 from ytsm.ytsubmanager import YTSubManager
-from ytsm.model import Channel, Video
+from ytsm.model import Channel, Video, VideoStateType, BaseUpdateResponse
+from ytsm.uis.channel_name_index import ChannelNameIndex
+from ytsm.uis.search_scheduler import SearchScheduler
 
 
 class YTSMController:
@@ -20,6 +24,14 @@ class YTSMController:
 
         self.channel_search_term = ''
         self.video_search_term = ''
+        self.channel_name_index = ChannelNameIndex()  # Channel searches as the user types don't hit the database
+        self.channel_name_index_built = False  # Built on the first full reload or search, then kept up to date
+        self.channel_name_index_lock = threading.Lock()  # Searches run on search_scheduler's thread
+        self.search_scheduler = SearchScheduler()  # Shared by the UI views, to search while the user types
+
+    def release_thread(self) -> None:
+        """ Release the database connections of the calling thread, call it before a worker thread exits """
+        self.ytsm.release_thread()
 
     def get_channel_dto_from_id(self, channel_id: str) -> ChannelDTO:
         """
@@ -31,65 +43,87 @@ class YTSMController:
         except YTSubManager.ChannelDoesNotExist:
             raise self.ChannelIDNotFound(channel_id)
 
-    def make_channel_dto(self, channel: Channel) -> ChannelDTO:
-        """ Make a Channel DTO from a Channel """
-        total, new, unwatched = self.ytsm.get_amt_videos(channel_id=channel.idx)
+    def make_channel_dto(self, channel: Channel, amt_videos: Optional[tuple[int, int, int]] = None) -> ChannelDTO:
+        """ Make a Channel DTO from a Channel, and its (all, new, unwatched) video counts if they are already known """
+        total, new, unwatched = amt_videos if amt_videos else self.ytsm.get_amt_videos(channel_id=channel.idx)
         return YTSMController.ChannelDTO(channel=channel, total=total, new=new, unwatched=unwatched)
 
     def make_video_dto(self, video: Video) -> VideoDTO:
-        """ Make a Video DTO from a Video """
-        return YTSMController.VideoDTO(video=video, channel_name=self.ytsm.get_channel(video.channel_id).name)
+        """ Make a Video DTO from a Video, Videos queried along their Channel already carry its name """
+        channel_name = video.channel_name if video.channel_name is not None else \
+            self.ytsm.get_channel(video.channel_id).name
+        return YTSMController.VideoDTO(video=video, channel_name=channel_name)
 
     def get_channel_dto_list(self) -> list[ChannelDTO]:
         """
         Get a list of ChannelDTO objects.
-        Either returns all channels, or performs a search for self.channel_search_term, if it has been set.
+        Either returns all channels sorted by name, or performs a search for self.channel_search_term, if it has been
+        set, sorted by how well their names match it.
+        Listing all channels is a full reload, which also brings the Channel name index up to date with the database.
+        Searches only read the Channels that match.
         """
         if self.channel_search_term:
-            channel_list = self.ytsm.find_channels(name_str=self.channel_search_term)
+            with self.channel_name_index_lock:
+                if not self.channel_name_index_built:
+                    self._sync_channel_name_index(self.ytsm.get_all_channels())
+                found_ids = self.channel_name_index.search(self.channel_search_term)
+            channels = {c.idx: c for c in self.ytsm.get_channels(found_ids)}
+            channel_list = [channels[idx] for idx in found_ids if idx in channels]  # Removed since the last reload
         else:
             channel_list = self.ytsm.get_all_channels()
+            with self.channel_name_index_lock:
+                self._sync_channel_name_index(channel_list)
+            channel_list.sort(key=lambda c: c.name.upper())
+
+        # Channels carry their Video counters, no need to count per Channel
+        return [self.make_channel_dto(c, (c.total_count, c.new_count, c.unwatched_count)) for c in channel_list]
 
-        return sorted([self.make_channel_dto(c) for c in channel_list], key=lambda cdto: cdto.channel.name.upper())
+    def _sync_channel_name_index(self, channel_list: list[Channel]) -> None:
+        """ Bring the Channel name index up to date with all the Channels, call under channel_name_index_lock """
+        self.channel_name_index.sync(channel_list)
+        self.channel_name_index_built = True
 
-    def get_video_dto_list(self, channel_id: str, *, all_videos: bool = False) -> list[VideoDTO]:
+    def get_video_dto_list(self, channel_id: str, *, all_videos: bool = False, limit: Optional[int] = None,
+                           after: Optional[VideoDTO] = None) -> list[VideoDTO]:
         """
         Get a list of VideoDTO objects, either by channel_id or all of them by passing all_videos=True
         If self.video_filter, or a self.video_search_type and self.video_search_term has been altered, return after
         performing a search, filter, or both.
+        Pass limit to get a page of at most limit VideoDTOs, and the last VideoDTO of a page as after to get the next.
         """
-        # Search terms
+        # Search terms and filter, in a single query
         if all_videos:
             channel_id = None
+        video_state_type = {YTSMController.ALL: VideoStateType.all, YTSMController.NEW: VideoStateType.new,
+                            YTSMController.UNWATCHED: VideoStateType.unwatched}[self.video_filter]
 
         video_list = []
+        query = {'channel_id': channel_id, 'video_state_type': video_state_type, 'limit': limit,
+                 'after': (after.video.pubdate, after.video.idx) if after else None}
         if self.video_search_term:
             if self.video_search_type == YTSMController.NAME:
-                video_list = self.ytsm.find_video_by_name(name_str=self.video_search_term, channel_id=channel_id)
+                video_list = self.ytsm.query_videos(name_str=self.video_search_term, **query)
             elif self.video_search_type == YTSMController.DESC:
-                video_list = self.ytsm.find_video_by_desc(desc_str=self.video_search_term, channel_id=channel_id)
+                video_list = self.ytsm.query_videos(desc_str=self.video_search_term, **query)
             elif self.video_search_type == YTSMController.DATE:
                 try:
                     date_min, date_max = self.video_search_term.split(' ')
-                    video_list = self.ytsm.get_all_videos_by_date_range(date_min, date_max, channel_id=channel_id)
+                    video_list = self.ytsm.query_videos(date_range=(date_min, date_max), **query)
                 except ValueError:
                     video_list = []
         else:
-            video_list = self.ytsm.get_all_videos(channel_id=channel_id)
-
-        # Filter # TODO: YTSubManager, a way to search by term + filter?
-        video_dto_list = [self.make_video_dto(v) for v in video_list]
-        if self.video_filter == YTSMController.NEW:
-            video_dto_list = filter(lambda v_dto: v_dto.video.new, video_dto_list)
-        elif self.video_filter == YTSMController.UNWATCHED:
-            video_dto_list = filter(lambda v_dto: not v_dto.video.watched, video_dto_list)
+            video_list = self.ytsm.query_videos(**query)
 
-        # Mark videos as old if not all_videos call (channel is being visited)
+        # Mark videos as old if not all_videos call (channel is being visited). When paging, only the Videos on the
+        # page, so that the NEW filter still finds the Videos on the pages that are yet to be fetched
         if not all_videos:
-            self.ytsm.mark_all_videos_old(channel_id=channel_id)
+            if limit is None:
+                self.ytsm.mark_all_videos_old(channel_id=channel_id)
+            else:
+                self.ytsm.mark_videos_old([v.idx for v in video_list if v.new])
 
-        # Order
-        return sorted(video_dto_list, key=lambda vdto: vdto.video.pubdate, reverse=True)
+        # Ordered by the query, newest first
+        return [self.make_video_dto(v) for v in video_list]
 
     def set_channel_search_term(self, channel_search_terms: str) -> None:
         """ Change the search terms for Channels in order to search by name when requesting data. """
@@ -132,16 +166,22 @@ class YTSMController:
         except YTSubManager.BaseYTSMError as e:
             raise self.AddChannelError(f'{e.args[0]}')
         else:
-            return self.ytsm.get_channel(idx)
+            channel = self.ytsm.get_channel(idx)
+            with self.channel_name_index_lock:
+                self.channel_name_index.add(channel.idx, channel.name)
+            return channel
 
     def remove_channel(self, channel_dto: ChannelDTO) -> None:
         """ Remove a Channel """
         self.ytsm.remove_channel(channel_dto.channel.idx)
+        with self.channel_name_index_lock:
+            self.channel_name_index.remove(channel_dto.channel.idx)
 
     def mark_channel_all_watched(self, channel_dto: ChannelDTO) -> None:
         """ Mark all videos in a channel as watched """
-        self.ytsm.mark_all_videos_watched(channel_dto.channel.idx)
-        self.ytsm.mark_all_videos_old(channel_dto.channel.idx)
+        with self.ytsm.transaction():
+            self.ytsm.mark_all_videos_watched(channel_dto.channel.idx)
+            self.ytsm.mark_all_videos_old(channel_dto.channel.idx)
 
     def update_channel(self, channel_dto: ChannelDTO) -> int:
         """
@@ -154,15 +194,17 @@ class YTSMController:
             raise YTSMController.UpdateChannelError(f'{e}')
         return amt
 
-    def update_all_channels(self) -> dict:
+    def update_all_channels(self, *,
+                            progress_callback: Optional[Callable[[int, int, BaseUpdateResponse], None]] = None) -> dict:
         """
         Update all Channels, return the total amount of new videos, and the amount per channel name, as a list of
         tuples under the key "details".
+        :param progress_callback: called after each Channel is processed with (done, total, update_response)
         :raises UpdateAllChannelsError: if the attempt to update all channels failed
         :return : dict -> {'total': 2, 'details': [('channel_name', 1), ('channel_name', 1)]}
         """
         try:
-            update_data = self.ytsm.update_all_channels()
+            update_data = self.ytsm.update_all_channels(progress_callback=progress_callback)
         except YTSubManager.BaseYTSMError as e:
             raise YTSMController.UpdateAllChannelsError(f'{e}')
         else:
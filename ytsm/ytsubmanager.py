@@ -1,10 +1,10 @@
 """ CRUD Interface for accessing the repository and scraper"""
-from typing import Optional
+from typing import Callable, ContextManager, Iterator, Optional, Union
 
 from ytsm.scraper.yt_scraper import YTScraper
 from ytsm.repository.sqlite_repository import AbstractRepository
-from ytsm.model import Channel, Video, VideoStateType, SuccessUpdateResponse, ErrorUpdateResponse, \
-    MultipleUpdateResponse
+from ytsm.model import Channel, Video, VideoStateType, VideoOrderType, BaseUpdateResponse, SuccessUpdateResponse, \
+    ErrorUpdateResponse, MultipleUpdateResponse
 
 
 class YTSubManager:
@@ -13,6 +13,19 @@ class YTSubManager:
         self.repository = repository
         self.scraper = YTScraper()
 
+    def close(self) -> None:
+        """ Close the scraper's pooled connections, and the repository's """
+        self.scraper.close()
+        self.repository.close()
+
+    def release_thread(self) -> None:
+        """ Close the repository's connections of the calling thread, call it before a thread that used it exits """
+        self.repository.release_thread()
+
+    def transaction(self) -> ContextManager[None]:
+        """ Unit of work, the changes made inside are committed once at the end, or rolled back if it raises """
+        return self.repository.transaction()
+
     def add_channel(self, url: str) -> str:
         """
         Add a new channel via its URL, accepted URLs are /channel, /watch , /user, /c, and /@ urls
@@ -43,11 +56,10 @@ class YTSubManager:
         except self.scraper.YTScraperError as e:
             raise self.ScraperError(f'Error getting channel information: {str(type(e))} - {channel_id}')
 
-        # 4 - Create channel
-        self._add_channel(channel_info['id'], channel_info['name'], channel_info['url'], thumbnail_url)
-
-        # 5 - Update channel
-        self.update_channel(channel_id, use_cache=True)
+        # 4 - Create channel and 5 - Update channel, from the cached feed, both or neither
+        with self.transaction():
+            self._add_channel(channel_info['id'], channel_info['name'], channel_info['url'], thumbnail_url)
+            self.update_channel(channel_id, use_cache=True)
 
         return channel_id
 
@@ -66,26 +78,59 @@ class YTSubManager:
         else:
             return self._update_video_list(ur.video_list, channel_id)
 
-    def update_all_channels(self) -> dict:
+    def update_all_channels(self, *,
+                            progress_callback: Optional[Callable[[int, int, BaseUpdateResponse], None]] = None) -> dict:
         """
         Update all Channels by scraping and adding the new Videos if any. Uses parallel scraping.
+        Each Channel is committed as it is written, so the database isn't locked while the feeds are fetched.
+
+        :param progress_callback: called after each Channel is processed with (done, total, update_response)
 
         :raises ChannelDoesNotExist: if Channel with channel_id does not exist in the database
 
         :return dict, {'total': total_new, 'new': {channel_id: amt}, 'errs: {}} -> Only Channel's that have new videos.
         """
-        mur = self.scraper.get_video_list_multiple([c.idx for c in self.get_all_channels()])
         response_dict = {'total': 0, 'new': {}, 'errs': {}}
-        for sur in mur.successes:
-            amt = self._update_video_list(sur.video_list, sur.channel_id)
-            response_dict['total'] += amt
-            if amt > 0:
-                response_dict['new'][sur.channel_id] = amt
-        for eur in mur.errors:
-            response_dict['errs'][eur.channel_id] = eur.exception
+        channel_ids = [c.idx for c in self.get_all_channels()]
+        for done, ur in enumerate(self._iter_update_channels(channel_ids), start=1):
+            if isinstance(ur, ErrorUpdateResponse):
+                response_dict['errs'][ur.channel_id] = ur.exception
+            else:
+                response_dict['total'] += ur.new_videos
+                if ur.new_videos > 0:
+                    response_dict['new'][ur.channel_id] = ur.new_videos
+            if progress_callback:
+                progress_callback(done, len(channel_ids), ur)
 
         return response_dict
 
+    def iter_update_all_channels(self) -> Iterator[Union[SuccessUpdateResponse, ErrorUpdateResponse]]:
+        """
+        Update all Channels, yielding each Channel's update response as soon as it has been written. Feeds are fetched
+        and parsed in the background, while the writing happens on the caller's thread. The SuccessUpdateResponses
+        have their new_videos set.
+
+        :raises ChannelDoesNotExist: if Channel with channel_id does not exist in the database
+        """
+        return self._iter_update_channels([c.idx for c in self.get_all_channels()])
+
+    def _iter_update_channels(self, channel_ids: list[str]) -> Iterator[Union[SuccessUpdateResponse,
+                                                                              ErrorUpdateResponse]]:
+        """
+        Update the Channels with channel_ids, yielding each Channel's update response as soon as it has been written.
+        Each Channel's Videos and feed validators are committed together, in a transaction that doesn't span any fetch.
+
+        :raises ChannelDoesNotExist: if Channel with channel_id does not exist in the database
+        """
+        for ur in self.scraper.iter_video_list_multiple(channel_ids, validators=self.repository.get_feed_validators()):
+            if isinstance(ur, SuccessUpdateResponse):
+                with self.transaction():
+                    if not ur.not_modified:  # Feed didn't change, nothing to add
+                        ur.new_videos = self._update_video_list(ur.video_list, ur.channel_id)
+                    if ur.etag or ur.last_modified:
+                        self._set_feed_validators(ur.channel_id, ur.etag, ur.last_modified)
+            yield ur
+
     def _update_video_list(self, videos_dict_list: list[dict], channel_id: str) -> int:
         """
         Update a list of Videos on Channel with channel_id by adding all videos until we meet the last video uploaded
@@ -99,27 +144,25 @@ class YTSubManager:
         except self.repository.ObjectDoesNotExist:
             raise self.ChannelDoesNotExist(channel_id)
 
-        num_new_videos = 0
-        if last_video:
-            for video in videos_dict_list:
-                if video['id'] != last_video.idx:
-                    try:
-                        self._add_video(video['id'], video['channel_id'], video['name'], video['url'], video['pubdate'],
-                                        video['description'], video['thumbnail'], deferred_commit=True)
-                        num_new_videos += 1
-                    except self.VideoAlreadyExists:
-                        pass
-
-                else:
-                    break
-        else:  # No videos
-            for video in videos_dict_list:
-                self._add_video(video['id'], video['channel_id'], video['name'], video['url'], video['pubdate'],
-                                video['description'], video['thumbnail'], deferred_commit=True)
-                num_new_videos += 1
-
-        self.repository.commit()  # Commit changes
-        return num_new_videos
+        new_videos = []
+        for video in videos_dict_list:
+            if last_video and video['id'] == last_video.idx:
+                break
+            # Added Videos are always New and Unwatched.
+            new_videos.append((video['id'], video['name'], video['url'], video['pubdate'], video['description'],
+                               video['thumbnail'], True, False))
+
+        return self._add_videos(channel_id, new_videos)
+
+    def _set_feed_validators(self, channel_id: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """
+        Save the feed validators of Channel with channel_id, for conditional requests on the next update
+        :raises ChannelDoesNotExist: if Channel with channel_id does not exist in the database
+        """
+        try:
+            self.repository.set_feed_validators(channel_id, etag, last_modified)
+        except AbstractRepository.ObjectDoesNotExist:
+            raise self.ChannelDoesNotExist(channel_id)
 
     def _get_last_video_from_channel(self, channel_id: str) -> Optional[Video]:
         """
@@ -163,6 +206,10 @@ class YTSubManager:
         """ Get all the Channels from the database """
         return self.repository.get_all_channels()
 
+    def get_channels(self, channel_ids: list[str]) -> list[Channel]:
+        """ Get the Channels with an id in channel_ids, in no particular order. Ids with no Channel are left out """
+        return self.repository.get_channels(channel_ids)
+
     def _add_video(self, video_id: str, channel_id: str, video_name: str, video_url: str, video_pubdate: str,
                    video_description: str, video_thumbnail: str, *, deferred_commit: bool = False) -> None:
         """
@@ -179,6 +226,24 @@ class YTSubManager:
         except AbstractRepository.ObjectDoesNotExist:
             raise self.ChannelDoesNotExist(channel_id)
 
+    def _add_videos(self, channel_id: str, rows: list[tuple[str, str, str, str, str, str, bool, bool]]) -> int:
+        """
+        Add Videos to the database in bulk, skipping the ones already in it
+        :raises ChannelDoesNotExist: if Channel with channel_id does not exist in the database
+        :return int, the number of Videos added
+        """
+        try:
+            return self.repository.add_videos(channel_id, rows)
+        except AbstractRepository.ObjectDoesNotExist:
+            raise self.ChannelDoesNotExist(channel_id)
+
+    def trim_videos(self, max_videos: int) -> int:
+        """
+        Delete the oldest Videos over max_videos in every Channel, in a single transaction
+        :return int, the number of Videos deleted
+        """
+        return self.repository.trim_videos(max_videos)
+
     def get_video(self, video_id: str) -> Video:
         """
         Get a Video from the database
@@ -189,15 +254,33 @@ class YTSubManager:
         except AbstractRepository.ObjectDoesNotExist:
             raise self.VideoDoesNotExist(video_id)
 
-    def find_video_by_name(self, name_str: str, *, channel_id: Optional[str] = None) -> list[Video]:
+    def find_video_by_name(self, name_str: str, *, channel_id: Optional[str] = None,
+                           ranked: bool = False) -> list[Video]:
         """ Find Videos which names contain name_str, case-insensitive. Optionally look only inside a specific
-        Channel """
-        return self.repository.find_video_by_key(name_str, channel_id=channel_id)
+        Channel, or order them by relevance with ranked, when the full-text search index is available """
+        return self.repository.find_video_by_key(name_str, channel_id=channel_id, ranked=ranked)
 
-    def find_video_by_desc(self, desc_str: str, *, channel_id: Optional[str] = None) -> list[Video]:
+    def find_video_by_desc(self, desc_str: str, *, channel_id: Optional[str] = None,
+                           ranked: bool = False) -> list[Video]:
         """ Find Videos which desc contain desc_str, case-insensitive. Optionally look only inside a specific
-        Channel """
-        return self.repository.find_video_by_key(desc_str, desc=True, channel_id=channel_id)
+        Channel, or order them by relevance with ranked, when the full-text search index is available """
+        return self.repository.find_video_by_key(desc_str, desc=True, channel_id=channel_id, ranked=ranked)
+
+    def query_videos(self, *, channel_id: Optional[str] = None, video_state_type: VideoStateType = VideoStateType.all,
+                     name_str: Optional[str] = None, desc_str: Optional[str] = None,
+                     date_range: Optional[tuple[str, str]] = None,
+                     order: Optional[VideoOrderType] = VideoOrderType.newest,
+                     limit: Optional[int] = None, after: Optional[tuple[str, str]] = None) -> list[Video]:
+        """
+        Get Videos from the database in a single query, every argument narrows it down: look only inside a specific
+        Channel, filter them by VideoStateType, by names or desc containing name_str or desc_str (case-insensitive),
+        or by date_range[0] < pubdate < date_range[1]. Ordered by VideoOrderType, or not at all if None. At most
+        limit Videos are returned, for pages pass the (pubdate, id) of the last Video of the previous page as after.
+        :raises ValueError: if after is passed without VideoOrderType.newest or VideoOrderType.oldest
+        """
+        return self.repository.query_videos(channel_id=channel_id, video_state_type=video_state_type,
+                                            name_str=name_str, desc_str=desc_str, date_range=date_range, order=order,
+                                            limit=limit, after=after)
 
     def get_all_videos(self, *, channel_id: Optional[str] = None) -> list[Video]:
         """ Get all the Videos from the database. Optionally look only inside a specific Channel """
@@ -207,6 +290,10 @@ class YTSubManager:
         """ Edit Video with video_id to new=False """
         self.repository.mark_video_as_old(video_id)
 
+    def mark_videos_old(self, video_ids: list[str]) -> None:
+        """ Edit every Video with an id in video_ids to new=False """
+        self.repository.mark_videos_old(video_ids)
+
     def mark_all_videos_old(self, channel_id: str) -> None:
         """ Edit all Videos in a Channel to new=False """
         self.repository.mark_all_videos_old(channel_id)
@@ -242,6 +329,13 @@ class YTSubManager:
                 self.repository.amt_channel_videos(channel_id=channel_id, video_state_type=VideoStateType.new),
                 self.repository.amt_channel_videos(channel_id=channel_id, video_state_type=VideoStateType.unwatched))
 
+    def get_amt_videos_by_channel(self, channel_ids: Optional[list[str]] = None) -> dict[str, tuple[int, int, int]]:
+        """
+        Return {channel_id: (all videos, new videos, unwatched videos)} for every Channel, or only for the ones with
+        channel_ids. Channels without Videos are left out.
+        """
+        return self.repository.amt_channels_videos(channel_ids)
+
     def _remove_video(self, video_id: str) -> None:
         """
         Remove a Video from the database